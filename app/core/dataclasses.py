@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-from app.core.enums import RuleAction
+from app.core.enums import FailMode, RuleAction
 
 
 @dataclass
@@ -11,9 +11,16 @@ class Rule:
     language: str
     body: str
     action: RuleAction
+    backend: str | None = None
 
 
 @dataclass
 class SemgrepLangConfig:
     file_extension: str
     config_name: str | None = None
+
+
+@dataclass
+class FlowPolicy:
+    timeout: float | None = None
+    fail_mode: FailMode = FailMode.OPEN
@@ -44,3 +44,35 @@ class Language(str, Enum):
 class RuleAction(str, Enum):
     NOTIFY = "notify"
     BLOCK = "block"
+
+
+class RegexBackend(str, Enum):
+    RE = "re"
+    REGEX = "regex"
+    RE2 = "re2"
+
+
+class SimilarityBackend(str, Enum):
+    OPENSEARCH = "opensearch"
+    LOCAL = "local"
+
+
+class EventEncoding(str, Enum):
+    JSON = "json"
+    ORJSON = "orjson"
+    MSGPACK = "msgpack"
+
+
+class CacheBackendType(str, Enum):
+    MEMORY = "memory"
+    REDIS = "redis"
+
+
+class ExecutionMode(str, Enum):
+    ALL = "all"
+    SHORT_CIRCUIT = "short_circuit"
+
+
+class FailMode(str, Enum):
+    OPEN = "open"
+    CLOSED = "closed"
@@ -1,11 +1,15 @@
 import asyncio
+import hashlib
 from datetime import datetime
 
-from app.core.enums import ActionStatus
-from app.models.pipeline import PipelineResult, TaskResult
+from app.core.dataclasses import FlowPolicy
+from app.core.enums import ActionStatus, CacheBackendType, FailMode
+from app.models.pipeline import PipelineResult, TaskRequest, TaskResult
 from app.pipelines.base import BasePipeline
-from app.utils import get_pipelines_from_config
-from app.modules.kafka_client import KafkaClient
+from app.utils import get_flow_policies_from_config, get_flow_tiers_from_config, get_pipelines_from_config
+from app.modules.kafka_client import KAFKA_CLIENT
+from app.modules.logger import pipeline_logger
+from app.modules.verdict_cache import VerdictCache, create_cache_backend
 from settings import get_settings
 
 
@@ -16,6 +20,21 @@ class PipelineManager:
     This class coordinates the task process by loading pipeline configurations
     and executing the appropriate pipelines for each pipeline flow. It determines the
     final pipeline status based on the results from all active pipelines.
+
+    Flows run all their pipelines concurrently by default. Short-circuit
+    flows run their pipelines tier by tier, cheapest first: once a pipeline
+    returns BLOCK, the rest of its tier is cancelled and later tiers are skipped.
+
+    Each request has a deadline (per flow, overridable per request) and each
+    pipeline a time budget. A pipeline that misses either is reported with
+    status ERROR, and the fail mode of the flow decides whether it is ignored
+    (open) or blocks the request (closed).
+
+    With the verdict cache enabled, task results are cached by prompt hash,
+    flow and the versions of the flow's pipelines, in process memory or in a
+    Redis-protocol server shared by replicas. Repeated prompts are answered
+    from the cache with `cached` set, and concurrent misses of a prompt are
+    analyzed once.
     """
 
     def __init__(self):
@@ -28,52 +47,248 @@ class PipelineManager:
         self.settings = get_settings()
         pipelines_config: list[dict] = self.settings.PIPELINE_CONFIG
         self.pipeline_flows: dict[str, list[BasePipeline]] = get_pipelines_from_config(pipelines_config)
+        self.flow_tiers: dict[str, list[list[BasePipeline]]] = get_flow_tiers_from_config(
+            pipelines_config, self.pipeline_flows
+        )
+        self.flow_policies: dict[str, FlowPolicy] = get_flow_policies_from_config(pipelines_config)
+        self.verdict_cache = VerdictCache(
+            create_cache_backend(
+                self.settings.VERDICT_CACHE_BACKEND,
+                max_entries=self.settings.VERDICT_CACHE_MAX_ENTRIES,
+                redis_url=self.settings.VERDICT_CACHE_REDIS_URL,
+                redis_prefix=self.settings.VERDICT_CACHE_REDIS_PREFIX,
+            ),
+            ttl=self.settings.VERDICT_CACHE_TTL,
+            lock_timeout=self.settings.VERDICT_CACHE_LOCK_TIMEOUT,
+            secret=self.settings.VERDICT_CACHE_SECRET,
+        )
+        if self.verdict_cache.enabled and not self.settings.VERDICT_CACHE_SECRET:
+            if self.settings.VERDICT_CACHE_BACKEND == CacheBackendType.REDIS:
+                pipeline_logger.warning("VERDICT_CACHE_SECRET is not set, replicas will not share cache entries")
 
         if self.settings.KAFKA:
-            self.kafka_client = KafkaClient()
+            self.kafka_client = KAFKA_CLIENT
         else:
             self.kafka_client = None
 
-    def __task_status(self, task_result: list[PipelineResult]) -> ActionStatus:
+    def __task_status(self, task_result: list[PipelineResult], fail_mode: FailMode = FailMode.OPEN) -> ActionStatus:
         """
         Determine the overall task status based on individual pipeline results.
 
         Args:
             task_result: List of PipelineResult objects from individual pipelines
+            fail_mode: Whether pipelines with status ERROR are ignored (open) or block (closed)
 
         Returns:
             ActionStatus: The overall status based on the most severe result:
-                - BLOCK if any pipeline returned BLOCK
+                - BLOCK if any pipeline returned BLOCK, or ERROR in fail-closed mode
                 - NOTIFY if any pipeline returned NOTIFY (and no BLOCK)
                 - ALLOW if all pipelines returned ALLOW or no results
         """
         if not task_result:
             return ActionStatus.ALLOW
-        if any(result.status == ActionStatus.BLOCK for result in task_result):
+        if any(self.__is_blocking(result, fail_mode) for result in task_result):
             return ActionStatus.BLOCK
         if any(result.status == ActionStatus.NOTIFY for result in task_result):
             return ActionStatus.NOTIFY
         return ActionStatus.ALLOW
 
+    @staticmethod
+    def __is_blocking(result: PipelineResult, fail_mode: FailMode) -> bool:
+        """
+        Checks whether a pipeline result blocks the request under a fail mode.
+        """
+        return result.status == ActionStatus.BLOCK or (
+            result.status == ActionStatus.ERROR and fail_mode == FailMode.CLOSED
+        )
+
+    def __pipeline_timeout(self, pipeline: BasePipeline) -> float | None:
+        """
+        Returns the time budget of a pipeline from PIPELINE_TIMEOUTS or PIPELINE_TIMEOUT.
+        """
+        return self.settings.PIPELINE_TIMEOUTS.get(pipeline.name, self.settings.PIPELINE_TIMEOUT)
+
+    def __time_limit(self, pipeline: BasePipeline, deadline: float | None) -> float | None:
+        """
+        Returns the seconds a pipeline may run: the lower of its time budget and the time left until the deadline.
+        """
+        limits = [limit for limit in (self.__pipeline_timeout(pipeline),) if limit is not None]
+        if deadline is not None:
+            limits.append(deadline - asyncio.get_running_loop().time())
+        return max(min(limits), 0.0) if limits else None
+
+    async def __run_with_deadline(self, pipeline: BasePipeline, prompt: str, deadline: float | None) -> PipelineResult:
+        """
+        Runs a pipeline within its time budget and the request deadline.
+
+        Args:
+            pipeline: Pipeline to run
+            prompt: The text to be analyzed
+            deadline: Event loop time by which the request must finish, None for no deadline
+
+        Returns:
+            PipelineResult: Result of the pipeline, or status ERROR with a reason if it timed out
+        """
+        if (timeout := self.__time_limit(pipeline, deadline)) is None:
+            return await pipeline.run(prompt, deadline=None)
+        try:
+            async with asyncio.timeout(timeout):
+                return await pipeline.run(prompt, deadline=asyncio.get_running_loop().time() + timeout)
+        except TimeoutError:
+            return self.__timed_out(pipeline, timeout)
+
+    async def __run_batch_with_deadline(
+        self, pipeline: BasePipeline, prompts: list[str], deadline: float | None
+    ) -> list[PipelineResult]:
+        """
+        Runs a pipeline on several prompts within its time budget and the batch deadline.
+
+        Args:
+            pipeline: Pipeline to run
+            prompts: The texts to be analyzed
+            deadline: Event loop time by which the batch must finish, None for no deadline
+
+        Returns:
+            list[PipelineResult]: Results in the order of prompts, all with status ERROR if the pipeline timed out
+        """
+        if (timeout := self.__time_limit(pipeline, deadline)) is None:
+            return await pipeline.run_batch(prompts, deadline=None)
+        try:
+            async with asyncio.timeout(timeout):
+                return await pipeline.run_batch(prompts, deadline=asyncio.get_running_loop().time() + timeout)
+        except TimeoutError:
+            return [self.__timed_out(pipeline, timeout)] * len(prompts)
+
+    @staticmethod
+    def __timed_out(pipeline: BasePipeline, timeout: float) -> PipelineResult:
+        """
+        Creates the ERROR result of a pipeline that did not finish in time.
+        """
+        reason = f"timed out after {timeout:.3f}s"
+        pipeline_logger.warning(f"[{pipeline}] {reason}")
+        return PipelineResult(name=str(pipeline), status=ActionStatus.ERROR, reason=reason)
+
+    def __build_task(self, pipeline_results: list[PipelineResult], policy: FlowPolicy) -> TaskResult:
+        """
+        Aggregates pipeline results into a task result.
+
+        Args:
+            pipeline_results: Results of the pipelines that ran
+            policy: Deadline and fail mode of the flow
+
+        Returns:
+            TaskResult: Overall status and the results with BLOCK, NOTIFY or ERROR status
+        """
+        pipelines_result = [
+            result
+            for result in pipeline_results
+            if result.status in (ActionStatus.BLOCK, ActionStatus.NOTIFY, ActionStatus.ERROR)
+        ]
+        status = self.__task_status(pipelines_result, policy.fail_mode)
+        return TaskResult(status=status, pipelines=pipelines_result)
+
+    def __flow_fingerprint(self, pipeline_flow: str) -> str:
+        """
+        Computes the version fingerprint of a flow from its configuration and the versions of its pipelines.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        policy = self.flow_policies.get(pipeline_flow) or FlowPolicy()
+        tiers = self.flow_tiers.get(pipeline_flow) or [self.pipeline_flows.get(pipeline_flow, [])]
+        digest.update(f"{policy.fail_mode.value}\0{pipeline_flow in self.flow_tiers}\0".encode())
+        for tier in tiers:
+            for pipeline in tier:
+                digest.update(f"{pipeline.name}\0{pipeline.version}\0".encode())
+            digest.update(b"\1")
+        return digest.hexdigest()
+
+    def __cache_key(self, prompt: str, pipeline_flow: str) -> str | None:
+        """
+        Builds the verdict cache key of a prompt, None if the cache is disabled.
+        """
+        if not self.verdict_cache.enabled:
+            return None
+        return self.verdict_cache.key(prompt, pipeline_flow, lambda: self.__flow_fingerprint(pipeline_flow))
+
+    def stats(self) -> dict:
+        """
+        Collects the counters of the verdict cache and of the pipelines of all flows.
+
+        Returns:
+            dict: Verdict cache counters under "verdict_cache", counters by pipeline name under "pipelines"
+        """
+        pipelines = {pipeline.name: pipeline for flow in self.pipeline_flows.values() for pipeline in flow}
+        return {
+            "verdict_cache": self.verdict_cache.stats(),
+            "pipelines": {name: stats for name, pipeline in pipelines.items() if (stats := pipeline.stats())},
+        }
+
     def __send_to_kafka(self, prompt: str, task: TaskResult, task_id: str | int | None = None):
         if not self.kafka_client:
             return
         if task.status in (ActionStatus.BLOCK, ActionStatus.NOTIFY):
-            payload = task.model_dump()
-            payload.update(
-                {
-                    "service": self.settings.PROJECT_NAME,
-                    "version": self.settings.VERSION,
-                    "timestamp": datetime.now().isoformat(),
-                }
+            event = self.kafka_client.encoder.encode_verdict(
+                task,
+                service=self.settings.PROJECT_NAME,
+                version=self.settings.VERSION,
+                timestamp=datetime.now().isoformat(),
+                task_id=task_id,
+                prompt=prompt if self.settings.KAFKA.save_prompt else None,
             )
-            if self.settings.KAFKA.save_prompt:
-                payload["prompt"] = prompt
-            if task_id:
-                payload["task_id"] = task_id
-            self.kafka_client.send_message(payload)
+            self.kafka_client.send_message(event)
+
+    async def __run_tiers(
+        self, prompt: str, tiers: list[list[BasePipeline]], policy: FlowPolicy, deadline: float | None
+    ) -> list[PipelineResult]:
+        """
+        Runs pipelines tier by tier until one of them blocks the request.
+
+        Pipelines of a tier run concurrently. When a result is BLOCK (or ERROR
+        in fail-closed mode), pipelines of the tier that are still running are
+        cancelled and later tiers are skipped.
+
+        Args:
+            prompt: The text to be analyzed
+            tiers: Pipelines grouped by cost, cheapest first
+            policy: Deadline and fail mode of the flow
+            deadline: Event loop time by which the request must finish
+
+        Returns:
+            list[PipelineResult]: Results of the pipelines that completed, in flow order
+        """
+        results: list[PipelineResult] = []
+        for index, tier in enumerate(tiers):
+            tasks = {
+                asyncio.create_task(self.__run_with_deadline(pipeline, prompt, deadline)): position
+                for position, pipeline in enumerate(tier)
+            }
+            pending = set(tasks)
+            completed: dict[int, PipelineResult] = {}
+            blocked = False
+            try:
+                while pending and not blocked:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        completed[tasks[task]] = task.result()
+                        blocked = blocked or self.__is_blocking(completed[tasks[task]], policy.fail_mode)
+            finally:
+                for task in pending:
+                    task.cancel()
+            results.extend(completed[position] for position in sorted(completed))
+            if blocked:
+                skipped = [str(pipeline) for later in tiers[index + 1 :] for pipeline in later]
+                pipeline_logger.debug(
+                    f"Short-circuited after tier {index}, cancelled {len(pending)}, skipped: {', '.join(skipped)}"
+                )
+                break
+        return results
 
-    async def run_pipeline(self, prompt: str, pipeline_flow: str, task_id: str | int | None = None) -> TaskResult:
+    async def run_pipeline(
+        self,
+        prompt: str,
+        pipeline_flow: str,
+        task_id: str | int | None = None,
+        timeout: float | None = None,
+    ) -> TaskResult:
         """
         Executes the task process for a given prompt using the specified pipeline flow.
 
@@ -81,22 +296,121 @@ class PipelineManager:
             prompt: The text to be analyzed for malicious content
             pipeline_flow: The pipeline flow type (e.g., 'base', 'code') that determines
                      which pipelines to use
+            task_id: Task identifier passed to Kafka events
+            timeout: Request deadline in seconds, overriding the deadline of the flow
 
         Returns:
             TaskResult: Contains the overall task status and individual pipeline results.
-                       Only includes pipelines that returned BLOCK or NOTIFY status.
+                       Only includes pipelines that returned BLOCK, NOTIFY or ERROR status.
         """
         pipelines = self.pipeline_flows.get(pipeline_flow, [])
         if not pipelines:
             return TaskResult(status=ActionStatus.ALLOW, pipelines=[])
-        pipeline_results = await asyncio.gather(*[pipeline.run(prompt) for pipeline in pipelines])
-        pipelines_result = [
-            result for result in pipeline_results if result.status in (ActionStatus.BLOCK, ActionStatus.NOTIFY)
-        ]
-        status = self.__task_status(pipelines_result)
-        task = TaskResult(status=status, pipelines=pipelines_result)
+        policy = self.flow_policies.get(pipeline_flow) or FlowPolicy()
+        timeout = timeout if timeout is not None else policy.timeout
+        deadline = asyncio.get_running_loop().time() + timeout if timeout is not None else None
+
+        async def analyze() -> TaskResult:
+            if tiers := self.flow_tiers.get(pipeline_flow):
+                pipeline_results = await self.__run_tiers(prompt, tiers, policy, deadline)
+            else:
+                pipeline_results = await asyncio.gather(
+                    *[self.__run_with_deadline(pipeline, prompt, deadline) for pipeline in pipelines]
+                )
+            return self.__build_task(pipeline_results, policy)
+
+        if (cache_key := self.__cache_key(prompt, pipeline_flow)) is not None:
+            task = await self.verdict_cache.get_or_compute(cache_key, analyze, deadline=deadline)
+        else:
+            task = await analyze()
         self.__send_to_kafka(prompt=prompt, task_id=task_id, task=task)
         return task
 
+    async def run_batch(self, requests: list[TaskRequest]) -> list[TaskResult]:
+        """
+        Executes the task process for several prompts.
+
+        Requests are grouped by pipeline flow and timeout. Each pipeline of a
+        group analyzes all its prompts in one `run_batch` call. In
+        short-circuit flows, prompts blocked by a tier are not passed to later
+        tiers. The time budget of a pipeline and the deadline apply to the
+        whole group. Prompts found in the verdict cache are not analyzed; the
+        cache is read and written once per batch.
+
+        Args:
+            requests: Prompts with their pipeline flows, task ids and timeouts
+
+        Returns:
+            list[TaskResult]: Task results in the order of requests
+        """
+        groups: dict[tuple[str, float | None], list[int]] = {}
+        results: list[TaskResult | None] = [None] * len(requests)
+        cache_keys = [self.__cache_key(request.prompt, request.pipeline_flow) for request in requests]
+        cached = [index for index, cache_key in enumerate(cache_keys) if cache_key is not None]
+        if cached:
+            for index, task in zip(cached, await self.verdict_cache.get_many([cache_keys[i] for i in cached])):
+                results[index] = task
+        for index, request in enumerate(requests):
+            if results[index] is None:
+                groups.setdefault((request.pipeline_flow, request.timeout), []).append(index)
+        group_results = await asyncio.gather(
+            *[
+                self.__run_group([requests[index] for index in indexes], flow, timeout)
+                for (flow, timeout), indexes in groups.items()
+            ]
+        )
+        computed: dict[str, TaskResult] = {}
+        for indexes, tasks in zip(groups.values(), group_results):
+            for index, task in zip(indexes, tasks):
+                results[index] = task
+                if cache_keys[index] is not None:
+                    computed[cache_keys[index]] = task
+        if computed:
+            await self.verdict_cache.put_many(computed)
+        for request, task in zip(requests, results):
+            self.__send_to_kafka(prompt=request.prompt, task_id=request.task_id, task=task)
+        return results
+
+    async def __run_group(
+        self, requests: list[TaskRequest], pipeline_flow: str, timeout: float | None
+    ) -> list[TaskResult]:
+        """
+        Runs the pipelines of one flow on a group of requests.
+
+        Args:
+            requests: Requests of the group
+            pipeline_flow: Pipeline flow of the group
+            timeout: Deadline in seconds of the group, overriding the deadline of the flow
+
+        Returns:
+            list[TaskResult]: Task results in the order of requests
+        """
+        pipelines = self.pipeline_flows.get(pipeline_flow, [])
+        if not pipelines:
+            return [TaskResult(status=ActionStatus.ALLOW, pipelines=[]) for _ in requests]
+        policy = self.flow_policies.get(pipeline_flow) or FlowPolicy()
+        timeout = timeout if timeout is not None else policy.timeout
+        deadline = asyncio.get_running_loop().time() + timeout if timeout is not None else None
+        short_circuit = pipeline_flow in self.flow_tiers
+        pipeline_results: list[list[PipelineResult]] = [[] for _ in requests]
+        pending = list(range(len(requests)))
+        for tier in self.flow_tiers.get(pipeline_flow) or [pipelines]:
+            prompts = [requests[index].prompt for index in pending]
+            tier_results = await asyncio.gather(
+                *[self.__run_batch_with_deadline(pipeline, prompts, deadline) for pipeline in tier]
+            )
+            for results in tier_results:
+                for index, result in zip(pending, results):
+                    pipeline_results[index].append(result)
+            if short_circuit:
+                pending = [
+                    index
+                    for index in pending
+                    if not any(self.__is_blocking(result, policy.fail_mode) for result in pipeline_results[index])
+                ]
+                if not pending:
+                    break
+        return [self.__build_task(results, policy) for results in pipeline_results]
+
 
 pipeline_manager: PipelineManager = PipelineManager()
@@ -7,6 +7,7 @@ class TaskRequest(BaseModel):
     prompt: str
     task_id: str | int | None = None
     pipeline_flow: str = "default"
+    timeout: float | None = None
 
 
 class TriggeredRuleData(BaseModel):
@@ -23,11 +24,13 @@ class PipelineResult(BaseModel):
     status: ActionStatus
     name: str
     triggered_rules: list[TriggeredRuleData] = []
+    reason: str | None = None
 
 
 class TaskResult(BaseModel):
     status: ActionStatus
     pipelines: list[PipelineResult]
+    cached: bool = False
 
 
 class TaskResponse(BaseModel):
@@ -47,3 +50,8 @@ class FlowInfo(BaseModel):
 
 class FlowsResponse(BaseModel):
     flows: list[FlowInfo]
+
+
+class MetricsResponse(BaseModel):
+    verdict_cache: dict
+    pipelines: dict[str, dict]
@@ -0,0 +1,197 @@
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.modules.logger import pipeline_logger
+
+
+@dataclass
+class _PendingEmbedding:
+    texts: list[str]
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+
+
+class EmbeddingService:
+    """
+    Asynchronous embedding service that batches texts across concurrent requests.
+
+    Awaiters submit texts; a dedicated worker thread collects pending texts
+    for up to `max_wait_ms` milliseconds or until `max_batch_size` texts are
+    pending, runs one batched `encode` call and resolves each awaiter's
+    future. Texts submitted together are always encoded in the same call.
+    `encode` sorts the batch by length internally, so mini-batches of
+    `encode_batch_size` texts carry little padding.
+
+    Attributes:
+        max_batch_size (int): Maximum number of texts per batched encode call
+        max_wait_ms (float): How long the worker waits for more texts after the first one
+        encode_batch_size (int): Mini-batch size passed to the model's encode
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 5.0, encode_batch_size: int = 32) -> None:
+        """
+        Initializes the service and starts its worker thread.
+
+        Args:
+            model: Loaded SentenceTransformer model
+            max_batch_size (int): Maximum number of texts per batched encode call
+            max_wait_ms (float): Collection window in milliseconds
+            encode_batch_size (int): Mini-batch size passed to the model's encode
+        """
+        self._model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.encode_batch_size = encode_batch_size
+        self._queue: queue.Queue[_PendingEmbedding | None] = queue.Queue()
+        self._batches = 0
+        self._embedded_texts = 0
+        self._max_batch_size_seen = 0
+        self._last_batch_size = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+        self._worker.start()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Creates a normalized vector embedding for a text.
+
+        Args:
+            text (str): Text to convert to vector
+
+        Returns:
+            np.ndarray: float32 vector embedding
+
+        Raises:
+            RuntimeError: If the service is closed
+            Exception: Any error raised by the model while encoding the batch
+        """
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: list[str]) -> list[np.ndarray]:
+        """
+        Creates normalized vector embeddings for several texts in one encode call.
+
+        Args:
+            texts (list[str]): Texts to convert to vectors
+
+        Returns:
+            list[np.ndarray]: float32 vector embeddings in the order of texts
+
+        Raises:
+            RuntimeError: If the service is closed
+            Exception: Any error raised by the model while encoding the batch
+        """
+        if not texts:
+            return []
+        if not self._worker.is_alive():
+            raise RuntimeError("Embedding service is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_PendingEmbedding(texts=texts, loop=loop, future=future))
+        return await future
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth and batch size statistics.
+
+        Returns:
+            dict: Current queue depth, number of batches and batch sizes
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self._batches,
+            "embedded_texts": self._embedded_texts,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size": self._max_batch_size_seen,
+            "avg_batch_size": self._embedded_texts / self._batches if self._batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        Stops the worker thread after pending texts are embedded.
+        """
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+
+    def _run(self) -> None:
+        """
+        Worker loop: collects a batch, encodes it and resolves the futures.
+        """
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect_batch(first)
+            self._encode_batch(batch)
+            if stop:
+                return
+
+    def _collect_batch(self, first: _PendingEmbedding) -> tuple[list[_PendingEmbedding], bool]:
+        """
+        Collects pending texts until the batch is full or the wait window has passed.
+
+        Args:
+            first (_PendingEmbedding): Text that opened the batch
+
+        Returns:
+            tuple[list[_PendingEmbedding], bool]: Collected texts and whether the service is closing
+        """
+        batch = [first]
+        batch_size = len(first.texts)
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while batch_size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                return batch, True
+            batch.append(pending)
+            batch_size += len(pending.texts)
+        return batch, False
+
+    def _encode_batch(self, batch: list[_PendingEmbedding]) -> None:
+        """
+        Runs one encode call for the batch and resolves every awaiter.
+
+        Args:
+            batch (list[_PendingEmbedding]): Texts to embed
+        """
+        batch = [pending for pending in batch if not pending.future.cancelled()]
+        texts = [text for pending in batch for text in pending.texts]
+        if not texts:
+            return
+        self._batches += 1
+        self._embedded_texts += len(texts)
+        self._last_batch_size = len(texts)
+        self._max_batch_size_seen = max(self._max_batch_size_seen, len(texts))
+        try:
+            vectors = self._model.encode(texts, batch_size=self.encode_batch_size, normalize_embeddings=True)
+            # Copy each row so a vector kept by the cache does not pin the whole batch matrix
+            vectors = [np.array(row) for row in np.asarray(vectors, dtype=np.float32)]
+        except Exception as err:
+            pipeline_logger.error(f"Failed to embed batch of {len(texts)} texts: {err}")
+            for pending in batch:
+                pending.loop.call_soon_threadsafe(self._set_exception, pending.future, err)
+            return
+        offset = 0
+        for pending in batch:
+            result = vectors[offset : offset + len(pending.texts)]
+            offset += len(pending.texts)
+            pending.loop.call_soon_threadsafe(self._set_result, pending.future, result)
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, result: list[np.ndarray]) -> None:
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, err: Exception) -> None:
+        if not future.done():
+            future.set_exception(err)
@@ -0,0 +1,88 @@
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.enums import ActionStatus, EventEncoding, RuleAction  # noqa: E402
+from app.models.pipeline import PipelineResult, TaskResult, TriggeredRuleData  # noqa: E402
+from app.modules.event_encoder import EVENT_ENCODERS, msgpack, orjson  # noqa: E402
+
+AVAILABLE = {
+    EventEncoding.JSON: True,
+    EventEncoding.ORJSON: orjson is not None,
+    EventEncoding.MSGPACK: msgpack is not None,
+}
+
+
+def sample_task(rules: int) -> TaskResult:
+    """
+    Builds a verdict with two blocking pipelines and `rules` triggered rules each.
+    """
+    return TaskResult(
+        status=ActionStatus.BLOCK,
+        pipelines=[
+            PipelineResult(
+                name=name,
+                status=ActionStatus.BLOCK,
+                triggered_rules=[
+                    TriggeredRuleData(
+                        id=f"{name}-{i}",
+                        name=f"Rule {i} of {name}",
+                        details="Potential prompt injection: instruction override detected in user input",
+                        action=RuleAction.BLOCK,
+                        severity="high",
+                        cwe_id="cwe-77",
+                    )
+                    for i in range(rules)
+                ],
+            )
+            for name in ("regex", "code_analysis")
+        ],
+    )
+
+
+def legacy_encode(task: TaskResult, timestamp: str) -> bytes:
+    """
+    Event encoding used before the encoders: model_dump, dict update and json.dumps.
+    """
+    payload = task.model_dump()
+    payload.update({"service": "bastion", "version": "1.0.0", "timestamp": timestamp})
+    payload["task_id"] = "task-1"
+    return json.dumps(payload).encode("utf-8")
+
+
+def main() -> None:
+    """
+    Measures verdict events per second on one core for each installed encoder.
+    """
+    parser = argparse.ArgumentParser(description="Kafka event encoder microbenchmark")
+    parser.add_argument("--rules", type=int, default=3, help="Triggered rules per pipeline")
+    parser.add_argument("--number", type=int, default=20000, help="Events per measurement")
+    args = parser.parse_args()
+
+    task = sample_task(args.rules)
+    timestamp = datetime.now().isoformat()
+    measurements = {"legacy json": lambda: legacy_encode(task, timestamp)}
+    for encoding, encoder_class in EVENT_ENCODERS.items():
+        if not AVAILABLE[encoding]:
+            print(f"{encoding.value} is not installed, skipped")
+            continue
+        encoder = encoder_class()
+        measurements[encoding.value] = lambda encoder=encoder: encoder.encode_verdict(
+            task, service="bastion", version="1.0.0", timestamp=timestamp, task_id="task-1"
+        )
+
+    print(f"{'encoder':<14}{'events/s':>12}{'us/event':>10}{'bytes':>8}")
+    for label, encode in measurements.items():
+        seconds = timeit.timeit(encode, number=args.number) / args.number
+        print(f"{label:<14}{1 / seconds:>12.0f}{seconds * 1e6:>10.1f}{len(encode()):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+from app.core.enums import EventEncoding
+from app.models.pipeline import TaskResult, TriggeredRuleData
+from app.modules.logger import pipeline_logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Version of the positional msgpack event layout, stored as the first element of every event:
+# [version, service, service_version, timestamp, status, pipelines, task_id, prompt, cached]
+# pipelines: [[name, status, [rule, ...], reason], ...]
+# rule: [details, action, id, name, body, severity, cwe_id]
+MSGPACK_SCHEMA_VERSION = 3
+RULE_FIELDS = ("details", "action", "id", "name", "body", "severity", "cwe_id")
+
+
+class EventEncoder(ABC):
+    """
+    Serializes Kafka events.
+
+    Verdict events are built directly from the result models, without
+    `model_dump`. Triggered rules repeat on every event that hits them, so
+    their encoded form is interned and reused across events.
+
+    Attributes:
+        encoding (EventEncoding): Encoding name
+        max_interned_rules (int): Interned rules kept before the table is reset
+    """
+
+    encoding: EventEncoding
+
+    def __init__(self, max_interned_rules: int = 4096) -> None:
+        """
+        Args:
+            max_interned_rules (int): Interned rules kept before the table is reset
+        """
+        self.max_interned_rules = max_interned_rules
+        self._rules: dict[tuple, Any] = {}
+
+    @abstractmethod
+    def encode(self, message: dict) -> bytes:
+        """
+        Serializes an arbitrary message.
+
+        Args:
+            message (dict): Message to serialize
+
+        Returns:
+            bytes: Encoded message
+        """
+
+    @abstractmethod
+    def encode_verdict(
+        self,
+        task: TaskResult,
+        service: str,
+        version: str,
+        timestamp: str,
+        task_id: str | int | None = None,
+        prompt: str | None = None,
+    ) -> bytes:
+        """
+        Serializes a verdict event.
+
+        Args:
+            task (TaskResult): Verdict with the results of the pipelines
+            service (str): Service name
+            version (str): Service version
+            timestamp (str): ISO timestamp of the verdict
+            task_id (str | int | None): Task id, omitted when empty
+            prompt (str | None): Prompt, omitted when None
+
+        Returns:
+            bytes: Encoded event
+        """
+
+    def _intern_rule(self, rule: TriggeredRuleData) -> Any:
+        """
+        Returns the shared encoded form of a triggered rule.
+        """
+        key = (rule.details, rule.action, rule.id, rule.name, rule.body, rule.severity, rule.cwe_id)
+        if (encoded := self._rules.get(key)) is None:
+            if len(self._rules) >= self.max_interned_rules:
+                self._rules.clear()
+            encoded = self._rules[key] = self._build_rule(key)
+        return encoded
+
+    @staticmethod
+    def _build_rule(fields: tuple) -> Any:
+        return {name: value.value if name == "action" else value for name, value in zip(RULE_FIELDS, fields)}
+
+
+class _JsonEventEncoder(EventEncoder):
+    """
+    Base of encoders producing JSON verdict events in the TaskResult layout.
+    """
+
+    @abstractmethod
+    def _dumps(self, message: dict) -> bytes:
+        pass
+
+    def encode(self, message: dict) -> bytes:
+        return self._dumps(message)
+
+    def encode_verdict(
+        self,
+        task: TaskResult,
+        service: str,
+        version: str,
+        timestamp: str,
+        task_id: str | int | None = None,
+        prompt: str | None = None,
+    ) -> bytes:
+        event = {
+            "status": task.status.value,
+            "pipelines": [
+                {
+                    "status": pipeline.status.value,
+                    "name": pipeline.name,
+                    "triggered_rules": [self._intern_rule(rule) for rule in pipeline.triggered_rules],
+                    "reason": pipeline.reason,
+                }
+                for pipeline in task.pipelines
+            ],
+            "cached": task.cached,
+            "service": service,
+            "version": version,
+            "timestamp": timestamp,
+        }
+        if prompt is not None:
+            event["prompt"] = prompt
+        if task_id:
+            event["task_id"] = task_id
+        return self._dumps(event)
+
+
+class JsonEventEncoder(_JsonEventEncoder):
+    """
+    JSON encoder based on the standard library.
+    """
+
+    encoding = EventEncoding.JSON
+
+    def _dumps(self, message: dict) -> bytes:
+        return json.dumps(message).encode("utf-8")
+
+
+class OrjsonEventEncoder(_JsonEventEncoder):
+    """
+    JSON encoder based on orjson, producing the same events as JsonEventEncoder.
+    """
+
+    encoding = EventEncoding.ORJSON
+
+    def _dumps(self, message: dict) -> bytes:
+        return orjson.dumps(message)
+
+
+class MsgpackEventEncoder(EventEncoder):
+    """
+    Msgpack encoder with the positional layout of MSGPACK_SCHEMA_VERSION.
+
+    Arbitrary messages are encoded as msgpack maps.
+    """
+
+    encoding = EventEncoding.MSGPACK
+
+    def __init__(self, max_interned_rules: int = 4096) -> None:
+        super().__init__(max_interned_rules)
+        self._packer = msgpack.Packer()
+
+    def encode(self, message: dict) -> bytes:
+        return self._packer.pack(message)
+
+    def encode_verdict(
+        self,
+        task: TaskResult,
+        service: str,
+        version: str,
+        timestamp: str,
+        task_id: str | int | None = None,
+        prompt: str | None = None,
+    ) -> bytes:
+        pipelines = [
+            [
+                pipeline.name,
+                pipeline.status.value,
+                [self._intern_rule(rule) for rule in pipeline.triggered_rules],
+                pipeline.reason,
+            ]
+            for pipeline in task.pipelines
+        ]
+        event = [
+            MSGPACK_SCHEMA_VERSION,
+            service,
+            version,
+            timestamp,
+            task.status.value,
+            pipelines,
+            task_id,
+            prompt,
+            task.cached,
+        ]
+        return self._packer.pack(event)
+
+    @staticmethod
+    def _build_rule(fields: tuple) -> Any:
+        return [fields[0], fields[1].value, *fields[2:]]
+
+    @staticmethod
+    def decode_verdict(data: bytes) -> dict:
+        """
+        Decodes a msgpack verdict event into the layout of JSON events.
+
+        Args:
+            data (bytes): Encoded event
+
+        Returns:
+            dict: Event as produced by JsonEventEncoder
+
+        Raises:
+            ValueError: If the event has an unknown schema version
+        """
+        event = msgpack.unpackb(data)
+        if event[0] != MSGPACK_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported verdict event schema version: {event[0]}")
+        _, service, version, timestamp, status, pipelines, task_id, prompt, cached = event
+        decoded = {
+            "status": status,
+            "pipelines": [
+                {
+                    "status": p_status,
+                    "name": name,
+                    "triggered_rules": [dict(zip(RULE_FIELDS, rule)) for rule in rules],
+                    "reason": reason,
+                }
+                for name, p_status, rules, reason in pipelines
+            ],
+            "cached": cached,
+            "service": service,
+            "version": version,
+            "timestamp": timestamp,
+        }
+        if prompt is not None:
+            decoded["prompt"] = prompt
+        if task_id:
+            decoded["task_id"] = task_id
+        return decoded
+
+
+EVENT_ENCODERS: dict[EventEncoding, type[EventEncoder]] = {
+    EventEncoding.JSON: JsonEventEncoder,
+    EventEncoding.ORJSON: OrjsonEventEncoder,
+    EventEncoding.MSGPACK: MsgpackEventEncoder,
+}
+
+
+def create_event_encoder(encoding: EventEncoding | str) -> EventEncoder:
+    """
+    Creates the event encoder for an encoding.
+
+    Falls back to the standard library JSON encoder when the library of the
+    requested encoding is not installed.
+
+    Args:
+        encoding (EventEncoding | str): Encoding name
+
+    Returns:
+        EventEncoder: Event encoder
+    """
+    encoding = EventEncoding(encoding)
+    if (encoding == EventEncoding.ORJSON and orjson is None) or (
+        encoding == EventEncoding.MSGPACK and msgpack is None
+    ):
+        pipeline_logger.warning(f"{encoding.value} is not installed, Kafka events are encoded as json")
+        encoding = EventEncoding.JSON
+    return EVENT_ENCODERS[encoding]()
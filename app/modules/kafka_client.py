@@ -1,10 +1,13 @@
-import json
+import threading
+import time
 from typing import Any, Dict, Optional
 
 from confluent_kafka import Producer
 from confluent_kafka.error import KafkaError
 
+from app.modules.event_encoder import EventEncoder, create_event_encoder
 from app.modules.logger import pipeline_logger
+from app.modules.spool import EventSpool
 from settings import KafkaSettings, get_settings
 
 
@@ -16,12 +19,35 @@ class KafkaClient:
     to a topic defined in configuration. Supports automatic reconnection
     and error handling with detailed logging.
 
+    Sending never blocks: messages are enqueued to the producer, which
+    batches them (linger.ms, batch.size, compression.type), and delivery
+    callbacks are served by a background poll thread. When the producer
+    queue is full the message is dropped and counted instead of waiting.
+    Pending messages are flushed once, in `disconnect`. Messages are
+    serialized with the encoder selected by `encoding` (json, orjson or msgpack).
+
+    With `spool_dir` set, messages that do not fit into the producer queue,
+    fail delivery or are sent while the brokers are unreachable are written
+    to a disk spool instead of being dropped. The poll thread drains the
+    spool back to Kafka once deliveries succeed again, probing with a single
+    spooled message every `SPOOL_PROBE_INTERVAL` seconds while brokers are down.
+
     Attributes:
         _producer (KafkaProducer): Kafka producer for sending messages
         _kafka_settings (KafkaSettings): Kafka connection settings
+        _poll_thread (threading.Thread | None): Thread serving delivery callbacks
         topic (str): Topic name for sending messages
+        encoder (EventEncoder): Serializer of messages
+        queue_full (int): Number of messages rejected because the producer queue was full
+        delivered (int): Number of messages acknowledged by the broker
+        delivery_failures (int): Number of messages the producer failed to deliver
+        _spool (EventSpool | None): Disk spool for undeliverable messages
+        _broker_available (bool): False after the producer reported that all brokers are down
     """
 
+    SPOOL_PROBE_INTERVAL = 5.0
+    SPOOL_DRAIN_BATCH = 500
+
     def __init__(self) -> None:
         """
         Initialize Kafka client with connection settings.
@@ -31,9 +57,27 @@ class KafkaClient:
         """
         settings = get_settings()
         self._kafka_settings: KafkaSettings = settings.KAFKA
+        self._poll_thread = None
+        self._stop_polling = threading.Event()
+        self.queue_full = 0
+        self.delivered = 0
+        self.delivery_failures = 0
+        self._spool = None
+        self._broker_available = True
+        self._last_probe = 0.0
         if self._kafka_settings and hasattr(self._kafka_settings, "topic"):
             self.topic = self._kafka_settings.topic
+            self.encoder: EventEncoder = create_event_encoder(self._kafka_settings.encoding)
             self._producer = None
+            if self._kafka_settings.spool_dir:
+                try:
+                    self._spool = EventSpool(
+                        self._kafka_settings.spool_dir,
+                        segment_bytes=self._kafka_settings.spool_segment_bytes,
+                        max_bytes=self._kafka_settings.spool_max_bytes,
+                    )
+                except Exception as e:
+                    pipeline_logger.error(f"Failed to open Kafka event spool: {e}")
             self.connect()
 
     @property
@@ -62,6 +106,12 @@ class KafkaClient:
             config = {
                 "bootstrap.servers": self._kafka_settings.bootstrap_servers,
                 "security.protocol": self._kafka_settings.security_protocol.lower(),
+                "linger.ms": self._kafka_settings.linger_ms,
+                "batch.size": self._kafka_settings.batch_size,
+                "compression.type": self._kafka_settings.compression_type,
+                "queue.buffering.max.messages": self._kafka_settings.queue_max_messages,
+                "message.timeout.ms": self._kafka_settings.message_timeout_ms,
+                "error_cb": self._error_callback,
             }
 
             # Add SASL settings if provided
@@ -73,57 +123,155 @@ class KafkaClient:
                     config["sasl.password"] = self._kafka_settings.sasl_password
 
             self._producer = Producer(config)
+            self._stop_polling.clear()
+            self._poll_thread = threading.Thread(target=self._poll_loop, name="kafka-poll", daemon=True)
+            self._poll_thread.start()
             pipeline_logger.info(f"Successfully connected to Kafka at {self._kafka_settings.bootstrap_servers}")
 
         except Exception as e:
             pipeline_logger.error(f"Failed to connect to Kafka: {e}")
 
+    def _poll_loop(self) -> None:
+        """
+        Serves delivery callbacks until the client is disconnected.
+        """
+        while not self._stop_polling.is_set():
+            try:
+                self._producer.poll(0.1)
+                self._drain_spool()
+            except Exception as e:
+                pipeline_logger.error(f"Kafka poll failed: {e}")
+
+    def _drain_spool(self) -> None:
+        """
+        Moves spooled messages back to the producer.
+
+        While brokers are unreachable, only one message is sent every
+        SPOOL_PROBE_INTERVAL seconds; its successful delivery resumes draining.
+        """
+        if self._spool is None:
+            return
+        limit = self.SPOOL_DRAIN_BATCH
+        if not self._broker_available:
+            if time.monotonic() - self._last_probe < self.SPOOL_PROBE_INTERVAL:
+                return
+            self._last_probe = time.monotonic()
+            limit = 1
+        for _ in range(limit):
+            if not self._spool.consume(self._produce_spooled):
+                return
+
+    def _produce_spooled(self, value: bytes, key: bytes | None) -> bool:
+        """
+        Hands a spooled message to the producer.
+
+        Returns:
+            bool: False if the producer queue is full and the message stays in the spool
+        """
+        try:
+            self._producer.produce(topic=self.topic, value=value, key=key, callback=self._delivery_callback)
+        except BufferError:
+            return False
+        return True
+
+    def _spool_message(self, value: bytes, key: bytes | None) -> bool:
+        """
+        Writes a message to the disk spool.
+
+        Returns:
+            bool: True if the message was spooled
+        """
+        if self._spool is None:
+            return False
+        try:
+            return self._spool.append(value, key)
+        except Exception as e:
+            pipeline_logger.error(f"Failed to spool Kafka message: {e}")
+            return False
+
+    def stats(self) -> dict:
+        """
+        Returns producer counters.
+
+        Returns:
+            dict: Messages waiting in the producer queue, delivered, failed and rejected messages
+        """
+        return {
+            "queued": len(self._producer) if self._producer is not None else 0,
+            "delivered": self.delivered,
+            "delivery_failures": self.delivery_failures,
+            "queue_full": self.queue_full,
+            "broker_available": self._broker_available,
+            "spool": self._spool.stats() if self._spool is not None else None,
+        }
+
     def disconnect(self) -> None:
         """
         Closes connection to Kafka.
 
-        Closes producer and cleans up resources.
+        Stops the poll thread, flushes pending messages for up to
+        `flush_timeout` seconds and cleans up resources. With a spool,
+        messages still queued after the flush are spooled for the next run.
         """
-        if self._producer:
+        if self._producer is not None:
             try:
-                self._producer.close()
+                self._stop_polling.set()
+                if self._poll_thread:
+                    self._poll_thread.join()
+                remaining = self._producer.flush(timeout=self._kafka_settings.flush_timeout)
+                if remaining and self._spool is not None:
+                    # Purged messages are reported to the delivery callback, which spools them
+                    self._producer.purge()
+                    self._producer.poll(0)
+                elif remaining:
+                    pipeline_logger.warning(f"{remaining} Kafka messages were not delivered before shutdown")
                 pipeline_logger.info("Kafka connection closed")
             except Exception as e:
                 pipeline_logger.error(f"Error closing Kafka connection: {e}")
             finally:
                 self._producer = None
+                self._poll_thread = None
+                if self._spool is not None:
+                    self._spool.close()
 
-    def send_message(self, message: Dict[str, Any], key: Optional[str] = None) -> bool:
+    def send_message(self, message: Dict[str, Any] | bytes, key: Optional[str] = None) -> bool:
         """
-        Sends message to the specified topic.
+        Enqueues message for sending to the specified topic without waiting for delivery.
 
         Args:
-            message (Dict[str, Any]): Message to send
+            message (Dict[str, Any] | bytes): Message to send, serialized with `encoder` unless
+                already encoded
             key (Optional[str]): Key for partitioning (optional)
 
         Returns:
-            bool: True if message sent successfully, False otherwise
+            bool: True if message was enqueued, False otherwise
         """
-        if not self.producer:
+        # Producer defines __len__ (queued messages), so an idle producer is falsy
+        if self.producer is None:
             pipeline_logger.error("Kafka producer is not initialized")
             return False
 
         try:
-            # Serialize message to JSON
-            message_bytes = json.dumps(message).encode("utf-8")
+            message_bytes = message if isinstance(message, bytes) else self.encoder.encode(message)
             key_bytes = key.encode("utf-8") if key else None
 
-            # Send message
+            if not self._broker_available and self._spool_message(message_bytes, key_bytes):
+                return True
+
+            # Enqueue message, delivery is reported to the callback from the poll thread
             self._producer.produce(
                 topic=self.topic, value=message_bytes, key=key_bytes, callback=self._delivery_callback
             )
 
-            # Flush to ensure message is sent
-            self._producer.flush(timeout=10)
-
-            pipeline_logger.info(f"Message sent to topic '{self.topic}'")
+            pipeline_logger.debug(f"Message queued for topic '{self.topic}'")
             return True
 
+        except BufferError:
+            self.queue_full += 1
+            if self._spool_message(message_bytes, key_bytes):
+                return True
+            pipeline_logger.warning(f"Kafka producer queue is full, message dropped, total={self.queue_full}")
+            return False
         except KafkaError as e:
             pipeline_logger.error(f"Kafka error while sending message: {e}")
             return False
@@ -140,11 +288,36 @@ class KafkaClient:
             msg: Message metadata
         """
         if err is not None:
-            pipeline_logger.error(f"Message delivery failed: {err}")
+            self.delivery_failures += 1
+            if self._spool_message(msg.value(), msg.key()):
+                pipeline_logger.warning(f"Message delivery failed, message spooled: {err}")
+            else:
+                pipeline_logger.error(f"Message delivery failed: {err}")
         else:
-            pipeline_logger.info(
+            self.delivered += 1
+            if not self._broker_available:
+                self._broker_available = True
+                pipeline_logger.info("Kafka brokers are reachable again, draining event spool")
+            pipeline_logger.debug(
                 f"Message delivered to topic '{msg.topic()}' " f"partition {msg.partition()} " f"offset {msg.offset()}"
             )
 
+    def _error_callback(self, err) -> None:
+        """
+        Callback for producer-level errors.
+
+        Marks brokers as unavailable when none of them can be reached, so new
+        messages go straight to the spool.
+
+        Args:
+            err: Kafka error reported by the producer
+        """
+        if err.code() in (KafkaError._ALL_BROKERS_DOWN, KafkaError._TRANSPORT):
+            if self._broker_available:
+                self._broker_available = False
+                pipeline_logger.warning(f"Kafka brokers are unreachable: {err}")
+        else:
+            pipeline_logger.error(f"Kafka error: {err}")
+
 
 KAFKA_CLIENT = KafkaClient()
@@ -1,6 +1,10 @@
+import asyncio
+import time
+
 from opensearchpy import (
     AsyncOpenSearch,
     ConnectionError,
+    NotFoundError,
     OpenSearchException,
     RequestError,
 )
@@ -21,19 +25,39 @@ class AsyncOpenSearchClient:
         _client (AsyncOpenSearch): Asynchronous OpenSearch client
         _os_settings (OpenSearchSettings): OpenSearch connection settings
         similarity_prompt_index (str): Index name for searching similar prompts
+        min_score (float | None): Minimum score of returned hits
+        vector_dimension (int | None): Dimension of the index vector field, read from the mapping
+        index_version (str | None): Index UUID and document count at the last index check
     """
 
     _client: AsyncOpenSearch
 
-    def __init__(self, os_settings: OpenSearchSettings, similarity_prompt_index: str) -> None:
+    KNN_SIZE = 5
+    KNN_K = 5
+    FALLBACK_KNN_K = 3
+    SOURCE_FIELDS = ["id", "category", "details", "text"]
+    COLLAPSE_FIELD = "category.keyword"
+
+    def __init__(
+        self, os_settings: OpenSearchSettings, similarity_prompt_index: str, min_score: float | None = None
+    ) -> None:
         """
         Initializes OpenSearch client with connection settings.
 
         Args:
             os_settings (OpenSearchSettings): Settings for connecting to OpenSearch
+            similarity_prompt_index (str): Index name for searching similar prompts
+            min_score (float | None): Hits scoring below it are dropped by OpenSearch
         """
         self._os_settings = os_settings
         self.similarity_prompt_index = similarity_prompt_index
+        self.min_score = min_score
+        self.vector_dimension = None
+        self.index_version = None
+        self._index_checked_at = None
+        self._knn_body_template = {"size": self.KNN_SIZE, "_source": self.SOURCE_FIELDS}
+        if min_score is not None:
+            self._knn_body_template["min_score"] = min_score
         if self._os_settings:
             self._client = AsyncOpenSearch(
                 hosts=[{"host": self._os_settings.host, "port": self._os_settings.port}],
@@ -69,7 +93,8 @@ class AsyncOpenSearchClient:
         Establishes connection with OpenSearch server.
 
         Creates asynchronous connection to OpenSearch, configures connection parameters
-        and checks server availability. Logs errors if connection fails.
+        and checks server availability, index existence and its vector mapping.
+        Logs errors if connection fails.
 
         Raises:
             Exception: On failed connection or OpenSearch error
@@ -80,13 +105,96 @@ class AsyncOpenSearchClient:
             is_connected = await self._client.ping()
             if not is_connected:
                 raise Exception("Failed to connect to OpenSearch")
-            if not await self._client.indices.exists(index=self.similarity_prompt_index):
-                raise Exception(f"Index `{self.similarity_prompt_index}` does not exist.")
+            if not await self._ensure_index():
+                pipeline_logger.warning(
+                    f"[{self._os_settings.host}][{self.similarity_prompt_index}] Similarity index is not ready, "
+                    "it will be checked again on search"
+                )
         except Exception as e:
             error_msg = f"Failed to connect to OpenSearch. Error: {str(e)}"
             pipeline_logger.exception(f"[{self._os_settings.host}] {error_msg}")
             self._client = None
 
+    async def _ensure_index(self) -> bool:
+        """
+        Checks that the similarity index exists and maps a knn vector field.
+
+        A successful check is cached for `index_check_ttl` seconds, so searches
+        do not pay an extra round trip. The cache is dropped with
+        `invalidate_index_cache` when a search reports that the index is missing.
+        If `category` has a keyword subfield, hits are collapsed by category in OpenSearch.
+        Each check also refreshes `index_version`, which changes when the index
+        is recreated or documents are added or removed.
+
+        Returns:
+            bool: True if the index is ready for KNN searches
+        """
+        if self._index_checked_at is not None:
+            if time.monotonic() - self._index_checked_at < self._os_settings.index_check_ttl:
+                return True
+        try:
+            if not await self._client.indices.exists(index=self.similarity_prompt_index):
+                pipeline_logger.warning(
+                    f"[{self._os_settings.host}][{self.similarity_prompt_index}] Index does not exist"
+                )
+                return False
+            mapping = await self._client.indices.get(index=self.similarity_prompt_index)
+            count = await self._client.count(index=self.similarity_prompt_index)
+        except Exception as e:
+            pipeline_logger.error(
+                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Failed to check index existence: {e}"
+            )
+            return False
+
+        for index_mapping in mapping.values():
+            properties = index_mapping.get("mappings", {}).get("properties", {})
+            vector_field = properties.get("vector", {})
+            if vector_field.get("type") == "knn_vector":
+                self.vector_dimension = vector_field.get("dimension")
+                self._set_collapse(properties.get("category", {}).get("fields", {}).get("keyword", {}))
+                index_uuid = index_mapping.get("settings", {}).get("index", {}).get("uuid")
+                self.index_version = f"{index_uuid}:{count.get('count')}"
+                self._index_checked_at = time.monotonic()
+                return True
+        pipeline_logger.warning(
+            f"[{self._os_settings.host}][{self.similarity_prompt_index}] Index has no `vector` field of type knn_vector"
+        )
+        return False
+
+    def _set_collapse(self, keyword_field: dict) -> None:
+        """
+        Enables server-side deduplication by category when the index supports it.
+
+        Args:
+            keyword_field (dict): Mapping of the `category.keyword` subfield, empty if missing
+        """
+        if keyword_field.get("type") == "keyword":
+            self._knn_body_template["collapse"] = {"field": self.COLLAPSE_FIELD}
+        elif self._knn_body_template.pop("collapse", None) is None:
+            pipeline_logger.warning(
+                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Index has no `{self.COLLAPSE_FIELD}` "
+                "field, hits are deduplicated by category on the client. Recreate the index to enable collapse"
+            )
+
+    def invalidate_index_cache(self) -> None:
+        """
+        Forgets the cached index check, so the next search checks the index again.
+        """
+        self._index_checked_at = None
+
+    def _knn_body(self, vector: list[float], k: int = KNN_K) -> dict:
+        """
+        Builds a KNN search body from the prebuilt template.
+
+        Args:
+            vector (list[float]): Query vector
+            k (int): Number of nearest neighbours
+
+        Returns:
+            dict: Search query body
+        """
+        return {**self._knn_body_template, "query": {"knn": {"vector": {"vector": vector, "k": k}}}}
+
     async def close(self) -> None:
         """
         Closes connection with OpenSearch server.
@@ -158,60 +266,148 @@ class AsyncOpenSearchClient:
             )
             return []
 
-        # Check if vector has expected dimensions (typically 768 for many embedding models)
-        if len(vector) != 768:
+        if self.vector_dimension and len(vector) != self.vector_dimension:
             pipeline_logger.warning(
-                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Vector dimension mismatch: expected 768, got {len(vector)}"
+                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Vector dimension mismatch: expected {self.vector_dimension}, got {len(vector)}"
             )
 
-        # Use KNN query for vector similarity search
-        body = {"size": 5, "query": {"knn": {"vector": {"vector": vector, "k": 5}}}}
+        if not await self._ensure_index():
+            return []
 
-        # Log the query for debugging
+        body = self._knn_body(vector)
         pipeline_logger.debug(
             f"[{self._os_settings.host}][{self.similarity_prompt_index}] Executing similarity search with vector length: {len(vector)}"
         )
-        pipeline_logger.debug(f"[{self._os_settings.host}][{self.similarity_prompt_index}] Query body: {body}")
         try:
-            # Check if index exists before searching
-            if not await self._client.indices.exists(index=self.similarity_prompt_index):
-                pipeline_logger.warning(
-                    f"[{self._os_settings.host}][{self.similarity_prompt_index}] Index does not exist"
-                )
-                return []
-        except Exception as e:
-            pipeline_logger.error(
-                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Failed to check index existence: {e}"
+            resp = await self._client.search(index=self.similarity_prompt_index, body=body)
+            return self._group_hits_by_category(resp)
+        except NotFoundError as e:
+            self.invalidate_index_cache()
+            pipeline_logger.error(f"[{self._os_settings.host}][{self.similarity_prompt_index}] Index not found: {e}")
+            return []
+        except RequestError as e:
+            # The KNN query was rejected, retry with a simpler one
+            pipeline_logger.warning(
+                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Main KNN query rejected, trying fallback. Error: {e}"
             )
+        except ConnectionError as e:
+            error_msg = f"Failed to establish connection with OpenSearch. Error: {e}"
+            pipeline_logger.error(f"[{self._os_settings.host}][{self.similarity_prompt_index}] {error_msg}")
+            return []
+        except Exception as e:
+            error_msg = f"Failed to execute search query. Error: {e}"
+            pipeline_logger.exception(f"[{self._os_settings.host}][{self.similarity_prompt_index}] {error_msg}")
             return []
 
-        resp = await self._search(index=self.similarity_prompt_index, body=body)
-        if resp:
-            documents = {}
-            for hit in resp.get("hits", {}).get("hits", []):
-                if hit["_source"]["category"] not in documents:
-                    documents[hit["_source"]["category"]] = hit
-            return list(documents.values())
-
-        # Fallback: try simpler KNN query if the main one failed
-        pipeline_logger.warning(
-            f"[{self._os_settings.host}][{self.similarity_prompt_index}] Main KNN query failed, trying fallback"
+        fallback_resp = await self._search(
+            index=self.similarity_prompt_index, body=self._knn_body(vector, k=self.FALLBACK_KNN_K)
         )
-        fallback_body = {"size": 5, "query": {"knn": {"vector": {"vector": vector, "k": 3}}}}
-
-        fallback_resp = await self._search(index=self.similarity_prompt_index, body=fallback_body)
         if fallback_resp:
-            documents = {}
-            for hit in fallback_resp.get("hits", {}).get("hits", []):
-                if hit["_source"]["category"] not in documents:
-                    documents[hit["_source"]["category"]] = hit
-            return list(documents.values())
+            return self._group_hits_by_category(fallback_resp)
 
         pipeline_logger.error(
             f"[{self._os_settings.host}][{self.similarity_prompt_index}] Failed to search similar documents - no response from OpenSearch"
         )
         return []
 
+    async def search_similar_documents_batch(
+        self, vectors: list[list[float]], chunk_size: int = 50, concurrency: int = 4
+    ) -> list[list[dict]]:
+        """
+        Searches for similar documents for several vectors using multi-search requests.
+
+        Sends KNN queries in `_msearch` requests of up to `chunk_size` queries,
+        with at most `concurrency` requests in flight. Results of every query
+        are grouped by categories like in `search_similar_documents`. Queries
+        that fail inside a multi-search response are retried one by one.
+
+        Args:
+            vectors (list[list[float]]): Vectors for searching similar documents
+            chunk_size (int): Maximum number of queries per multi-search request
+            concurrency (int): Maximum number of concurrent multi-search requests
+
+        Returns:
+            list[list[dict]]: Similar documents for each vector, in the order of vectors
+        """
+        if not vectors:
+            return []
+        if not await self._ensure_index():
+            return [[] for _ in vectors]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search_chunk(chunk: list[list[float]]) -> list[list[dict]]:
+            async with semaphore:
+                return await self._msearch_similar_documents(chunk)
+
+        chunks = [vectors[i : i + chunk_size] for i in range(0, len(vectors), chunk_size)]
+        chunk_results = await asyncio.gather(*[search_chunk(chunk) for chunk in chunks])
+        return [documents for chunk_result in chunk_results for documents in chunk_result]
+
+    async def _msearch_similar_documents(self, vectors: list[list[float]]) -> list[list[dict]]:
+        """
+        Executes KNN queries for a chunk of vectors in one multi-search request.
+
+        Args:
+            vectors (list[list[float]]): Vectors for searching similar documents
+
+        Returns:
+            list[list[dict]]: Similar documents for each vector, in the order of vectors
+        """
+        body = []
+        for vector in vectors:
+            body.append({"index": self.similarity_prompt_index})
+            body.append(self._knn_body(vector))
+        try:
+            resp = await self._client.msearch(body=body)
+        except Exception as e:
+            error_msg = f"Failed to execute multi-search query. Error: {e}"
+            pipeline_logger.error(f"[{self._os_settings.host}][{self.similarity_prompt_index}] {error_msg}")
+            return [await self.search_similar_documents(vector) for vector in vectors]
+
+        responses = resp.get("responses", [])
+        if len(responses) != len(vectors):
+            pipeline_logger.error(
+                f"[{self._os_settings.host}][{self.similarity_prompt_index}] Multi-search returned {len(responses)} "
+                f"responses for {len(vectors)} queries, retrying them one by one"
+            )
+            return [await self.search_similar_documents(vector) for vector in vectors]
+
+        results = []
+        for vector, item in zip(vectors, responses):
+            if item.get("status") == 404:
+                self.invalidate_index_cache()
+                results.append([])
+            elif "error" in item or item.get("status", 200) >= 400:
+                pipeline_logger.warning(
+                    f"[{self._os_settings.host}][{self.similarity_prompt_index}] KNN query failed in multi-search, "
+                    f"retrying alone. Error: {item.get('error', item.get('status'))}"
+                )
+                results.append(await self.search_similar_documents(vector))
+            else:
+                results.append(self._group_hits_by_category(item))
+        return results
+
+    @staticmethod
+    def _group_hits_by_category(resp: dict) -> list[dict]:
+        """
+        Keeps the best hit per category from a search response.
+
+        Collapsed responses already hold one hit per category; this also covers
+        indices created without the `category.keyword` subfield.
+
+        Args:
+            resp (dict): Search response from OpenSearch
+
+        Returns:
+            list[dict]: Hits with unique categories, in score order
+        """
+        documents = {}
+        for hit in resp.get("hits", {}).get("hits", []):
+            if hit["_source"]["category"] not in documents:
+                documents[hit["_source"]["category"]] = hit
+        return list(documents.values())
+
     async def test_connection(self) -> bool:
         """
         Test OpenSearch connection and basic functionality.
@@ -255,7 +451,9 @@ class AsyncOpenSearchClient:
 
 try:
     os_client: AsyncOpenSearchClient = AsyncOpenSearchClient(
-        os_settings=get_settings().OS, similarity_prompt_index=get_settings().SIMILARITY_PROMPT_INDEX
+        os_settings=get_settings().OS,
+        similarity_prompt_index=get_settings().SIMILARITY_PROMPT_INDEX,
+        min_score=get_settings().SIMILARITY_NOTIFY_THRESHOLD,
     )
 except Exception as e:
     pipeline_logger.error(f"Failed to create OpenSearch client: {e}")
@@ -0,0 +1,226 @@
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Callable
+
+from app.modules.logger import pipeline_logger
+
+# Segment layout: 8-byte read offset, then records of (value length, key length, key, value).
+# A zero value length marks the end of written records; segments are preallocated with zeros.
+SEGMENT_HEADER = struct.Struct("<Q")
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".spool"
+
+
+class _Segment:
+    """
+    Memory-mapped spool segment file.
+    """
+
+    def __init__(self, path: Path, size: int, create: bool = False) -> None:
+        self.path = path
+        if create:
+            with open(path, "wb") as f:
+                f.truncate(size)
+        self._file = open(path, "r+b")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self.size)
+        self.read_offset = SEGMENT_HEADER.unpack_from(self._map, 0)[0] or SEGMENT_HEADER.size
+        self.write_offset = self._find_write_offset()
+
+    def _find_write_offset(self) -> int:
+        offset = self.read_offset
+        while offset + RECORD_HEADER.size <= self.size:
+            value_length, key_length = RECORD_HEADER.unpack_from(self._map, offset)
+            if not value_length:
+                break
+            offset += RECORD_HEADER.size + key_length + value_length
+        return offset
+
+    def fits(self, record_size: int) -> bool:
+        # Keep room for the zero header that terminates the records
+        return self.write_offset + record_size + RECORD_HEADER.size <= self.size
+
+    def append(self, value: bytes, key: bytes) -> None:
+        offset = self.write_offset
+        self._map[offset + RECORD_HEADER.size : offset + RECORD_HEADER.size + len(key)] = key
+        data_offset = offset + RECORD_HEADER.size + len(key)
+        self._map[data_offset : data_offset + len(value)] = value
+        # The header is written last, so a crash never exposes a partial record
+        RECORD_HEADER.pack_into(self._map, offset, len(value), len(key))
+        self.write_offset = data_offset + len(value)
+
+    def peek(self) -> tuple[bytes, bytes | None, int] | None:
+        if self.read_offset >= self.write_offset:
+            return None
+        value_length, key_length = RECORD_HEADER.unpack_from(self._map, self.read_offset)
+        key_offset = self.read_offset + RECORD_HEADER.size
+        key = bytes(self._map[key_offset : key_offset + key_length]) or None
+        value = bytes(self._map[key_offset + key_length : key_offset + key_length + value_length])
+        return value, key, key_offset + key_length + value_length
+
+    def advance(self, offset: int) -> None:
+        self.read_offset = offset
+        SEGMENT_HEADER.pack_into(self._map, 0, offset)
+
+    @property
+    def drained(self) -> bool:
+        return self.read_offset >= self.write_offset
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+class EventSpool:
+    """
+    Append-only, disk-backed queue of encoded events.
+
+    Events are written to memory-mapped segment files of `segment_bytes`
+    each; a new segment is started when the current one is full. When the
+    total size would exceed `max_bytes`, the oldest segment is discarded and
+    its unread events are counted as dropped. Each segment stores its own
+    read offset, so events drained before a restart are not read again.
+
+    Attributes:
+        directory (Path): Directory holding the segment files
+        segment_bytes (int): Size of one segment file
+        max_bytes (int): Maximum total size of all segment files
+        spooled (int): Number of events written to the spool
+        dropped (int): Number of unread events discarded to stay within max_bytes
+    """
+
+    def __init__(self, directory: str | Path, segment_bytes: int = 16 * 1024 * 1024, max_bytes: int = 1024**3) -> None:
+        """
+        Opens the spool, recovering segments left by a previous run.
+
+        Args:
+            directory (str | Path): Directory holding the segment files, created if missing
+            segment_bytes (int): Size of one segment file
+            max_bytes (int): Maximum total size of all segment files
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max(max_bytes, segment_bytes)
+        self.spooled = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._segments: list[_Segment] = []
+        self._next_sequence = 0
+        for path in sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}")):
+            segment = _Segment(path, segment_bytes)
+            self._next_sequence = int(path.stem) + 1
+            if segment.drained:
+                segment.close()
+                path.unlink()
+            else:
+                self._segments.append(segment)
+        if self._segments:
+            pipeline_logger.info(f"Recovered {len(self._segments)} event spool segments from {self.directory}")
+
+    @property
+    def empty(self) -> bool:
+        """
+        Whether all spooled events have been read.
+        """
+        with self._lock:
+            return all(segment.drained for segment in self._segments)
+
+    def stats(self) -> dict:
+        """
+        Returns spool counters.
+
+        Returns:
+            dict: Number of segments, spooled and dropped events
+        """
+        return {"segments": len(self._segments), "spooled": self.spooled, "dropped": self.dropped}
+
+    def append(self, value: bytes, key: bytes | None = None) -> bool:
+        """
+        Appends an event to the spool.
+
+        Args:
+            value (bytes): Encoded event
+            key (bytes | None): Partitioning key
+
+        Returns:
+            bool: False if the event is larger than a segment
+        """
+        key = key or b""
+        record_size = RECORD_HEADER.size + len(key) + len(value)
+        if SEGMENT_HEADER.size + record_size + RECORD_HEADER.size > self.segment_bytes:
+            pipeline_logger.error(f"Event of {record_size} bytes does not fit into a spool segment")
+            return False
+        with self._lock:
+            if not self._segments or not self._segments[-1].fits(record_size):
+                self._rotate()
+            self._segments[-1].append(value, key)
+            self.spooled += 1
+        return True
+
+    def consume(self, handler: Callable[[bytes, bytes | None], bool]) -> bool:
+        """
+        Passes the oldest unread event to a handler and marks it as consumed if the handler accepts it.
+
+        The event is read and consumed under one lock, so a concurrent
+        `append` that discards the oldest segment can never make it skip or
+        repeat an event. Fully read segments are deleted. The handler must
+        not use the spool.
+
+        Args:
+            handler (Callable[[bytes, bytes | None], bool]): Receives the event value and key,
+                returns False to leave the event in the spool
+
+        Returns:
+            bool: True if an event was consumed, False if the spool is empty or the handler refused the event
+        """
+        with self._lock:
+            consumed = False
+            for segment in self._segments:
+                if record := segment.peek():
+                    if handler(record[0], record[1]):
+                        segment.advance(record[2])
+                        consumed = True
+                    break
+            while len(self._segments) > 1 and self._segments[0].drained:
+                self._remove(self._segments.pop(0))
+            return consumed
+
+    def close(self) -> None:
+        """
+        Flushes and closes segment files. Unread events stay on disk for the next run.
+        """
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+
+    def _rotate(self) -> None:
+        while self._segments and self._segments[0].drained:
+            self._remove(self._segments.pop(0))
+        while self._segments and (len(self._segments) + 1) * self.segment_bytes > self.max_bytes:
+            oldest = self._segments.pop(0)
+            dropped = self._count_unread(oldest)
+            self.dropped += dropped
+            pipeline_logger.warning(f"Event spool is full, discarded {dropped} oldest events")
+            self._remove(oldest)
+        path = self.directory / f"{self._next_sequence:012d}{SEGMENT_SUFFIX}"
+        self._next_sequence += 1
+        self._segments.append(_Segment(path, self.segment_bytes, create=True))
+
+    @staticmethod
+    def _count_unread(segment: _Segment) -> int:
+        count = 0
+        while record := segment.peek():
+            segment.advance(record[2])
+            count += 1
+        return count
+
+    @staticmethod
+    def _remove(segment: _Segment) -> None:
+        segment.close()
+        segment.path.unlink(missing_ok=True)
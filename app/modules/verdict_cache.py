@@ -0,0 +1,555 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from app.core.enums import ActionStatus, CacheBackendType, RuleAction
+from app.models.pipeline import PipelineResult, TaskResult, TriggeredRuleData
+from app.modules.logger import pipeline_logger
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+# Version of the positional msgpack layout of cached task results:
+# [version, status, [[name, status, reason, [[details, action, id, name, body, severity, cwe_id], ...]], ...]]
+VALUE_SCHEMA_VERSION = 1
+LOCK_POLL_INTERVAL = 0.05
+# Deletes a lock only while it still holds the caller's token, so an expired holder never releases a newer lock
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class CacheBackend(ABC):
+    """
+    Storage of encoded cache values shared by the verdict cache.
+
+    Values expire after the TTL they were stored with. Locks are advisory
+    and expire on their own, so a crashed holder never blocks a key for good.
+    Each acquired lock has a random token, and only that token releases it.
+    """
+
+    @abstractmethod
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        """
+        Reads several values in one round trip.
+
+        Args:
+            keys (list[str]): Cache keys
+
+        Returns:
+            list[bytes | None]: Values in the order of keys, None for missing keys
+        """
+
+    @abstractmethod
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        """
+        Stores several values in one round trip.
+
+        Args:
+            items (dict[str, bytes]): Values by cache key
+            ttl (float): Seconds the values stay valid
+        """
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        """
+        Takes the computation lock of a key if nobody holds it.
+
+        Args:
+            key (str): Cache key
+            ttl (float): Seconds after which the lock expires
+
+        Returns:
+            str | None: Token of the acquired lock, None if the lock is held
+        """
+
+    @abstractmethod
+    async def is_locked(self, key: str) -> bool:
+        """
+        Checks whether the computation lock of a key is held.
+        """
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        """
+        Releases the computation lock of a key if it is still held with the token.
+
+        Args:
+            key (str): Cache key
+            token (str): Token returned by `acquire_lock`
+        """
+
+    async def close(self) -> None:
+        """
+        Releases connections of the backend.
+        """
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU backend, bounded by the number of entries.
+
+    Attributes:
+        max_entries (int): Maximum number of stored values
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of stored values
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._locks: dict[str, tuple[float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            values.append(entry[1] if entry is not None else None)
+        return values
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        expires_at = time.monotonic() + ttl
+        for key, value in items.items():
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        if await self.is_locked(key):
+            return None
+        token = os.urandom(16).hex()
+        self._locks[key] = (time.monotonic() + ttl, token)
+        return token
+
+    async def is_locked(self, key: str) -> bool:
+        lock = self._locks.get(key)
+        if lock is not None and lock[0] < time.monotonic():
+            del self._locks[key]
+            lock = None
+        return lock is not None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        if (lock := self._locks.get(key)) is not None and lock[1] == token:
+            del self._locks[key]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend on a Redis-protocol server shared by all replicas.
+
+    Reads use MGET and writes one pipelined `SET ... PX` per value. Locks are
+    `SET NX PX` keys next to the values holding a random token, released by
+    a compare-and-delete script.
+
+    Attributes:
+        prefix (str): Prefix of all keys written by the backend
+    """
+
+    def __init__(self, url: str, prefix: str = "bastion:verdict:", client=None) -> None:
+        """
+        Args:
+            url (str): Server URL, e.g. redis://localhost:6379/0
+            prefix (str): Prefix of all keys written by the backend
+            client: Ready `redis.asyncio` compatible client, used instead of connecting to url
+        """
+        self.prefix = prefix
+        self._client = client if client is not None else redis.from_url(url)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        return await self._client.mget([self.prefix + key for key in keys])
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        if not items:
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self.prefix + key, value, px=int(ttl * 1000))
+            await pipe.execute()
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        token = os.urandom(16).hex()
+        if await self._client.set(f"{self.prefix}lock:{key}", token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    async def is_locked(self, key: str) -> bool:
+        return bool(await self._client.exists(f"{self.prefix}lock:{key}"))
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._client.eval(RELEASE_LOCK_SCRIPT, 1, f"{self.prefix}lock:{key}", token)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_cache_backend(
+    backend: CacheBackendType | str, max_entries: int = 0, redis_url: str | None = None, redis_prefix: str = ""
+) -> CacheBackend | None:
+    """
+    Creates the verdict cache backend selected in settings.
+
+    Args:
+        backend (CacheBackendType | str): Backend name
+        max_entries (int): Maximum number of entries of the memory backend, 0 disables it
+        redis_url (str | None): Server URL of the redis backend
+        redis_prefix (str): Key prefix of the redis backend
+
+    Returns:
+        CacheBackend | None: Backend, None if the cache is disabled or the backend is not available
+    """
+    backend = CacheBackendType(backend)
+    if backend == CacheBackendType.REDIS:
+        if not redis_url:
+            pipeline_logger.warning("Verdict cache backend is redis, but VERDICT_CACHE_REDIS_URL is not set")
+            return None
+        if redis is None:
+            pipeline_logger.warning("`redis` is not installed, verdict cache is disabled")
+            return None
+        return RedisCacheBackend(redis_url, prefix=redis_prefix)
+    if max_entries > 0:
+        return MemoryCacheBackend(max_entries)
+    return None
+
+
+class VerdictCache:
+    """
+    Cache of task results of whole prompts on a pluggable backend.
+
+    Entries are keyed by a keyed hash of the prompt, the pipeline flow and
+    the version fingerprint of the flow's pipelines, so prompts are never
+    stored. Fingerprints are recomputed at most every `check_interval`
+    seconds per flow; entries of an old fingerprint are never hit again and
+    expire. Values are msgpack arrays (JSON if msgpack is not installed).
+
+    `get_or_compute` is single-flight: concurrent misses of a key in the
+    process wait for one computation, and replicas sharing a backend wait
+    for the replica holding the key's lock, up to `lock_timeout` seconds.
+    Backend errors are logged and treated as misses.
+
+    Attributes:
+        ttl (float): Seconds a result stays valid
+        check_interval (float): Seconds between fingerprint checks of a flow
+        lock_timeout (float): Seconds a computation lock is held at most
+        hits (int): Number of cache hits
+        misses (int): Number of cache misses
+        waits (int): Number of misses answered by another computation
+        errors (int): Number of failed backend calls
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None,
+        ttl: float = 300.0,
+        check_interval: float = 5.0,
+        lock_timeout: float = 30.0,
+        secret: str | None = None,
+    ) -> None:
+        """
+        Args:
+            backend (CacheBackend | None): Storage of values, None disables the cache
+            ttl (float): Seconds a result stays valid
+            check_interval (float): Seconds between fingerprint checks of a flow
+            lock_timeout (float): Seconds a computation lock is held at most
+            secret (str | None): Key of the prompt hash, random per process if not set
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.lock_timeout = lock_timeout
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.errors = 0
+        self._hash_key = secret.encode()[:64] if secret else os.urandom(32)
+        self._fingerprints: dict[str, tuple[float, str]] = {}
+        self._in_flight: dict[str, asyncio.Future] = {}
+        if backend is not None and msgpack is None:
+            pipeline_logger.warning("`msgpack` is not installed, verdict cache values are stored as JSON")
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether results are cached.
+        """
+        return self.backend is not None
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: Backend, hits, misses, waits for other computations and backend errors
+        """
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+            "errors": self.errors,
+        }
+
+    async def close(self) -> None:
+        """
+        Closes the backend connections.
+        """
+        if self.backend is not None:
+            await self.backend.close()
+
+    def key(self, prompt: str, pipeline_flow: str, fingerprint: Callable[[], str]) -> str:
+        """
+        Builds the cache key of a prompt.
+
+        Args:
+            prompt (str): Prompt to analyze
+            pipeline_flow (str): Pipeline flow
+            fingerprint (Callable[[], str]): Computes the version fingerprint of the flow
+
+        Returns:
+            str: Flow, fingerprint and prompt hash
+        """
+        prompt_hash = hashlib.blake2b(prompt.encode("utf-8"), key=self._hash_key, digest_size=16).hexdigest()
+        return f"{pipeline_flow}:{self._flow_version(pipeline_flow, fingerprint)}:{prompt_hash}"
+
+    async def get_many(self, keys: list[str]) -> list[TaskResult | None]:
+        """
+        Returns cached results of several prompts, marked as cached.
+
+        Args:
+            keys (list[str]): Keys built by `key`
+
+        Returns:
+            list[TaskResult | None]: Cached task results in the order of keys, None on a miss
+        """
+        try:
+            values = await self.backend.get_many(keys)
+        except Exception as e:
+            self._backend_error("read", e)
+            values = [None] * len(keys)
+        results = [self._unpack(value) if value is not None else None for value in values]
+        hits = sum(1 for result in results if result is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    async def put_many(self, items: dict[str, TaskResult]) -> None:
+        """
+        Stores results of several prompts. Results with pipeline errors are skipped.
+
+        Args:
+            items (dict[str, TaskResult]): Task results by key built by `key`
+        """
+        values = {key: self._pack(task) for key, task in items.items() if self._cacheable(task)}
+        try:
+            await self.backend.set_many(values, self.ttl)
+        except Exception as e:
+            self._backend_error("write", e)
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[TaskResult]], deadline: float | None = None
+    ) -> TaskResult:
+        """
+        Returns the cached result of a prompt or computes and stores it, once per key.
+
+        Waiting for a computation of this process or of another replica ends
+        at the deadline, and `compute` then runs with the time that is left.
+
+        Args:
+            key (str): Key built by `key`
+            compute (Callable[[], Awaitable[TaskResult]]): Analyzes the prompt within the same deadline
+            deadline (float | None): Event loop time by which the request must finish, None for no deadline
+
+        Returns:
+            TaskResult: Task result, with `cached` set if it was not computed by this call
+        """
+        if (task := (await self.get_many([key]))[0]) is not None:
+            return task
+        if (future := self._in_flight.get(key)) is not None:
+            try:
+                async with asyncio.timeout_at(deadline):
+                    task = await asyncio.shield(future)
+                self.waits += 1
+                return task.model_copy(update={"cached": True})
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            except Exception:
+                # The computation failed or outlived the deadline
+                pass
+            return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            task = await self._compute_once(key, compute, deadline)
+        except BaseException as err:
+            if isinstance(err, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(err)
+                # Mark the exception as retrieved when no concurrent request awaits it
+                future.exception()
+            raise
+        else:
+            future.set_result(task)
+            return task
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _compute_once(
+        self, key: str, compute: Callable[[], Awaitable[TaskResult]], deadline: float | None
+    ) -> TaskResult:
+        """
+        Computes a result under the backend lock of the key, or waits for the replica holding it.
+        """
+        try:
+            token = await self.backend.acquire_lock(key, self.lock_timeout)
+            held_elsewhere = token is None
+        except Exception as e:
+            # Compute without the lock rather than wait on a failing backend
+            self._backend_error("lock", e)
+            token, held_elsewhere = None, False
+        if held_elsewhere:
+            if (task := await self._wait_for(key, deadline)) is not None:
+                self.waits += 1
+                return task
+        try:
+            task = await compute()
+            await self.put_many({key: task})
+            return task
+        finally:
+            if token is not None:
+                try:
+                    await self.backend.release_lock(key, token)
+                except Exception as e:
+                    self._backend_error("unlock", e)
+
+    async def _wait_for(self, key: str, deadline: float | None) -> TaskResult | None:
+        """
+        Polls the backend until the lock holder stores the result, releases the lock, the lock times out
+        or the deadline passes.
+        """
+        loop = asyncio.get_running_loop()
+        wait_until = loop.time() + self.lock_timeout
+        if deadline is not None:
+            wait_until = min(wait_until, deadline)
+        try:
+            while loop.time() < wait_until:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                value = (await self.backend.get_many([key]))[0]
+                if value is not None:
+                    return self._unpack(value)
+                if not await self.backend.is_locked(key):
+                    return None
+        except Exception as e:
+            self._backend_error("read", e)
+        return None
+
+    def _backend_error(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        pipeline_logger.warning(f"Verdict cache {operation} failed: {error}")
+
+    def _flow_version(self, pipeline_flow: str, fingerprint: Callable[[], str]) -> str:
+        """
+        Returns the fingerprint of a flow, recomputing it after `check_interval` seconds.
+        """
+        now = time.monotonic()
+        checked_at, version = self._fingerprints.get(pipeline_flow, (None, None))
+        if checked_at is None or now - checked_at >= self.check_interval:
+            version = fingerprint()
+            self._fingerprints[pipeline_flow] = (now, version)
+        return version
+
+    @staticmethod
+    def _cacheable(task: TaskResult) -> bool:
+        return all(pipeline.status != ActionStatus.ERROR for pipeline in task.pipelines)
+
+    @staticmethod
+    def _pack(task: TaskResult) -> bytes:
+        """
+        Encodes a task result as a compact msgpack array, or JSON without msgpack.
+        """
+        if msgpack is None:
+            return task.model_dump_json().encode("utf-8")
+        pipelines = [
+            [
+                pipeline.name,
+                pipeline.status.value,
+                pipeline.reason,
+                [
+                    [rule.details, rule.action.value, rule.id, rule.name, rule.body, rule.severity, rule.cwe_id]
+                    for rule in pipeline.triggered_rules
+                ],
+            ]
+            for pipeline in task.pipelines
+        ]
+        return msgpack.packb([VALUE_SCHEMA_VERSION, task.status.value, pipelines])
+
+    @staticmethod
+    def _unpack(value: bytes) -> TaskResult | None:
+        """
+        Decodes a value written by `_pack`, None if it has another format or schema version.
+        """
+        try:
+            if value[:1] == b"{":
+                return TaskResult.model_validate_json(value).model_copy(update={"cached": True})
+            if msgpack is None:
+                return None
+            version, status, pipelines = msgpack.unpackb(value)
+            if version != VALUE_SCHEMA_VERSION:
+                return None
+            return TaskResult(
+                status=ActionStatus(status),
+                cached=True,
+                pipelines=[
+                    PipelineResult(
+                        name=name,
+                        status=ActionStatus(pipeline_status),
+                        reason=reason,
+                        triggered_rules=[
+                            TriggeredRuleData(
+                                details=details,
+                                action=RuleAction(action),
+                                id=rule_id,
+                                name=rule_name,
+                                body=body,
+                                severity=severity,
+                                cwe_id=cwe_id,
+                            )
+                            for details, action, rule_id, rule_name, body, severity, cwe_id in rules
+                        ],
+                    )
+                    for name, pipeline_status, reason, rules in pipelines
+                ],
+            )
+        except (ValueError, TypeError, json.JSONDecodeError) as e:
+            pipeline_logger.warning(f"Invalid verdict cache value: {e}")
+            return None
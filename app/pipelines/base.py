@@ -1,3 +1,5 @@
+import asyncio
+import hashlib
 import os
 import re
 from abc import ABC, abstractmethod
@@ -21,10 +23,12 @@ class BasePipeline(ABC):
     Attributes:
         name (str): Pipeline name identifier
         enabled (bool): Whether the pipeline is currently enabled
+        cost_tier (int): Relative cost of a run; cheaper tiers run first in short-circuit flows
     """
 
     name: str
     enabled: bool = False
+    cost_tier: int = 0
 
     def __str__(self) -> str:
         """
@@ -46,6 +50,27 @@ class BasePipeline(ABC):
         """
         return self.__str__()
 
+    @property
+    def version(self) -> str:
+        """
+        Version of the rules, models and indices the pipeline's results depend on.
+
+        Cached verdicts are invalidated when it changes.
+
+        Returns:
+            str: Version string, empty for pipelines without versioned state
+        """
+        return ""
+
+    def stats(self) -> dict:
+        """
+        Returns runtime counters of the pipeline, exposed by GET /api/v1/metrics.
+
+        Returns:
+            dict: Counters, empty for pipelines without any
+        """
+        return {}
+
     @abstractmethod
     async def run(self, prompt: str, **kwargs) -> PipelineResult:
         """
@@ -56,7 +81,8 @@ class BasePipeline(ABC):
 
         Args:
             prompt (str): Text prompt to analyze
-            **kwargs: Additional keyword arguments
+            **kwargs: Additional keyword arguments, including 'deadline': event loop
+                time by which the run is cancelled, or None
 
         Returns:
             PipelineResult: Analysis results with triggered rules and status
@@ -66,6 +92,22 @@ class BasePipeline(ABC):
         """
         raise NotImplementedError
 
+    async def run_batch(self, prompts: list[str], **kwargs) -> list[PipelineResult]:
+        """
+        Analyzes several prompts.
+
+        Runs `run` for all prompts concurrently. Pipelines override it to share
+        work across prompts, e.g. one embedding pass or one search request.
+
+        Args:
+            prompts (list[str]): Text prompts to analyze
+            **kwargs: Additional keyword arguments passed to `run`
+
+        Returns:
+            list[PipelineResult]: Analysis results in the order of prompts
+        """
+        return list(await asyncio.gather(*[self.run(prompt, **kwargs) for prompt in prompts]))
+
     def _pipeline_status(self, triggered_rules: list[TriggeredRuleData]) -> ActionStatus:
         """
         Determines overall analysis status based on triggered rules.
@@ -98,6 +140,7 @@ class BaseRulesPipeline(BasePipeline):
         _rules (list[Rule]): List of loaded rules
         _rules_dir_path (str | None): Path to directory containing rule files
         _allowed_file_formats (tuple[str]): Supported file formats for rules
+        _rules_version (str): Hash of the loaded rules
     """
 
     _rules: list[Rule]
@@ -108,17 +151,29 @@ class BaseRulesPipeline(BasePipeline):
         """
         Initializes the rules pipeline and loads rules from files.
 
-        Loads all rules from the specified directory and enables the pipeline
-        if any rules were successfully loaded.
+        Loads all rules from the specified directory, compiles them once and
+        enables the pipeline if any rules were successfully loaded.
         """
         self._rules = []
         self._load_rules()
+        self._compile_rules()
+        digest = hashlib.blake2b(digest_size=16)
+        for rule in self._rules:
+            digest.update(f"{rule.id}\0{rule.body}\0{rule.action}\0{rule.backend}\0".encode())
+        self._rules_version = digest.hexdigest()
         if len(self._rules) > 0:
             self.enabled = True
             pipeline_logger.info(f"[{self}] loaded successfully. Total rules: {len(self._rules)}")
         else:
             pipeline_logger.warning(f"[{self}] failed to load rules. Total rules: {len(self._rules)}")
 
+    @property
+    def version(self) -> str:
+        """
+        Hash of the loaded rules.
+        """
+        return self._rules_version
+
     def _load_rules(self) -> None:
         """
         Loads rules from all YAML files in the rules directory.
@@ -137,6 +192,14 @@ class BaseRulesPipeline(BasePipeline):
                     except Exception:
                         pipeline_logger.exception(f"[{self}] Error loading rules from file: {file}")
 
+    def _compile_rules(self) -> None:
+        """
+        Prepares loaded rules for matching.
+
+        Called once after all rules are loaded. Pipelines override it to build
+        their matching structures at load time instead of on every request.
+        """
+
     def _load_rules_from_yaml_file(self, file_path: str) -> None:
         """
         Loads rules from a single YAML file.
@@ -169,6 +232,7 @@ class BaseRulesPipeline(BasePipeline):
                                 language=rule_dict["detection"]["language"],
                                 body=pattern,
                                 action=response,
+                                backend=rule_dict["detection"].get("backend"),
                             )
                         )
         except Exception:
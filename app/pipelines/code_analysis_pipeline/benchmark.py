@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.enums import Language  # noqa: E402
+from app.pipelines.code_analysis_pipeline.pipeline import CodeAnalysisPipeline  # noqa: E402
+from app.pipelines.code_analysis_pipeline.rule_packs import load_rule_packs  # noqa: E402
+from app.pipelines.code_analysis_pipeline.runner import SemgrepRunner  # noqa: E402
+
+SNIPPET = """import subprocess
+
+def run(cmd):
+    return subprocess.call(cmd, shell=True)
+"""
+
+
+async def measure(runner: SemgrepRunner, configs: list[str], target: str, number: int) -> float:
+    """
+    Returns the mean latency of one scan in seconds.
+    """
+    started = time.perf_counter()
+    for _ in range(number):
+        await runner.scan(configs, [target])
+    return (time.perf_counter() - started) / number
+
+
+async def main() -> None:
+    """
+    Compares scan latency with registry configs and with a prebuilt rule pack.
+    """
+    parser = argparse.ArgumentParser(description="Semgrep scan latency benchmark")
+    parser.add_argument("--packs-dir", default="data/semgrep_packs", help="Directory built by build_rule_packs.py")
+    parser.add_argument("--number", type=int, default=5, help="Scans per measurement")
+    args = parser.parse_args()
+
+    language = Language.PYTHON
+    modes = {
+        "registry": [
+            CodeAnalysisPipeline._languages_data_map[language].config_name,
+            CodeAnalysisPipeline._get_semgrep_local_rules_dir(language.value),
+        ]
+    }
+    if pack_paths := (load_rule_packs(args.packs_dir) or {}).get(language):
+        modes["pack"] = pack_paths
+
+    runner = SemgrepRunner(max_workers=1, timeout=None)
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as file:
+        file.write(SNIPPET)
+    try:
+        print(f"{'mode':<10}{'per scan, s':>14}")
+        for label, configs in modes.items():
+            latency = await measure(runner, [config for config in configs if config], file.name, args.number)
+            print(f"{label:<10}{latency:>14.2f}")
+    finally:
+        os.unlink(file.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.modules.logger import pipeline_logger  # noqa: E402
+from app.pipelines.code_analysis_pipeline.pipeline import CodeAnalysisPipeline  # noqa: E402
+from app.pipelines.code_analysis_pipeline.rule_packs import build_rule_packs  # noqa: E402
+from settings import get_settings  # noqa: E402
+
+settings = get_settings()
+
+
+def main() -> None:
+    """
+    Builds offline Semgrep rule packs for every supported language.
+    """
+    parser = argparse.ArgumentParser(description="Build offline Semgrep rule packs")
+    parser.add_argument(
+        "--output",
+        default=settings.SEMGREP_RULE_PACKS_DIR or "data/semgrep_packs",
+        help="Output directory, SEMGREP_RULE_PACKS_DIR by default",
+    )
+    args = parser.parse_args()
+
+    languages = {
+        language: (config.config_name, CodeAnalysisPipeline._get_semgrep_local_rules_dir(language.value))
+        for language, config in CodeAnalysisPipeline._languages_data_map.items()
+    }
+    try:
+        manifest = build_rule_packs(args.output, languages)
+    except Exception as e:
+        pipeline_logger.error(f"Failed to build rule packs: {e}")
+        sys.exit(1)
+    pipeline_logger.info(f"Built {len(manifest)} rule packs in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
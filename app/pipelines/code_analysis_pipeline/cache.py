@@ -0,0 +1,160 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from app.core.enums import Language
+from app.models.pipeline import TriggeredRuleData
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normalizes code so that whitespace-only differences share a cache entry.
+
+    Args:
+        code (str): Code snippet
+
+    Returns:
+        str: Code with unified line endings, no trailing whitespace and no surrounding blank lines
+    """
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def rules_fingerprint(configs: list[str]) -> str:
+    """
+    Fingerprints Semgrep configs by the path, size and modification time of their local files.
+
+    Registry configs contribute their name only.
+
+    Args:
+        configs (list[str]): Values for `--config`
+
+    Returns:
+        str: Hex digest that changes whenever a local rule file is added, removed or modified
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for config in configs:
+        digest.update(config.encode())
+        if os.path.isdir(config):
+            paths = sorted(os.path.join(root, name) for root, _, names in os.walk(config) for name in names)
+        elif os.path.isfile(config):
+            paths = [config]
+        else:
+            continue
+        for path in paths:
+            stat = os.stat(path)
+            digest.update(f"\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+class ScanResultCache:
+    """
+    LRU cache with TTL for processed Semgrep results.
+
+    Entries are keyed by the hash of the normalized code, the language and
+    the fingerprint of the rules it was scanned with. Fingerprints are
+    recomputed at most every `check_interval` seconds, and the cache is
+    cleared when they change, so edited rules never serve stale results.
+
+    Attributes:
+        max_entries (int): Maximum number of cached results, 0 disables the cache
+        ttl (float): Seconds a result stays valid
+        check_interval (float): Seconds between rule fingerprint checks
+        hits (int): Number of cache hits
+        misses (int): Number of cache misses
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, check_interval: float = 5.0) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of cached results, 0 disables the cache
+            ttl (float): Seconds a result stays valid
+            check_interval (float): Seconds between rule fingerprint checks
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, Language, str], tuple[float, list[TriggeredRuleData]]] = OrderedDict()
+        self._fingerprints: dict[tuple[str, ...], tuple[float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: Number of entries, hits and misses
+        """
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+    def key(self, code: str, language: Language, configs: list[str]) -> tuple[str, Language, str]:
+        """
+        Builds the cache key of a scan.
+
+        Args:
+            code (str): Code to scan
+            language (Language): Programming language
+            configs (list[str]): Semgrep configs the code is scanned with
+
+        Returns:
+            tuple[str, Language, str]: Code hash, language and rules fingerprint
+        """
+        code_hash = hashlib.blake2b(normalize_code(code).encode(), digest_size=16).hexdigest()
+        return code_hash, language, self._rules_version(configs)
+
+    def get(self, key: tuple[str, Language, str]) -> list[TriggeredRuleData] | None:
+        """
+        Returns the cached result of a scan if it has not expired.
+
+        Args:
+            key (tuple[str, Language, str]): Key built by `key`
+
+        Returns:
+            list[TriggeredRuleData] | None: Triggered rules, None on a miss
+        """
+        if not self.max_entries:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return list(entry[1])
+
+    def put(self, key: tuple[str, Language, str], triggered_rules: list[TriggeredRuleData]) -> None:
+        """
+        Stores the result of a scan, evicting the least recently used entries.
+
+        Args:
+            key (tuple[str, Language, str]): Key built by `key`
+            triggered_rules (list[TriggeredRuleData]): Triggered rules of the scan
+        """
+        if not self.max_entries:
+            return
+        self._entries[key] = (time.monotonic(), list(triggered_rules))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _rules_version(self, configs: list[str]) -> str:
+        """
+        Returns the rules fingerprint of configs, clearing the cache when it has changed.
+        """
+        configs_key = tuple(configs)
+        now = time.monotonic()
+        checked_at, fingerprint = self._fingerprints.get(configs_key, (None, None))
+        if checked_at is None or now - checked_at >= self.check_interval:
+            current = rules_fingerprint(configs)
+            if fingerprint is not None and current != fingerprint:
+                self._entries.clear()
+            self._fingerprints[configs_key] = (now, current)
+            fingerprint = current
+        return fingerprint
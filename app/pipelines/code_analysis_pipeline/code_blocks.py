@@ -0,0 +1,203 @@
+import re
+from dataclasses import dataclass
+
+from app.core.enums import Language
+
+FENCED_BLOCK_RE = re.compile(
+    r"^[ \t]{0,3}(?P<fence>`{3,}|~{3,})[ \t]*(?P<tag>[^\s`]*)[^\n]*\n(?P<code>.*?)^[ \t]{0,3}(?P=fence)[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+INDENTED_LINE_RE = re.compile(r"^(?: {4}|\t)")
+
+FENCE_TAGS: dict[str, Language] = {
+    "c": Language.C,
+    "h": Language.C,
+    "cpp": Language.CPP,
+    "c++": Language.CPP,
+    "cc": Language.CPP,
+    "cxx": Language.CPP,
+    "hpp": Language.CPP,
+    "cs": Language.CSHARP,
+    "csharp": Language.CSHARP,
+    "c#": Language.CSHARP,
+    "hack": Language.HACK,
+    "hh": Language.HACK,
+    "java": Language.JAVA,
+    "js": Language.JAVASCRIPT,
+    "javascript": Language.JAVASCRIPT,
+    "jsx": Language.JAVASCRIPT,
+    "mjs": Language.JAVASCRIPT,
+    "node": Language.JAVASCRIPT,
+    "kotlin": Language.KOTLIN,
+    "kt": Language.KOTLIN,
+    "php": Language.PHP,
+    "py": Language.PYTHON,
+    "python": Language.PYTHON,
+    "python3": Language.PYTHON,
+    "rb": Language.RUBY,
+    "ruby": Language.RUBY,
+    "rs": Language.RUST,
+    "rust": Language.RUST,
+    "swift": Language.SWIFT,
+}
+
+# Single constructs also occur in prose ("for the following:"), so a block needs this many matching signatures
+MIN_SIGNATURE_SCORE = 2
+
+# Constructs that are characteristic of a language and rare in prose. Each matching signature adds one point.
+LANGUAGE_SIGNATURES: dict[Language, list[re.Pattern]] = {
+    language: [re.compile(signature, re.MULTILINE) for signature in signatures]
+    for language, signatures in {
+        Language.PYTHON: [
+            r"^\s*def \w+\(.*\)\s*(->\s*[\w\[\], .]+)?:\s*$",
+            r"^\s*class \w+(\(.*\))?:\s*$",
+            r"^\s*(import [\w.]+|from [\w.]+ import \w+)",
+            r"^\s*(if|elif|for|while|with|try|except)\b.*:\s*$",
+            r"\bself\.\w+",
+            r"\bprint\(",
+        ],
+        Language.JAVASCRIPT: [
+            r"\b(const|let|var) \w+\s*=",
+            r"\bfunction\s*\w*\s*\(",
+            r"=>\s*[{(\w]",
+            r"\bconsole\.\w+\(",
+            r"\brequire\(['\"]",
+            r"\bdocument\.\w+",
+        ],
+        Language.JAVA: [
+            r"\bpublic\s+(static\s+)?(final\s+)?(class|void|interface)\b",
+            r"\bSystem\.out\.print",
+            r"^\s*import java\.",
+            r"\bString\[\]\s+\w+",
+        ],
+        Language.CSHARP: [
+            r"^\s*using System(\.\w+)*;",
+            r"^\s*namespace [\w.]+",
+            r"\bConsole\.Write",
+        ],
+        Language.C: [
+            r"^\s*#include\s*[<\"]\w+\.h[>\"]",
+            r"\bint\s+main\s*\(",
+            r"\b(printf|malloc|strcpy|sprintf)\s*\(",
+        ],
+        Language.CPP: [
+            r"^\s*#include\s*<\w+>",
+            r"\bstd::\w+",
+            r"\b(cout|cin)\s*(<<|>>)",
+            r"^\s*using namespace \w+;",
+        ],
+        Language.PHP: [
+            r"<\?php",
+            r"\$\w+\s*=[^=]",
+            r"\becho\s+[\$'\"]",
+        ],
+        Language.RUBY: [
+            r"^\s*def \w+[!?]?(\(.*\))?\s*$",
+            r"^\s*end\s*$",
+            r"^\s*require ['\"]",
+            r"\bputs\s",
+        ],
+        Language.RUST: [
+            r"\bfn \w+\s*(<.*>)?\s*\(",
+            r"\blet mut \w+",
+            r"\b\w+!\(",
+            r"^\s*use \w+::",
+        ],
+        Language.SWIFT: [
+            r"\bfunc \w+\s*\(",
+            r"^\s*import (Foundation|UIKit|SwiftUI)\b",
+            r"\b(var|let) \w+\s*:\s*\w+",
+            r"\bguard let\b",
+        ],
+        Language.KOTLIN: [
+            r"\bfun \w+\s*\(",
+            r"\bval \w+\s*(:\s*\w+)?\s*=",
+            r"\bprintln\(",
+            r"^\s*package [\w.]+\s*$",
+        ],
+    }.items()
+}
+
+
+@dataclass
+class CodeBlock:
+    """
+    Code block found in a prompt.
+
+    Attributes:
+        code (str): Block content without fences or indentation
+        language (Language | None): Detected language, None if unknown
+    """
+
+    code: str
+    language: Language | None
+
+
+def detect_language(code: str, tag: str = "", min_score: int = MIN_SIGNATURE_SCORE) -> Language | None:
+    """
+    Detects the language of a code block from its fence tag or from language signatures.
+
+    Signatures are used when the block has no tag or a tag that is not a
+    known language, e.g. `text` or `code`.
+
+    Args:
+        code (str): Code block content
+        tag (str): Fence info string, e.g. `python`
+        min_score (int): Minimum number of matching signatures
+
+    Returns:
+        Language | None: Detected language, None if the block does not look like supported code
+    """
+    if tag and (language := FENCE_TAGS.get(tag.lower())) is not None:
+        return language
+    best_language, best_score = None, 0
+    for language, signatures in LANGUAGE_SIGNATURES.items():
+        score = sum(1 for signature in signatures if signature.search(code))
+        if score > best_score:
+            best_language, best_score = language, score
+    return best_language if best_score >= min_score else None
+
+
+def extract_code_blocks(text: str) -> list[CodeBlock]:
+    """
+    Extracts fenced and indented code blocks from a prompt.
+
+    Fenced blocks use their info string to select the language and fall back
+    to signatures when it is empty or not a known language. Indented blocks
+    (four spaces or a tab, preceded by a blank line) are detected by
+    signatures only. Blocks whose language is not detected keep `language=None`.
+
+    Args:
+        text (str): Prompt text
+
+    Returns:
+        list[CodeBlock]: Fenced blocks followed by indented blocks
+    """
+    blocks = []
+    for match in FENCED_BLOCK_RE.finditer(text):
+        code = match.group("code")
+        if code.strip():
+            blocks.append(CodeBlock(code=code, language=detect_language(code, match.group("tag"))))
+    for code in _indented_blocks(FENCED_BLOCK_RE.sub("", text)):
+        blocks.append(CodeBlock(code=code, language=detect_language(code)))
+    return blocks
+
+
+def _indented_blocks(text: str) -> list[str]:
+    """
+    Finds Markdown indented code blocks and removes their indentation.
+    """
+    blocks, current, previous_blank = [], [], True
+    for line in text.splitlines():
+        if current and (INDENTED_LINE_RE.match(line) or not line.strip()):
+            current.append(line)
+        elif previous_blank and INDENTED_LINE_RE.match(line):
+            current = [line]
+        else:
+            if current:
+                blocks.append(current)
+            current = []
+        previous_blank = not line.strip()
+    if current:
+        blocks.append(current)
+    return ["\n".join(INDENTED_LINE_RE.sub("", line) for line in lines).strip("\n") + "\n" for lines in blocks]
@@ -1,7 +1,6 @@
 import asyncio
-import json
 import os
-import tempfile
+import re
 from pathlib import Path
 
 from app.core.dataclasses import SemgrepLangConfig
@@ -9,6 +8,14 @@ from app.core.enums import ActionStatus, Language, PipelineNames, RuleAction
 from app.models.pipeline import PipelineResult, TriggeredRuleData
 from app.modules.logger import pipeline_logger
 from app.pipelines.base import BasePipeline
+from app.pipelines.code_analysis_pipeline.cache import ScanResultCache, rules_fingerprint
+from app.pipelines.code_analysis_pipeline.code_blocks import extract_code_blocks
+from app.pipelines.code_analysis_pipeline.prescan import build_prescan_matcher
+from app.pipelines.code_analysis_pipeline.rule_packs import load_local_rules, load_rule_packs, load_rules_file
+from app.pipelines.code_analysis_pipeline.runner import SemgrepBatcher, SemgrepRunner
+from settings import get_settings
+
+settings = get_settings()
 
 
 class CodeAnalysisPipeline(BasePipeline):
@@ -24,9 +31,17 @@ class CodeAnalysisPipeline(BasePipeline):
         name (PipelineNames): Pipeline name (code)
         enabled (bool): Always enabled pipeline
         _languages_data_map (dict): Mapping of languages to Semgrep configurations
+        _runner (SemgrepRunner): Runs Semgrep with bounded concurrency (SEMGREP_MAX_WORKERS)
+        _batcher (SemgrepBatcher): Groups concurrent scans into one Semgrep invocation
+        _cache (ScanResultCache): Results of previous scans by code, language and rules version
+        prescan_skips (int): Number of scans skipped because no rule's prescan regex matched
+        _rule_packs (dict[Language, list[str]] | None): Prebuilt rule packs per language, None in registry mode,
+            also used when SEMGREP_RULE_PACKS_DIR has no readable manifest
+        _prescan_matchers (dict[str, re.Pattern | None]): Combined prescan regexes per config, None always scans
     """
 
     name = PipelineNames.code_analysis
+    cost_tier = 2
     enabled = True
 
     _languages_data_map: dict[Language, SemgrepLangConfig] = {
@@ -46,11 +61,37 @@ class CodeAnalysisPipeline(BasePipeline):
 
     def __init__(self):
         super().__init__()
+        self._runner = SemgrepRunner(max_workers=settings.SEMGREP_MAX_WORKERS, timeout=settings.SEMGREP_TIMEOUT)
+        self._batcher = SemgrepBatcher(
+            self._runner,
+            window_ms=settings.SEMGREP_BATCH_WINDOW_MS,
+            max_batch_size=settings.SEMGREP_BATCH_MAX_SIZE,
+            tmp_dir=settings.SEMGREP_TMP_DIR,
+        )
+        self._cache = ScanResultCache(max_entries=settings.SEMGREP_CACHE_MAX_ENTRIES, ttl=settings.SEMGREP_CACHE_TTL)
+        self._rule_packs = None
+        if settings.SEMGREP_RULE_PACKS_DIR:
+            self._rule_packs = load_rule_packs(settings.SEMGREP_RULE_PACKS_DIR)
+            if self._rule_packs is None:
+                pipeline_logger.error(
+                    f"[{self}] no usable rule packs in {settings.SEMGREP_RULE_PACKS_DIR}, "
+                    "falling back to the Semgrep registry configs"
+                )
+            else:
+                pipeline_logger.info(
+                    f"[{self}] using rule packs from {settings.SEMGREP_RULE_PACKS_DIR}: "
+                    f"{', '.join(lang.value for lang in self._rule_packs)}"
+                )
+        self.prescan_skips = 0
+        self._prescan_matchers: dict[str, re.Pattern | None] = {}
+        if settings.SEMGREP_PRESCAN:
+            self._build_prescan_matchers()
         pipeline_logger.info(
             f"[{self}] loaded successfully. Languages: {', '.join([lang.value for lang in self._languages_data_map.keys()])}"
         )
 
-    def _get_semgrep_local_rules_dir(self, language: str) -> str | None:
+    @staticmethod
+    def _get_semgrep_local_rules_dir(language: str) -> str | None:
         """
         Gets local Semgrep rules directory for specific language.
 
@@ -67,13 +108,106 @@ class CodeAnalysisPipeline(BasePipeline):
         if os.path.exists(rules_dir_path) and os.path.isdir(rules_dir_path):
             return rules_dir_path
 
+    def _get_semgrep_configs(self, language: Language) -> list[str]:
+        """
+        Gets Semgrep configs to scan a language with.
+
+        With SEMGREP_RULE_PACKS_DIR set only the prebuilt packs are used, so
+        scans never reach the Semgrep registry. Otherwise the registry config
+        and the local rules directory are passed to Semgrep.
+
+        Args:
+            language (Language): Programming language
+
+        Returns:
+            list[str]: Values for `--config`, empty if the language has no rules
+        """
+        if self._rule_packs is not None:
+            return self._rule_packs.get(language, [])
+        configs = []
+        if lang_config_data := self._languages_data_map.get(language):
+            if lang_config_data.config_name:
+                configs.append(lang_config_data.config_name)
+        if rules_dir := self._get_semgrep_local_rules_dir(language.value):
+            configs.append(rules_dir)
+        return configs
+
+    @property
+    def version(self) -> str:
+        """
+        Fingerprint of the Semgrep configs of all languages, see `rules_fingerprint`.
+        """
+        configs = {config for language in self._languages_data_map for config in self._get_semgrep_configs(language)}
+        return rules_fingerprint(sorted(configs))
+
+    @staticmethod
+    def _load_config_rules(config: str) -> list[dict]:
+        """
+        Loads the rules of a local Semgrep config.
+
+        Args:
+            config (str): Value for `--config`
+
+        Returns:
+            list[dict]: Semgrep rules, empty for registry configs, whose rules are only known at scan time
+        """
+        if os.path.isdir(config):
+            return load_local_rules(config)
+        if os.path.isfile(config):
+            return load_rules_file(config)
+        return []
+
+    def _build_prescan_matchers(self) -> None:
+        """
+        Compiles the prescan regexes of each local config into one matcher per config.
+
+        Configs are gated independently: a rule pack or rules directory whose
+        rules all have hints is skipped when none of them match, while
+        registry configs and configs with rules lacking a hint always run.
+        """
+        for language in self._languages_data_map:
+            for config in self._get_semgrep_configs(language):
+                if config in self._prescan_matchers:
+                    continue
+                try:
+                    self._prescan_matchers[config] = build_prescan_matcher(self._load_config_rules(config))
+                except Exception as e:
+                    pipeline_logger.warning(f"[{self}] Failed to build prescan matcher for {config}: {e}")
+                    self._prescan_matchers[config] = None
+        gated = [config for config, matcher in self._prescan_matchers.items() if matcher is not None]
+        pipeline_logger.info(f"[{self}] prescan gate enabled for: {', '.join(gated) or 'none'}")
+
+    def _configs_to_scan(self, prompt: str, configs: list[str]) -> list[str]:
+        """
+        Selects the configs with a rule that can match the code.
+
+        Args:
+            prompt (str): Code content to analyze
+            configs (list[str]): Configs of the language
+
+        Returns:
+            list[str]: Configs without a prescan matcher or whose matcher matches, empty if the scan is skipped
+        """
+        selected = [
+            config
+            for config in configs
+            if (matcher := self._prescan_matchers.get(config)) is None or matcher.search(prompt)
+        ]
+        if not selected:
+            self.prescan_skips += 1
+        return selected
+
     async def run(self, prompt: str, **kwargs) -> PipelineResult:
         """
         Analyzes code prompt using Semgrep static analysis.
 
-        Performs static code analysis on the provided prompt using Semgrep
-        for the specified programming language. Returns scan results with
-        triggered rules if any issues are found.
+        Performs static code analysis on the provided prompt using Semgrep.
+        If 'language' is given, the whole prompt is scanned as code in that
+        language. Otherwise code blocks are extracted from the prompt and each
+        block of a supported language is scanned as its own file; concurrent
+        blocks share Semgrep invocations through the batcher. Prose and blocks
+        of unknown language are not scanned.
+        Returns scan results with triggered rules if any issues are found.
 
         Args:
             prompt (str): Code prompt to analyze
@@ -82,19 +216,46 @@ class CodeAnalysisPipeline(BasePipeline):
         Returns:
             PipelineResult: Analysis result with triggered rules and status
         """
-        language = kwargs.get("language", "")
-        pipeline_logger.info(f"Analyzing for language: {language}")
-        triggered_rule_data = await self._scan_for_language(prompt, language)
+        code_blocks = self._split_code_blocks(prompt, kwargs.get("language"))
+        languages = ", ".join(dict.fromkeys(language.value for language, _ in code_blocks))
+        pipeline_logger.info(f"Analyzing for languages: {languages}")
+        scans = await asyncio.gather(*[self._scan_for_language(code, language) for language, code in code_blocks])
+        triggered_rule_data = [rule for scan in scans for rule in scan]
         status = ActionStatus.BLOCK if triggered_rule_data else ActionStatus.ALLOW
-        pipeline_logger.info(f"Analyzing for language: {language}, status: {status}")
+        pipeline_logger.info(f"Analyzing for languages: {languages}, status: {status}")
         return PipelineResult(name=str(self), triggered_rules=triggered_rule_data, status=status)
 
+    def _split_code_blocks(self, prompt: str, language: Language | str | None = None) -> list[tuple[Language, str]]:
+        """
+        Selects the code blocks to scan.
+
+        Blocks are kept apart, since independent snippets joined into one
+        file often do not parse as one program. Repeated blocks are scanned once.
+
+        Args:
+            prompt (str): Prompt to analyze
+            language (Language | str | None): Language of the whole prompt, if known
+
+        Returns:
+            list[tuple[Language, str]]: Language and code of each block of a supported language
+        """
+        if language:
+            try:
+                return [(Language(language), prompt)]
+            except ValueError:
+                pipeline_logger.warning(f"[{self}] Unsupported language: {language}")
+                return []
+        blocks = (block for block in extract_code_blocks(prompt) if block.language in self._languages_data_map)
+        return list(dict.fromkeys((block.language, block.code) for block in blocks))
+
     async def _scan_for_language(self, prompt: str, language: Language) -> list[TriggeredRuleData]:
         """
         Performs Semgrep analysis for specific programming language.
 
-        Creates a temporary file with the code prompt and runs Semgrep
-        analysis using language-specific configurations and rules.
+        Leaves out configs whose prescan regexes do not match, skipping Semgrep
+        when none is left, and returns cached results for code already scanned with the
+        same rules. Otherwise runs Semgrep analysis using language-specific
+        configurations and rules, batched with concurrent scans of the same language.
 
         Args:
             prompt (str): Code content to analyze
@@ -107,29 +268,23 @@ class CodeAnalysisPipeline(BasePipeline):
         if not (lang_config_data := self._languages_data_map.get(language)):
             return triggered_rule_data
 
-        cmd = ["semgrep", "scan", "--metrics=off"]
-        if lang_config_data.config_name:
-            cmd.append(f"--config={lang_config_data.config_name}")
-        if rules_dir := self._get_semgrep_local_rules_dir(language.value):
-            cmd.append(f"--config={rules_dir}")
+        if not (configs := self._get_semgrep_configs(language)):
+            return triggered_rule_data
 
-        if not (lang_config_data.config_name or rules_dir):
+        if not (configs := self._configs_to_scan(prompt, configs)):
             return triggered_rule_data
 
-        tmp_file_path = ""
-        try:
-            with tempfile.NamedTemporaryFile(mode="w+", delete=False, suffix=lang_config_data.file_extension) as file:
-                file.write(prompt)
-                tmp_file_path = file.name
+        cache_key = self._cache.key(prompt, language, configs)
+        if (cached := self._cache.get(cache_key)) is not None:
+            return cached
 
-            cmd.extend(["--json", tmp_file_path])
-            result = await self._run_semgrep_task(cmd)
+        try:
+            result = await self._batcher.scan(configs, prompt, lang_config_data.file_extension)
             processed = self._process_semgrep_analysis_result(result)
             triggered_rule_data.extend(processed)
+            if result:
+                self._cache.put(cache_key, processed)
         finally:
-            if tmp_file_path:
-                os.unlink(tmp_file_path)
-
             return triggered_rule_data
 
     @staticmethod
@@ -159,27 +314,3 @@ class CodeAnalysisPipeline(BasePipeline):
             )
 
         return triggered_rule_data
-
-    @staticmethod
-    async def _run_semgrep_task(cmd: list[str]) -> dict:
-        """
-        Executes Semgrep command asynchronously and returns JSON result.
-
-        Runs the Semgrep command as a subprocess and captures its output.
-        Returns parsed JSON result or empty dict on failure.
-
-        Args:
-            cmd (list[str]): Semgrep command and arguments to execute
-
-        Returns:
-            dict: Parsed JSON result from Semgrep or empty dict on error
-        """
-        process = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            return {}
-
-        return json.loads(stdout.decode())
@@ -0,0 +1,52 @@
+import re
+
+from app.modules.logger import pipeline_logger
+
+
+def build_prescan_matcher(rules: list[dict]) -> re.Pattern | None:
+    """
+    Combines the `metadata.prescan_regex` hints of Semgrep rules into one pattern.
+
+    A rule can only match code that contains its prescan regex, so code that
+    matches none of them can skip Semgrep. A rule without a valid hint could
+    match anything, in which case no matcher is built.
+
+    Args:
+        rules (list[dict]): Semgrep rules of one config
+
+    Returns:
+        re.Pattern | None: Pattern matching code that needs a scan, None if every code block needs one
+    """
+    if not rules:
+        return None
+    hints = []
+    for rule in rules:
+        hint = (rule.get("metadata") or {}).get("prescan_regex")
+        if not hint:
+            return None
+        try:
+            re.compile(hint)
+        except re.error:
+            pipeline_logger.warning(f"Invalid prescan_regex, rule_id={rule.get('id')}")
+            return None
+        hints.append(f"(?:{hint})")
+    return re.compile("|".join(hints))
+
+
+def split_by_prescan(rules: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Separates rules with a valid `metadata.prescan_regex` hint from the rest.
+
+    Rules with hints can be gated together by `build_prescan_matcher`, while
+    the others have to run on every code block.
+
+    Args:
+        rules (list[dict]): Semgrep rules
+
+    Returns:
+        tuple[list[dict], list[dict]]: Rules with a valid hint, rules without one
+    """
+    hinted, unhinted = [], []
+    for rule in rules:
+        (hinted if build_prescan_matcher([rule]) is not None else unhinted).append(rule)
+    return hinted, unhinted
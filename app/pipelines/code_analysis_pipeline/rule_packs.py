@@ -0,0 +1,185 @@
+import hashlib
+import json
+import subprocess
+import urllib.request
+from pathlib import Path
+
+import yaml
+
+from app.core.enums import Language
+from app.modules.logger import pipeline_logger
+from app.pipelines.code_analysis_pipeline.prescan import split_by_prescan
+
+REGISTRY_URL = "https://semgrep.dev/c/"
+MANIFEST_FILE = "manifest.json"
+
+
+def fetch_registry_rules(config_name: str, timeout: float = 60.0) -> list[dict]:
+    """
+    Downloads the rules of a Semgrep registry config, e.g. `p/python`.
+
+    Args:
+        config_name (str): Registry config name
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        list[dict]: Rules of the config
+    """
+    request = urllib.request.Request(REGISTRY_URL + config_name, headers={"Accept": "application/x-yaml"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return (yaml.safe_load(response.read()) or {}).get("rules", [])
+
+
+def load_rules_file(path: str | Path) -> list[dict]:
+    """
+    Loads rules from a Semgrep rule file.
+
+    Args:
+        path (str | Path): YAML rule file
+
+    Returns:
+        list[dict]: Rules of the file
+    """
+    with open(path, encoding="utf-8") as f:
+        return (yaml.safe_load(f) or {}).get("rules", [])
+
+
+def load_local_rules(rules_dir: str | None) -> list[dict]:
+    """
+    Loads rules from all YAML files of a local Semgrep rules directory.
+
+    Args:
+        rules_dir (str | None): Directory with Semgrep rule files
+
+    Returns:
+        list[dict]: Rules in file name order
+    """
+    if not rules_dir:
+        return []
+    rules = []
+    for path in sorted(Path(rules_dir).glob("*.y*ml")):
+        rules.extend(load_rules_file(path))
+    return rules
+
+
+def merge_rules(*rule_sets: list[dict]) -> list[dict]:
+    """
+    Merges rule sets, later sets overriding rules with the same id.
+
+    Returns:
+        list[dict]: Merged rules
+    """
+    merged = {}
+    for rules in rule_sets:
+        for rule in rules:
+            merged[rule["id"]] = rule
+    return list(merged.values())
+
+
+def validate_pack(pack_path: Path) -> bool:
+    """
+    Validates a rule pack with `semgrep --validate`.
+
+    Args:
+        pack_path (Path): Rule pack file
+
+    Returns:
+        bool: True if Semgrep accepts the pack or is not installed
+    """
+    cmd = ["semgrep", "scan", "--validate", "--metrics=off", "--disable-version-check", f"--config={pack_path}"]
+    try:
+        process = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        pipeline_logger.warning(f"Semgrep is not installed, {pack_path.name} was not validated")
+        return True
+    if process.returncode != 0:
+        pipeline_logger.error(f"Invalid rule pack {pack_path.name}: {process.stderr[-1000:]}")
+        return False
+    return True
+
+
+def build_rule_packs(packs_dir: str | Path, languages: dict[Language, tuple[str | None, str | None]]) -> dict:
+    """
+    Snapshots registry configs and merges them with local rules into packs per language.
+
+    Rules with a `metadata.prescan_regex` hint are written to their own pack
+    (`<language>.prescan.yml`), so the prescan gate can skip them while the
+    rules without hints (`<language>.yml`) still run.
+
+    Args:
+        packs_dir (str | Path): Output directory
+        languages (dict[Language, tuple[str | None, str | None]]): Registry config and local rules
+            directory per language
+
+    Returns:
+        dict: Manifest with the pack files and content hash per language
+
+    Raises:
+        ValueError: If a pack fails validation
+    """
+    packs_dir = Path(packs_dir)
+    packs_dir.mkdir(parents=True, exist_ok=True)
+    registry_cache: dict[str, list[dict]] = {}
+    manifest = {}
+    for language, (config_name, rules_dir) in languages.items():
+        registry_rules = []
+        if config_name:
+            if config_name not in registry_cache:
+                registry_cache[config_name] = fetch_registry_rules(config_name)
+            registry_rules = registry_cache[config_name]
+        rules = merge_rules(registry_rules, load_local_rules(rules_dir))
+        if not rules:
+            continue
+        hinted, unhinted = split_by_prescan(rules)
+        files = []
+        digest = hashlib.sha256()
+        for suffix, pack_rules in ((".yml", unhinted), (".prescan.yml", hinted)):
+            if not pack_rules:
+                continue
+            content = yaml.safe_dump({"rules": pack_rules}, sort_keys=False, allow_unicode=True)
+            pack_path = packs_dir / f"{language.value}{suffix}"
+            pack_path.write_text(content, encoding="utf-8")
+            if not validate_pack(pack_path):
+                raise ValueError(f"Rule pack {pack_path.name} failed validation")
+            files.append(pack_path.name)
+            digest.update(content.encode())
+        manifest[language.value] = {
+            "files": files,
+            "rules": len(rules),
+            "prescan_rules": len(hinted),
+            "registry_config": config_name,
+            "sha256": digest.hexdigest(),
+        }
+        pipeline_logger.info(f"Built rule packs {', '.join(files)}: {len(rules)} rules, {len(hinted)} with prescan")
+    with open(packs_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_rule_packs(packs_dir: str | Path) -> dict[Language, list[str]] | None:
+    """
+    Finds prebuilt rule packs listed in the manifest of a packs directory.
+
+    Args:
+        packs_dir (str | Path): Directory written by `build_rule_packs`
+
+    Returns:
+        dict[Language, list[str]] | None: Rule pack paths per language, None if the manifest cannot be read
+            or none of its packs exist
+    """
+    packs_dir = Path(packs_dir)
+    try:
+        with open(packs_dir / MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+        packs = {}
+        for language, entry in manifest.items():
+            for file in entry.get("files") or [entry["file"]]:
+                pack_path = packs_dir / file
+                if pack_path.exists():
+                    packs.setdefault(Language(language), []).append(str(pack_path))
+                else:
+                    pipeline_logger.error(f"Semgrep rule pack {pack_path} listed in the manifest does not exist")
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        pipeline_logger.error(f"Failed to load Semgrep rule packs from {packs_dir}: {e}")
+        return None
+    return packs or None
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import os
+import signal
+import tempfile
+
+from app.modules.logger import pipeline_logger
+
+
+class SemgrepRunner:
+    """
+    Runs Semgrep scans as subprocesses with bounded concurrency.
+
+    A semaphore caps the number of Semgrep processes alive at once, so a
+    burst of code prompts queues up instead of forking one process per
+    prompt. Scans that exceed the timeout are killed, and crashed or killed
+    scans return an empty result.
+
+    Attributes:
+        max_workers (int): Maximum number of concurrent Semgrep processes
+        timeout (float | None): Seconds after which a scan is killed
+        scans (int): Number of finished scans
+        failures (int): Number of scans that crashed or timed out
+    """
+
+    # Skips the version check request and metrics upload Semgrep does on every start
+    ENV = {"SEMGREP_ENABLE_VERSION_CHECK": "0", "SEMGREP_SEND_METRICS": "off"}
+
+    def __init__(self, max_workers: int = 4, timeout: float | None = 30.0) -> None:
+        """
+        Args:
+            max_workers (int): Maximum number of concurrent Semgrep processes
+            timeout (float | None): Seconds after which a scan is killed
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.scans = 0
+        self.failures = 0
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._env = {**os.environ, **self.ENV}
+
+    def stats(self) -> dict:
+        """
+        Returns runner counters.
+
+        Returns:
+            dict: Concurrency limit, busy workers, finished and failed scans
+        """
+        return {
+            "max_workers": self.max_workers,
+            "busy_workers": self.max_workers - self._semaphore._value,
+            "scans": self.scans,
+            "failures": self.failures,
+        }
+
+    async def scan(self, configs: list[str], targets: list[str]) -> dict:
+        """
+        Scans target files with the given rule configs.
+
+        Args:
+            configs (list[str]): Values for `--config` (registry packs, rule files or directories)
+            targets (list[str]): Files to scan
+
+        Returns:
+            dict: Parsed Semgrep JSON output, or empty dict on error
+        """
+        cmd = ["semgrep", "scan", "--metrics=off", "--disable-version-check", "--quiet", "--json"]
+        cmd.extend(f"--config={config}" for config in configs)
+        cmd.extend(targets)
+        async with self._semaphore:
+            return await self._run(cmd)
+
+    async def _run(self, cmd: list[str]) -> dict:
+        """
+        Executes a Semgrep command and returns its JSON result.
+
+        Args:
+            cmd (list[str]): Semgrep command and arguments to execute
+
+        Returns:
+            dict: Parsed JSON result from Semgrep or empty dict on error
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._env,
+            start_new_session=True,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            self.failures += 1
+            pipeline_logger.warning(f"Semgrep scan killed after {self.timeout}s")
+            return {}
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+        self.scans += 1
+
+        if process.returncode != 0:
+            self.failures += 1
+            pipeline_logger.warning(
+                f"Semgrep scan failed, returncode={process.returncode}, stderr={stderr.decode(errors='replace')[-500:]}"
+            )
+            return {}
+
+        return json.loads(stdout.decode())
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        """
+        Kills a Semgrep process together with the semgrep-core processes it started.
+
+        Args:
+            process (asyncio.subprocess.Process): Process started in its own session
+        """
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+class SemgrepBatcher:
+    """
+    Groups concurrent code scans into one Semgrep invocation.
+
+    Snippets scanned with the same configs and file extension within
+    `window_ms` milliseconds, up to `max_batch_size` of them, are written as
+    separate files into one temporary directory (tmpfs when available) and
+    scanned by a single Semgrep process. Results are split back by file path.
+
+    Attributes:
+        window_ms (float): How long a batch waits for more snippets after the first one
+        max_batch_size (int): Maximum number of snippets per Semgrep invocation
+        tmp_dir (str): Directory for snippet files
+        batches (int): Number of Semgrep invocations
+        batched_snippets (int): Number of snippets scanned
+    """
+
+    def __init__(
+        self, runner: SemgrepRunner, window_ms: float = 20.0, max_batch_size: int = 16, tmp_dir: str | None = None
+    ) -> None:
+        """
+        Args:
+            runner (SemgrepRunner): Runner for Semgrep invocations
+            window_ms (float): Collection window in milliseconds
+            max_batch_size (int): Maximum number of snippets per Semgrep invocation
+            tmp_dir (str | None): Directory for snippet files, /dev/shm or the system temp directory by default
+        """
+        self._runner = runner
+        self.window_ms = window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self.tmp_dir = tmp_dir or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+        self.batches = 0
+        self.batched_snippets = 0
+        self._pending: dict[tuple[tuple[str, ...], str], list[tuple[str, asyncio.Future]]] = {}
+        self._timers: dict[tuple[tuple[str, ...], str], asyncio.TimerHandle] = {}
+        # The event loop only keeps weak references to tasks, so running batches are held here until done
+        self._tasks: set[asyncio.Task] = set()
+
+    def stats(self) -> dict:
+        """
+        Returns batching counters.
+
+        Returns:
+            dict: Number of invocations, scanned snippets and average batch size
+        """
+        return {
+            "batches": self.batches,
+            "batched_snippets": self.batched_snippets,
+            "avg_batch_size": self.batched_snippets / self.batches if self.batches else 0.0,
+        }
+
+    async def scan(self, configs: list[str], code: str, file_extension: str) -> dict:
+        """
+        Scans a code snippet, possibly together with other pending snippets.
+
+        Args:
+            configs (list[str]): Values for `--config`
+            code (str): Code to scan
+            file_extension (str): File extension Semgrep uses to pick the language
+
+        Returns:
+            dict: Semgrep JSON output with the results for this snippet only, empty dict on error
+        """
+        loop = asyncio.get_running_loop()
+        key = (tuple(configs), file_extension)
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((code, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.window_ms / 1000, self._flush, key)
+        return await future
+
+    def _flush(self, key: tuple[tuple[str, ...], str]) -> None:
+        """
+        Starts scanning the pending snippets of a key.
+        """
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        if batch := self._pending.pop(key, None):
+            task = asyncio.create_task(self._scan_batch(list(key[0]), key[1], batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _scan_batch(
+        self, configs: list[str], file_extension: str, batch: list[tuple[str, asyncio.Future]]
+    ) -> None:
+        """
+        Scans a batch of snippets in one Semgrep invocation and resolves their futures.
+
+        Args:
+            configs (list[str]): Values for `--config`
+            file_extension (str): File extension of the snippet files
+            batch (list[tuple[str, asyncio.Future]]): Snippets and the futures waiting for their results
+        """
+        batch = [(code, future) for code, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        self.batches += 1
+        self.batched_snippets += len(batch)
+        try:
+            with tempfile.TemporaryDirectory(dir=self.tmp_dir, prefix="semgrep-") as batch_dir:
+                paths = []
+                for index, (code, _) in enumerate(batch):
+                    path = os.path.join(batch_dir, f"{index}{file_extension}")
+                    with open(path, "w", encoding="utf-8") as file:
+                        file.write(code)
+                    paths.append(path)
+                result = await self._runner.scan(configs, paths)
+        except Exception as err:
+            pipeline_logger.error(f"Failed to scan batch of {len(batch)} snippets: {err}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        results_by_path: dict[str, list[dict]] = {os.path.realpath(path): [] for path in paths}
+        for item in result.get("results", []):
+            results_by_path.get(os.path.realpath(item.get("path", "")), []).append(item)
+        for path, (_, future) in zip(paths, batch):
+            if not future.done():
+                future.set_result({"results": results_by_path[os.path.realpath(path)]} if result else {})
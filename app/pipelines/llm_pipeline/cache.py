@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from app.core.enums import ActionStatus
+from app.models.pipeline import PipelineResult
+
+
+class LLMResponseCache:
+    """
+    LRU cache with TTL for LLM analysis results, with coalescing of identical in-flight calls.
+
+    Entries are keyed by the model, the hash of the system prompt and the
+    hash of the prompt. Concurrent misses of a key share one upstream call,
+    which runs as its own task under its own time budget; each caller only
+    bounds its own wait by its deadline, so a caller hitting its deadline
+    neither cancels nor shortens the call for the others. Results with
+    status ERROR are shared with callers waiting at that moment but are not
+    cached.
+
+    Attributes:
+        max_entries (int): Maximum number of cached results, 0 disables caching (calls are still coalesced)
+        ttl (float): Seconds a result stays valid
+        hits (int): Number of cache hits
+        misses (int): Number of upstream calls
+        coalesced (int): Number of callers that shared an in-flight call
+        saved_latency (float): Seconds of upstream latency saved by hits and coalesced callers
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of cached results, 0 disables caching
+            ttl (float): Seconds a result stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_latency = 0.0
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, float, PipelineResult]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str, str], asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters, exposed by GET /api/v1/metrics through `LLMPipeline.stats`.
+
+        Returns:
+            dict: Number of entries and in-flight calls, hits, upstream calls,
+                coalesced callers, saved calls and saved latency in seconds
+        """
+        return {
+            "entries": len(self),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "saved_calls": self.hits + self.coalesced,
+            "saved_latency": round(self.saved_latency, 3),
+        }
+
+    @staticmethod
+    def key(model: str, system_prompt_hash: str, prompt: str) -> tuple[str, str, str]:
+        """
+        Builds the cache key of an analysis.
+
+        Args:
+            model (str): Model name
+            system_prompt_hash (str): Hash of the system prompt
+            prompt (str): Prompt to analyze
+
+        Returns:
+            tuple[str, str, str]: Model, system prompt hash and prompt hash
+        """
+        return model, system_prompt_hash, hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+    async def get_or_call(
+        self,
+        key: tuple[str, str, str],
+        call: Callable[[], Awaitable[PipelineResult]],
+        deadline: float | None = None,
+    ) -> PipelineResult:
+        """
+        Returns the cached result of a key, or the result of one shared upstream call.
+
+        Args:
+            key (tuple[str, str, str]): Key built by `key`
+            call (Callable[[], Awaitable[PipelineResult]]): Analyzes the prompt upstream, bounded by its own timeout
+            deadline (float | None): Event loop time until which this caller waits for the call
+
+        Returns:
+            PipelineResult: Analysis result
+
+        Raises:
+            TimeoutError: If the call did not finish before the deadline; it keeps running for other callers
+        """
+        if (entry := self._get(key)) is not None:
+            latency, result = entry
+            self.hits += 1
+            self.saved_latency += latency
+            return result.model_copy()
+        if (task := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+            async with asyncio.timeout_at(deadline):
+                latency, result = await asyncio.shield(task)
+            self.saved_latency += latency
+            return result.model_copy()
+        self.misses += 1
+        task = asyncio.create_task(self._call(key, call))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._call_done(key, done))
+        async with asyncio.timeout_at(deadline):
+            _, result = await asyncio.shield(task)
+        return result.model_copy()
+
+    def _call_done(self, key: tuple[str, str, str], task: asyncio.Task) -> None:
+        """
+        Forgets a finished call, retrieving its exception so that a failure nobody awaited is not reported.
+        """
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _call(
+        self, key: tuple[str, str, str], call: Callable[[], Awaitable[PipelineResult]]
+    ) -> tuple[float, PipelineResult]:
+        """
+        Runs an upstream call, measuring its latency and caching its result.
+        """
+        started_at = time.monotonic()
+        result = await call()
+        latency = time.monotonic() - started_at
+        if result.status != ActionStatus.ERROR:
+            self._put(key, latency, result)
+        return latency, result
+
+    def _get(self, key: tuple[str, str, str]) -> tuple[float, PipelineResult] | None:
+        """
+        Returns the latency and result cached for a key if it has not expired.
+        """
+        if not self.max_entries:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def _put(self, key: tuple[str, str, str], latency: float, result: PipelineResult) -> None:
+        """
+        Stores a result, evicting the least recently used entries.
+        """
+        if not self.max_entries:
+            return
+        self._entries[key] = (time.monotonic(), latency, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted to the upstream API.
+    """
+
+
+class AdmissionController:
+    """
+    Concurrency and rate limiter in front of an upstream API.
+
+    A request first takes one of `max_concurrency` slots, then a token from
+    a bucket refilled at `rate` tokens per second up to `burst`. Requests
+    that cannot start at once wait in a queue of at most `max_queue`
+    requests; when it is full they are rejected immediately instead of
+    piling up. A request that is still queued at its deadline is rejected
+    as well.
+
+    Attributes:
+        max_concurrency (int): Maximum number of concurrent requests, 0 for no limit
+        rate (float): Requests per second, 0 for no limit
+        burst (int): Size of the token bucket
+        max_queue (int): Maximum number of waiting requests
+        admitted (int): Number of admitted requests
+        rejected (int): Number of requests rejected because the queue was full
+        expired (int): Number of requests that reached their deadline in the queue
+        wait_time (float): Total seconds admitted requests waited
+        max_wait (float): Longest wait of an admitted request in seconds
+    """
+
+    def __init__(self, max_concurrency: int = 0, rate: float = 0.0, burst: int = 1, max_queue: int = 0) -> None:
+        """
+        Args:
+            max_concurrency (int): Maximum number of concurrent requests, 0 for no limit
+            rate (float): Requests per second, 0 for no limit
+            burst (int): Size of the token bucket
+            max_queue (int): Maximum number of waiting requests
+        """
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_queue = max_queue
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self._bucket_lock = asyncio.Lock()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._waiting = 0
+        self._active = 0
+
+    def stats(self) -> dict:
+        """
+        Returns admission counters.
+
+        Returns:
+            dict: Queue depth, active requests, admitted, rejected and expired requests,
+                average and maximum wait in seconds
+        """
+        return {
+            "queue_depth": self._waiting,
+            "active": self._active,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "avg_wait": round(self.wait_time / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait": round(self.max_wait, 4),
+        }
+
+    @asynccontextmanager
+    async def admit(self, deadline: float | None = None) -> AsyncIterator[None]:
+        """
+        Holds a concurrency slot for the duration of the block.
+
+        Args:
+            deadline (float | None): Event loop time after which a queued request is rejected
+
+        Raises:
+            AdmissionRejected: If the queue is full or the deadline passed while queued
+        """
+        await self._acquire(deadline)
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def _acquire(self, deadline: float | None) -> None:
+        """
+        Waits for a concurrency slot and a rate token.
+        """
+        if self._waiting >= self.max_queue and not self._has_capacity():
+            self.rejected += 1
+            raise AdmissionRejected(f"admission queue is full ({self.max_queue} waiting)")
+        self._waiting += 1
+        started_at = time.monotonic()
+        try:
+            async with asyncio.timeout_at(deadline):
+                if self._semaphore is not None:
+                    await self._semaphore.acquire()
+                try:
+                    await self._take_token()
+                except BaseException:
+                    if self._semaphore is not None:
+                        self._semaphore.release()
+                    raise
+        except TimeoutError:
+            self.expired += 1
+            raise AdmissionRejected(f"deadline reached after {time.monotonic() - started_at:.3f}s in admission queue")
+        finally:
+            self._waiting -= 1
+        wait = time.monotonic() - started_at
+        self.admitted += 1
+        self.wait_time += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def _has_capacity(self) -> bool:
+        """
+        Checks whether a request could start without waiting.
+        """
+        if self._semaphore is not None and self._semaphore.locked():
+            return False
+        if self.rate > 0:
+            self._refill()
+            return self._tokens >= 1
+        return True
+
+    async def _take_token(self) -> None:
+        """
+        Takes a token from the bucket, sleeping until one is refilled.
+        """
+        if self.rate <= 0:
+            return
+        async with self._bucket_lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._refilled_at) * self.rate, float(self.burst))
+        self._refilled_at = now
@@ -1,10 +1,12 @@
+import os
+
 import joblib
 
 from app.core.enums import ActionStatus, PipelineNames, RuleAction
 from app.models.pipeline import PipelineResult, TriggeredRuleData
 from app.modules.logger import pipeline_logger
 from app.pipelines.base import BasePipeline
-from app.utils import text_embedding
+from app.utils import async_text_embedding, async_text_embeddings
 from settings import get_settings
 
 settings = get_settings()
@@ -25,6 +27,7 @@ class MLPipeline(BasePipeline):
     """
 
     name = PipelineNames.ml
+    cost_tier = 1
 
     def __init__(self):
         """
@@ -34,6 +37,10 @@ class MLPipeline(BasePipeline):
         status depending on the success of model loading.
         """
         self.model_classifier = self._load_model()
+        self._version = f"{settings.EMBEDDINGS_MODEL}"
+        if settings.ML_MODEL_PATH and os.path.exists(settings.ML_MODEL_PATH):
+            stat = os.stat(settings.ML_MODEL_PATH)
+            self._version += f":{settings.ML_MODEL_PATH}:{stat.st_size}:{stat.st_mtime_ns}"
         if self.model_classifier:
             self.enabled = True
             pipeline_logger.info(f"[{self}] loaded successfully. Model path: {settings.ML_MODEL_PATH}")
@@ -43,6 +50,13 @@ class MLPipeline(BasePipeline):
     def __str__(self) -> str:
         return "ML Pipeline"
 
+    @property
+    def version(self) -> str:
+        """
+        Classifier file and embeddings model the predictions depend on.
+        """
+        return self._version
+
     def _load_model(self):
         """
         Loads machine learning model from file.
@@ -60,7 +74,7 @@ class MLPipeline(BasePipeline):
         except Exception as err:
             pipeline_logger.error(f"Error loading model, error={str(err)}")
 
-    def validate_prompt(self, prompt: str):
+    async def validate_prompt(self, prompt: str):
         """
         Validates prompt using ML model.
 
@@ -74,13 +88,13 @@ class MLPipeline(BasePipeline):
             Model classification result or None on embedding creation error
         """
         try:
-            if embedding := text_embedding(prompt):
+            if embedding := await async_text_embedding(prompt):
                 predict = self.model_classifier.predict(embedding)
                 return predict
         except Exception as err:
             pipeline_logger.warning(f"Error validating prompt, error={str(err)}")
 
-    async def run(self, prompt: str) -> PipelineResult:
+    async def run(self, prompt: str, **kwargs) -> PipelineResult:
         """
         Performs prompt analysis for malicious content.
 
@@ -90,17 +104,51 @@ class MLPipeline(BasePipeline):
 
         Args:
             prompt (str): Text prompt for analysis
+            **kwargs: Additional keyword arguments (unused)
 
         Returns:
             PipelineResult: Analysis result with list of triggered rules
         """
-        trigger_rules = []
         pipeline_logger.info(f"Analyzing for {self.name}")
-        if self.validate_prompt(prompt):
+        result = self._build_result(bool(await self.validate_prompt(prompt)))
+        pipeline_logger.info(f"Analyzing done for {self.name}")
+        return result
+
+    async def run_batch(self, prompts: list[str], **kwargs) -> list[PipelineResult]:
+        """
+        Analyzes several prompts with one embedding pass and one model prediction.
+
+        Args:
+            prompts (list[str]): Text prompts for analysis
+            **kwargs: Additional keyword arguments (unused)
+
+        Returns:
+            list[PipelineResult]: Analysis results in the order of prompts
+        """
+        pipeline_logger.info(f"Analyzing {len(prompts)} prompts for {self.name}")
+        try:
+            predictions = self.model_classifier.predict(await async_text_embeddings(prompts))
+        except Exception as err:
+            pipeline_logger.warning(f"Error validating prompts, error={str(err)}")
+            predictions = [None] * len(prompts)
+        return [self._build_result(bool(prediction)) for prediction in predictions]
+
+    def _build_result(self, malicious: bool) -> PipelineResult:
+        """
+        Creates the pipeline result of a model prediction.
+
+        Args:
+            malicious (bool): Whether the model classified the prompt as malicious
+
+        Returns:
+            PipelineResult: Analysis result with a blocking rule if the prompt is malicious
+        """
+        trigger_rules = []
+        if malicious:
             msg = "ML Pipeline detected malicious prompt"
             trigger_rules.append(
                 TriggeredRuleData(id=self.name, name=self.name, details=msg, action=RuleAction.BLOCK)
             )
             pipeline_logger.info(f"Analyzing for {self.name}, status: {ActionStatus.BLOCK}, details: {msg}")
-        pipeline_logger.info(f"Analyzing done for {self.name}")
-        return PipelineResult(name=str(self), triggered_rules=trigger_rules)
+        status = self._pipeline_status(trigger_rules)
+        return PipelineResult(name=str(self), triggered_rules=trigger_rules, status=status)
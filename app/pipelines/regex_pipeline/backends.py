@@ -0,0 +1,129 @@
+import re
+from abc import ABC, abstractmethod
+
+from app.core.enums import RegexBackend
+from app.modules.logger import pipeline_logger
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+
+class CompiledPattern(ABC):
+    """
+    Regex pattern compiled with one of the supported backends.
+
+    Attributes:
+        backend (RegexBackend): Backend the pattern was compiled with
+    """
+
+    backend: RegexBackend
+
+    @abstractmethod
+    def search(self, prompt: str, timeout: float | None = None) -> bool:
+        """
+        Checks whether the pattern matches anywhere in the prompt.
+
+        Args:
+            prompt (str): Text prompt to analyze
+            timeout (float | None): Time budget in seconds, enforced by backends that support it
+
+        Returns:
+            bool: True if the pattern matches
+
+        Raises:
+            TimeoutError: If the backend interrupted the search after the time budget
+        """
+        raise NotImplementedError
+
+
+class RePattern(CompiledPattern):
+    """
+    Pattern compiled with the standard `re` module. Searches cannot be interrupted
+    and hold the GIL until they finish.
+    """
+
+    backend = RegexBackend.RE
+
+    def __init__(self, body: str, flags: int) -> None:
+        self._pattern = re.compile(body, flags)
+
+    def search(self, prompt: str, timeout: float | None = None) -> bool:
+        return self._pattern.search(prompt) is not None
+
+
+class RegexModulePattern(CompiledPattern):
+    """
+    Pattern compiled with the `regex` module, which interrupts searches after a timeout
+    and releases the GIL while matching.
+    """
+
+    backend = RegexBackend.REGEX
+
+    def __init__(self, body: str, flags: int) -> None:
+        self._pattern = regex.compile(body, flags | regex.VERSION0)
+
+    def search(self, prompt: str, timeout: float | None = None) -> bool:
+        return self._pattern.search(prompt, concurrent=True, timeout=timeout) is not None
+
+
+class Re2Pattern(CompiledPattern):
+    """
+    Pattern compiled with RE2, which matches in linear time, releases the GIL
+    and needs no timeout.
+    """
+
+    backend = RegexBackend.RE2
+
+    def __init__(self, body: str, flags: int) -> None:
+        options = re2.Options()
+        options.dot_nl = bool(flags & re.DOTALL)
+        options.case_sensitive = not flags & re.IGNORECASE
+        options.log_errors = False
+        self._pattern = re2.compile(body, options)
+
+    def search(self, prompt: str, timeout: float | None = None) -> bool:
+        return self._pattern.search(prompt) is not None
+
+
+def compile_pattern(body: str, flags: int, backend: RegexBackend) -> CompiledPattern:
+    """
+    Compiles a pattern with the requested backend, falling back to `re`.
+
+    The fallback is used when the backend is not installed or does not support
+    a construct used by the pattern (e.g. backreferences and lookarounds in RE2).
+
+    Args:
+        body (str): Raw pattern
+        flags (int): `re` flags to compile the pattern with
+        backend (RegexBackend): Preferred backend
+
+    Returns:
+        CompiledPattern: Compiled pattern
+
+    Raises:
+        re.error: If the pattern is not a valid `re` pattern
+    """
+    if backend == RegexBackend.REGEX:
+        if regex is None:
+            pipeline_logger.warning("`regex` module is not installed, falling back to `re`")
+        else:
+            try:
+                return RegexModulePattern(body, flags)
+            except regex.error as err:
+                pipeline_logger.warning(f"Pattern is not supported by `regex`, falling back to `re`, error={err}")
+    elif backend == RegexBackend.RE2:
+        if re2 is None:
+            pipeline_logger.warning("`re2` module is not installed, falling back to `re`")
+        else:
+            try:
+                return Re2Pattern(body, flags)
+            except re2.error as err:
+                pipeline_logger.debug(f"Pattern is not supported by RE2, falling back to `re`, error={err}")
+    return RePattern(body, flags)
@@ -0,0 +1,207 @@
+import re
+import time
+from dataclasses import dataclass, field
+
+import ahocorasick
+
+from app.core.dataclasses import Rule
+from app.core.enums import RegexBackend, RuleAction
+from app.modules.logger import pipeline_logger
+from app.pipelines.regex_pipeline.backends import CompiledPattern, compile_pattern
+from app.pipelines.regex_pipeline.literals import fold_text, required_literals
+
+# Flags used both to validate rule patterns and to compile them for matching.
+# Case-insensitive matching is opted into per pattern with the inline (?i) flag.
+REGEX_FLAGS = re.DOTALL
+
+
+@dataclass
+class RuleGroup:
+    """
+    All patterns of a single rule, compiled once at load time.
+
+    Attributes:
+        id (str): Rule uuid
+        name (str): Rule name
+        details (str): Rule description
+        action (RuleAction): Action to take when any pattern matches
+        patterns (list[tuple[str, CompiledPattern]]): Raw and compiled patterns in file order
+    """
+
+    id: str
+    name: str
+    details: str
+    action: RuleAction
+    patterns: list[tuple[str, CompiledPattern]] = field(default_factory=list)
+
+
+@dataclass
+class MatchReport:
+    """
+    Outcome of matching a prompt against the rule engine.
+
+    Attributes:
+        matched (list[tuple[RuleGroup, str]]): Matched rules with the first pattern that matched
+        timed_out (list[RuleGroup]): Rules whose pattern exceeded the per-rule time budget
+        interrupted (list[RuleGroup]): Timed out rules whose pattern was stopped before it finished
+        budget_exhausted (bool): Whether evaluation stopped early on the per-request deadline
+    """
+
+    matched: list[tuple[RuleGroup, str]] = field(default_factory=list)
+    timed_out: list[RuleGroup] = field(default_factory=list)
+    interrupted: list[RuleGroup] = field(default_factory=list)
+    budget_exhausted: bool = False
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether every candidate rule was evaluated to the end or matched by another of its patterns.
+        """
+        matched_groups = {id(group) for group, _ in self.matched}
+        return not self.budget_exhausted and all(id(group) in matched_groups for group in self.interrupted)
+
+
+class RegexRuleEngine:
+    """
+    Compiled representation of regex rules used for matching prompts.
+
+    Patterns are compiled once with REGEX_FLAGS and grouped by rule, so a
+    rule stops being evaluated after its first matching pattern and the
+    `re` module cache is never consulted on the request path. Each rule is
+    compiled with its own backend (`detection.backend` in the rule file) or
+    the engine default, falling back to `re` for unsupported constructs.
+
+    Literals that every match of a pattern must contain are indexed in an
+    Aho-Corasick automaton. One pass over the prompt selects the candidate
+    patterns, and only those run their full regex. Patterns without an
+    extractable literal are always evaluated.
+
+    Attributes:
+        groups (list[RuleGroup]): Compiled rules in load order
+    """
+
+    def __init__(self, rules: list[Rule], default_backend: RegexBackend = RegexBackend.RE) -> None:
+        """
+        Builds the engine from loaded rules.
+
+        Args:
+            rules (list[Rule]): Rules with one pattern each, as loaded from YAML files
+            default_backend (RegexBackend): Backend for rules that do not select one
+        """
+        self.groups: list[RuleGroup] = []
+        groups_by_key: dict[tuple[str, str], RuleGroup] = {}
+        for rule in rules:
+            key = (rule.id, rule.name)
+            if (group := groups_by_key.get(key)) is None:
+                group = RuleGroup(id=rule.id, name=rule.name, details=rule.details, action=rule.action)
+                groups_by_key[key] = group
+                self.groups.append(group)
+            backend = self._rule_backend(rule, default_backend)
+            group.patterns.append((rule.body, compile_pattern(rule.body, REGEX_FLAGS, backend)))
+        self._build_prefilter()
+
+    def __len__(self) -> int:
+        return sum(len(group.patterns) for group in self.groups)
+
+    @staticmethod
+    def _rule_backend(rule: Rule, default_backend: RegexBackend) -> RegexBackend:
+        if not rule.backend:
+            return default_backend
+        try:
+            return RegexBackend(rule.backend)
+        except ValueError:
+            pipeline_logger.warning(f"Unknown regex backend, rule_id={rule.id}, backend={rule.backend}")
+            return default_backend
+
+    def _build_prefilter(self) -> None:
+        """
+        Indexes required literals of all patterns in an Aho-Corasick automaton.
+
+        Each literal maps to the (group index, pattern index) pairs that require it.
+        """
+        self._always_evaluated: set[tuple[int, int]] = set()
+        patterns_by_literal: dict[str, list[tuple[int, int]]] = {}
+        for group_index, group in enumerate(self.groups):
+            for pattern_index, (body, _) in enumerate(group.patterns):
+                key = (group_index, pattern_index)
+                if literals := required_literals(body, REGEX_FLAGS):
+                    for literal in literals:
+                        patterns_by_literal.setdefault(literal, []).append(key)
+                else:
+                    self._always_evaluated.add(key)
+
+        self._automaton = None
+        if patterns_by_literal:
+            self._automaton = ahocorasick.Automaton()
+            for literal, keys in patterns_by_literal.items():
+                self._automaton.add_word(literal, keys)
+            self._automaton.make_automaton()
+
+    @property
+    def prefiltered_patterns(self) -> int:
+        """
+        Number of patterns that are only evaluated when their literals are present.
+        """
+        return len(self) - len(self._always_evaluated)
+
+    def candidates(self, prompt: str) -> set[tuple[int, int]]:
+        """
+        Selects patterns that can possibly match the prompt.
+
+        Args:
+            prompt (str): Text prompt to analyze
+
+        Returns:
+            set[tuple[int, int]]: (group index, pattern index) pairs to evaluate
+        """
+        candidates = set(self._always_evaluated)
+        if self._automaton is not None:
+            for _, keys in self._automaton.iter(fold_text(prompt)):
+                candidates.update(keys)
+        return candidates
+
+    def match(
+        self, prompt: str, rule_timeout: float | None = None, deadline: float | None = None
+    ) -> MatchReport:
+        """
+        Finds rules with at least one pattern matching the prompt.
+
+        Patterns compiled with the `regex` backend are interrupted once they
+        exceed their budget. Other backends cannot be interrupted, so patterns
+        that overrun are only reported after they finish. No new pattern is
+        started once the deadline has passed.
+
+        Args:
+            prompt (str): Text prompt to analyze
+            rule_timeout (float | None): Time budget in seconds for a single pattern
+            deadline (float | None): time.monotonic() value after which evaluation stops
+
+        Returns:
+            MatchReport: Matched and timed out rules
+        """
+        report = MatchReport()
+        skipped_group_index = None
+        for group_index, pattern_index in sorted(self.candidates(prompt)):
+            if group_index == skipped_group_index:
+                continue
+            timeout = rule_timeout
+            started = time.monotonic()
+            if deadline is not None:
+                if started >= deadline:
+                    report.budget_exhausted = True
+                    break
+                timeout = deadline - started if timeout is None else min(timeout, deadline - started)
+            group = self.groups[group_index]
+            body, compiled = group.patterns[pattern_index]
+            try:
+                found = compiled.search(prompt, timeout=timeout)
+            except TimeoutError:
+                report.timed_out.append(group)
+                report.interrupted.append(group)
+                continue
+            if rule_timeout is not None and time.monotonic() - started > rule_timeout:
+                report.timed_out.append(group)
+            if found:
+                report.matched.append((group, body))
+                skipped_group_index = group_index
+        return report
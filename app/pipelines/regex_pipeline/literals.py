@@ -0,0 +1,112 @@
+from re import _parser as sre_parse
+
+MIN_LITERAL_LENGTH = 3
+_MAX_RUN_VARIANTS = 16
+
+# re.IGNORECASE matches ASCII "i" against dotless "ı" and dotted "İ", which
+# str.casefold maps to "ı" and "i̇" respectively, so both are folded to "i".
+_FOLD_TABLE = {0x131: "i", 0x307: None}
+
+_REPEAT_OPCODES = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, sre_parse.POSSESSIVE_REPEAT}
+
+
+def fold_text(text: str) -> str:
+    """
+    Folds text for case-insensitive literal lookup.
+
+    Applied both to extracted literals and to prompts, so a literal required by
+    a pattern is found in the folded prompt regardless of the pattern's flags.
+
+    Args:
+        text (str): Text to fold
+
+    Returns:
+        str: Case-folded text
+    """
+    return text.casefold().translate(_FOLD_TABLE)
+
+
+def required_literals(pattern: str, flags: int = 0) -> set[str] | None:
+    """
+    Extracts literal substrings of which every match of the pattern contains at least one.
+
+    Walks the parsed pattern looking for runs of ASCII literals that are
+    mandatory, expanding small character classes such as [vc] and following
+    non-optional groups, repeats and alternations (one literal per branch).
+    Among the candidates, the set whose shortest literal is longest is chosen.
+
+    Args:
+        pattern (str): Regex pattern
+        flags (int): Flags the pattern is compiled with
+
+    Returns:
+        set[str] | None: Folded literals, or None if no literal of at least
+            MIN_LITERAL_LENGTH characters is required and the pattern must always run
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    literals = _sequence_literals(parsed)
+    if not literals or min(len(literal) for literal in literals) < MIN_LITERAL_LENGTH:
+        return None
+    return literals
+
+
+def _sequence_literals(items) -> set[str] | None:
+    best = None
+    run = [""]
+
+    def consider(candidate: set[str] | None) -> None:
+        nonlocal best
+        if candidate and (best is None or _score(candidate) > _score(best)):
+            best = candidate
+
+    for opcode, value in items:
+        if opcode is sre_parse.AT:
+            # Zero-width assertions do not break a run of literals
+            continue
+        if chars := _literal_chars(opcode, value):
+            if len(run) * len(chars) <= _MAX_RUN_VARIANTS:
+                run = [prefix + char for prefix in run for char in chars]
+                continue
+        if run[0]:
+            consider({fold_text(variant) for variant in run})
+        run = [""]
+        consider(_item_literals(opcode, value))
+    if run[0]:
+        consider({fold_text(variant) for variant in run})
+    return best
+
+
+def _literal_chars(opcode, value) -> list[str] | None:
+    """
+    Returns the ASCII characters a single-character item can match, e.g. "a" or "[dD]".
+    """
+    if opcode is sre_parse.LITERAL:
+        return [chr(value)] if value < 128 else None
+    if opcode is sre_parse.IN and all(item_opcode is sre_parse.LITERAL and item < 128 for item_opcode, item in value):
+        return [chr(item) for _, item in value]
+    return None
+
+
+def _item_literals(opcode, value) -> set[str] | None:
+    if opcode is sre_parse.SUBPATTERN:
+        return _sequence_literals(value[-1])
+    if opcode in _REPEAT_OPCODES:
+        min_count, _, item = value
+        return _sequence_literals(item) if min_count >= 1 else None
+    if opcode is sre_parse.BRANCH:
+        literals = set()
+        for branch in value[1]:
+            if not (branch_literals := _sequence_literals(branch)):
+                return None
+            literals |= branch_literals
+        return literals
+    if opcode is getattr(sre_parse, "ATOMIC_GROUP", None):
+        return _sequence_literals(value)
+    return None
+
+
+def _score(literals: set[str]) -> int:
+    return min(len(literal) for literal in literals)
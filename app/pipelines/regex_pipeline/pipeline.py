@@ -1,11 +1,19 @@
+import asyncio
 import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from app.core.enums import PipelineNames
+from app.core.enums import ActionStatus, PipelineNames, RegexBackend
 from app.core.exceptions import ValidationException
 from app.models.pipeline import PipelineResult, TriggeredRuleData
 from app.modules.logger import pipeline_logger
 from app.pipelines.base import BaseRulesPipeline
+from app.pipelines.regex_pipeline.engine import REGEX_FLAGS, MatchReport, RegexRuleEngine
+from settings import get_settings
+
+settings = get_settings()
 
 
 class RegexPipeline(BaseRulesPipeline):
@@ -14,16 +22,53 @@ class RegexPipeline(BaseRulesPipeline):
 
     This pipeline uses regular expressions to detect specific patterns in text
     prompts. It loads rules from YAML files and applies regex patterns to
-    identify potentially malicious or sensitive content. The pipeline supports
-    case-insensitive matching and dot-all mode for comprehensive pattern detection.
+    identify potentially malicious or sensitive content. Patterns are matched in
+    dot-all mode; case-insensitive matching is enabled per pattern with (?i).
+
+    When REGEX_RULE_TIMEOUT or REGEX_REQUEST_TIMEOUT is set, or the caller
+    passes a deadline, matching runs in a worker thread off the event loop
+    under those time budgets, and rules that exceed them are counted and
+    logged. Budgets are enforced while a pattern runs only by the `regex` and
+    `re2` backends; `re` holds the GIL and its overruns are reported once the
+    pattern finishes. A prompt whose rules were not all evaluated in time is
+    reported with status ERROR unless a matched rule blocks it.
 
     Attributes:
         name (PipelineNames): Pipeline name (regex)
+        rule_timeouts (Counter[str]): Number of budget overruns per rule id
+        request_budget_exhaustions (int): Number of requests that ran out of the request budget
         _rules (list): List of loaded regex rules for analysis
+        _engine (RegexRuleEngine): Rules compiled once at load time
+        _executor (ThreadPoolExecutor): Worker threads for budgeted evaluation
     """
 
     name = PipelineNames.regex
+    cost_tier = 0
     _rules_dir_path = str(Path(__file__).parent / "rules")
+    _engine: RegexRuleEngine
+
+    def __init__(self) -> None:
+        self.rule_timeouts: Counter[str] = Counter()
+        self.request_budget_exhaustions = 0
+        self._budgeted = bool(settings.REGEX_RULE_TIMEOUT or settings.REGEX_REQUEST_TIMEOUT)
+        self._executor = ThreadPoolExecutor(max_workers=settings.REGEX_MAX_WORKERS, thread_name_prefix="regex")
+        super().__init__()
+
+    def _compile_rules(self) -> None:
+        """
+        Compiles loaded rules into a regex rule engine.
+        """
+        try:
+            default_backend = RegexBackend(settings.REGEX_BACKEND)
+        except ValueError:
+            pipeline_logger.warning(f"[{self}] Unknown REGEX_BACKEND={settings.REGEX_BACKEND}, using `re`")
+            default_backend = RegexBackend.RE
+        if self._budgeted and default_backend == RegexBackend.RE:
+            pipeline_logger.warning(
+                f"[{self}] Regex time budgets are set with REGEX_BACKEND=re, "
+                "use `regex` or `re2` to interrupt slow rules"
+            )
+        self._engine = RegexRuleEngine(self._rules, default_backend=default_backend)
 
     def _validate_rule_dict(self, rule_dict: dict, file_path: str) -> None:
         """
@@ -42,7 +87,7 @@ class RegexPipeline(BaseRulesPipeline):
         super()._validate_rule_dict(rule_dict, file_path)
         try:
             for pattern in rule_dict["detection"]["pattern"]:
-                re.compile(pattern, re.IGNORECASE | re.DOTALL)
+                re.compile(pattern, REGEX_FLAGS)
         except re.error:
             pipeline_logger.warning(f"Invalid regex pattern, rule_id={rule_dict['uuid']}")
             raise ValidationException()
@@ -51,27 +96,177 @@ class RegexPipeline(BaseRulesPipeline):
         """
         Analyzes prompt using regex patterns from loaded rules.
 
-        Applies all loaded regex patterns to the input prompt and creates
-        triggered rules for any matches found. Uses case-insensitive and
-        dot-all matching for comprehensive pattern detection.
+        Matches the prompt against the compiled rule engine and creates
+        one triggered rule per matched rule, with the pattern that matched.
 
         Args:
             prompt (str): Text prompt to analyze for patterns
-            **kwargs: Additional keyword arguments (unused)
+            **kwargs: Additional keyword arguments, including 'deadline' (event loop time)
+                after which no more rules are evaluated
 
         Returns:
             PipelineResult: Analysis result with triggered rules and status
         """
-        triggered_rules = []
         pipeline_logger.info(f"Analyzing for {len(self._rules)} rules")
-        for rule in self._rules:
-            if re.search(rule.body, prompt):
-                triggered_rules.append(
-                    TriggeredRuleData(
-                        id=rule.id, name=rule.name, details=rule.details, body=rule.body, action=rule.action
-                    )
-                )
-        pipeline_logger.info(f"Found {len(triggered_rules)} triggered rules")
+        if self._budgeted or kwargs.get("deadline") is not None:
+            report = await self._match_with_budget(prompt, kwargs.get("deadline"))
+        else:
+            report = self._engine.match(prompt)
+        result = self._build_result(report)
+        pipeline_logger.info(f"Found {len(result.triggered_rules)} triggered rules")
+        pipeline_logger.info(f"Analyzing for {len(self._rules)} rules, status: {result.status}")
+        return result
+
+    async def run_batch(self, prompts: list[str], **kwargs) -> list[PipelineResult]:
+        """
+        Analyzes several prompts with one engine pass per prompt.
+
+        With REGEX_* time budgets each prompt is matched in a worker thread
+        under its own budget, which starts when a worker picks the prompt up.
+        Otherwise all prompts are matched in one worker thread, so the batch
+        never blocks the event loop. Either way no rules are started after
+        the batch deadline, and prompts not fully evaluated by then are
+        reported with status ERROR.
+
+        Args:
+            prompts (list[str]): Text prompts to analyze
+            **kwargs: Additional keyword arguments, including 'deadline' (event loop time)
+                after which no more rules are evaluated
+
+        Returns:
+            list[PipelineResult]: Analysis results in the order of prompts
+        """
+        deadline = kwargs.get("deadline")
+        if self._budgeted:
+            reports = await asyncio.gather(*[self._match_with_budget(prompt, deadline) for prompt in prompts])
+        else:
+            reports = await self._match_all(prompts, deadline)
+        results = [self._build_result(report) for report in reports]
+        triggered = sum(1 for result in results if result.triggered_rules)
+        pipeline_logger.info(f"Analyzed {len(prompts)} prompts for {len(self._rules)} rules, triggered: {triggered}")
+        return results
+
+    def _build_result(self, report: MatchReport) -> PipelineResult:
+        """
+        Creates the pipeline result of a match report, one triggered rule per matched rule.
+
+        A prompt that was not evaluated against every rule is never allowed:
+        unless a rule that did match blocks it, the result has status ERROR
+        and the fail mode of the flow decides the outcome.
+
+        Args:
+            report (MatchReport): Result of matching a prompt
+
+        Returns:
+            PipelineResult: Analysis result with triggered rules and status
+        """
+        self._record_timeouts(report)
+        triggered_rules = [
+            TriggeredRuleData(id=rule.id, name=rule.name, details=rule.details, body=body, action=rule.action)
+            for rule, body in report.matched
+        ]
         status = self._pipeline_status(triggered_rules)
-        pipeline_logger.info(f"Analyzing for {len(self._rules)} rules, status: {status}")
-        return PipelineResult(name=str(self), triggered_rules=triggered_rules, status=status)
+        if report.complete or status == ActionStatus.BLOCK:
+            return PipelineResult(name=str(self), triggered_rules=triggered_rules, status=status)
+        reason = "regex time budget exhausted" if report.budget_exhausted else "regex rule interrupted by time budget"
+        return PipelineResult(name=str(self), triggered_rules=triggered_rules, status=ActionStatus.ERROR, reason=reason)
+
+    async def _match_with_budget(self, prompt: str, deadline: float | None = None) -> MatchReport:
+        """
+        Matches the prompt in a worker thread under the configured time budgets and the caller's deadline.
+
+        REGEX_REQUEST_TIMEOUT starts when a worker picks the prompt up, so
+        time spent queued behind other prompts does not count against it.
+        The worker stops starting new patterns once the budget or the
+        deadline has passed. If the prompt is still queued or busy with a
+        single pattern at the deadline, the request stops waiting for it.
+
+        Args:
+            prompt (str): Text prompt to analyze
+            deadline (float | None): Event loop time after which no more rules are evaluated
+
+        Returns:
+            MatchReport: Matched and timed out rules, budget exhausted if the deadline passed first
+        """
+        loop = asyncio.get_running_loop()
+        engine_deadline = self._engine_deadline(deadline)
+        future = loop.run_in_executor(self._executor, self._match_in_worker, prompt, engine_deadline)
+        try:
+            async with asyncio.timeout_at(deadline):
+                return await future
+        except TimeoutError:
+            return MatchReport(budget_exhausted=True)
+
+    def _match_in_worker(self, prompt: str, deadline: float | None) -> MatchReport:
+        """
+        Matches the prompt in a worker thread, starting the request budget now.
+
+        Args:
+            prompt (str): Text prompt to analyze
+            deadline (float | None): time.monotonic() value of the caller's deadline
+
+        Returns:
+            MatchReport: Matched and timed out rules
+        """
+        deadlines = [limit for limit in (deadline,) if limit is not None]
+        if settings.REGEX_REQUEST_TIMEOUT:
+            deadlines.append(time.monotonic() + settings.REGEX_REQUEST_TIMEOUT)
+        return self._engine.match(
+            prompt, rule_timeout=settings.REGEX_RULE_TIMEOUT, deadline=min(deadlines) if deadlines else None
+        )
+
+    async def _match_all(self, prompts: list[str], deadline: float | None) -> list[MatchReport]:
+        """
+        Matches several prompts one after another in a worker thread.
+
+        Args:
+            prompts (list[str]): Text prompts to analyze
+            deadline (float | None): Event loop time after which no more rules are evaluated
+
+        Returns:
+            list[MatchReport]: Reports in the order of prompts, budget exhausted for prompts not matched in time
+        """
+        engine_deadline = self._engine_deadline(deadline)
+        reports: list[MatchReport] = []
+
+        def match_all() -> None:
+            for prompt in prompts:
+                reports.append(self._engine.match(prompt, deadline=engine_deadline))
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, match_all)
+        try:
+            async with asyncio.timeout_at(deadline):
+                await future
+        except TimeoutError:
+            pass
+        matched = reports[: len(prompts)]
+        return matched + [MatchReport(budget_exhausted=True) for _ in prompts[len(matched) :]]
+
+    @staticmethod
+    def _engine_deadline(deadline: float | None) -> float | None:
+        """
+        Converts an event loop deadline to the time.monotonic() clock used by worker threads.
+        """
+        if deadline is None:
+            return None
+        return time.monotonic() + max(deadline - asyncio.get_running_loop().time(), 0.0)
+
+    def _record_timeouts(self, report: MatchReport) -> None:
+        """
+        Updates timeout counters and logs rules that exceeded their time budget.
+
+        Args:
+            report (MatchReport): Result of matching a prompt
+        """
+        for rule in report.timed_out:
+            self.rule_timeouts[rule.id] += 1
+            pipeline_logger.warning(
+                f"[{self}] Rule exceeded time budget, rule_id={rule.id}, name={rule.name}, "
+                f"timeouts={self.rule_timeouts[rule.id]}"
+            )
+        if report.budget_exhausted:
+            self.request_budget_exhaustions += 1
+            pipeline_logger.warning(
+                f"[{self}] Request time budget exhausted, some rules were not evaluated, "
+                f"total={self.request_budget_exhaustions}"
+            )
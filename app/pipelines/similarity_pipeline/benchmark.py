@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.pipelines.similarity_pipeline.vector_store import (  # noqa: E402
+    LocalVectorStore,
+    OpenSearchVectorStore,
+    VectorStore,
+    build_local_index,
+    hnswlib,
+)
+from settings import get_settings  # noqa: E402
+
+settings = get_settings()
+
+
+def random_vectors(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Generates normalized random vectors standing in for embeddings.
+    """
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def measure(store: VectorStore, queries: list[list[float]], number: int) -> float:
+    """
+    Returns the mean latency of one batched search in seconds.
+    """
+    await store.search_batch(queries)
+    started = time.perf_counter()
+    for _ in range(number):
+        await store.search_batch(queries)
+    return (time.perf_counter() - started) / number
+
+
+async def main() -> None:
+    """
+    Compares exhaustive and HNSW local search with OpenSearch on a synthetic corpus.
+
+    OpenSearch is measured against the configured similarity index when
+    SIMILARITY_BACKEND is opensearch and OS settings are provided, so its
+    corpus is whatever that index holds.
+    """
+    parser = argparse.ArgumentParser(description="Similarity vector store microbenchmark")
+    parser.add_argument("--corpus", type=int, default=10000, help="Number of synthetic vectors in the local index")
+    parser.add_argument("--dim", type=int, default=768, help="Vector dimension")
+    parser.add_argument("--sentences", type=int, default=20, help="Query vectors per search, like sentences per prompt")
+    parser.add_argument("--number", type=int, default=50, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = random_vectors(args.corpus, args.dim, rng)
+    documents = [{"id": str(i), "category": f"category-{i % 50}", "details": "", "text": ""} for i in range(args.corpus)]
+    queries = random_vectors(args.sentences, args.dim, rng).tolist()
+
+    stores: dict[str, VectorStore] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        build_local_index(Path(tmp) / "exhaustive", documents, corpus, hnsw_min_size=args.corpus + 1)
+        stores["local exhaustive"] = LocalVectorStore(Path(tmp) / "exhaustive")
+        if hnswlib is not None:
+            build_local_index(Path(tmp) / "hnsw", documents, corpus, hnsw_min_size=0)
+            stores["local hnsw"] = LocalVectorStore(Path(tmp) / "hnsw")
+        if settings.OS and settings.SIMILARITY_BACKEND == "opensearch":
+            from app.modules.opensearch import os_client
+
+            await os_client.check_connection()
+            opensearch = OpenSearchVectorStore(
+                os_client,
+                chunk_size=settings.SIMILARITY_MSEARCH_CHUNK_SIZE,
+                concurrency=settings.SIMILARITY_MSEARCH_CONCURRENCY,
+            )
+            if opensearch.ready and os_client.vector_dimension == args.dim:
+                stores["opensearch"] = opensearch
+
+        print(f"corpus={args.corpus} dim={args.dim} sentences={args.sentences}")
+        print(f"{'backend':<18}{'per search, ms':>16}{'per sentence, us':>18}")
+        for label, store in stores.items():
+            latency = await measure(store, queries, args.number)
+            print(f"{label:<18}{latency * 1e3:>16.2f}{latency / args.sentences * 1e6:>18.1f}")
+        if "opensearch" in stores:
+            await os_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
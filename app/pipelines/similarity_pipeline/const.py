@@ -119,7 +119,7 @@ INDEX_MAPPING = {
                 "method": {"name": "hnsw", "engine": "lucene", "space_type": "cosinesimil"},
             },
             "id": {"type": "keyword"},
-            "category": {"type": "text"},
+            "category": {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
             "details": {"type": "text"},
             "text": {"type": "text"},
         }
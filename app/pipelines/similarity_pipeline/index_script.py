@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import sys
 from dataclasses import asdict
@@ -10,6 +11,7 @@ sys.path.insert(0, str(project_root))
 from app.modules.logger import pipeline_logger  # noqa: E402
 from app.modules.opensearch import os_client  # noqa: E402
 from app.pipelines.similarity_pipeline.const import INDEX_MAPPING, PROMPTS_EXAMPLES  # noqa: E402
+from app.pipelines.similarity_pipeline.vector_store import build_local_index  # noqa: E402
 from settings import get_settings  # noqa: E402
 from app.utils import text_embedding  # noqa: E402
 
@@ -83,6 +85,27 @@ async def check_index_exists() -> bool:
         return False
 
 
+def create_local_index() -> bool:
+    """
+    Build the in-process vector index from example prompts.
+
+    Returns:
+        bool: True if the index was written successfully, False otherwise
+    """
+    try:
+        docs = [asdict(doc) for doc in PROMPTS_EXAMPLES]
+        vectors = [text_embedding(doc["text"]) for doc in docs]
+        build_local_index(
+            settings.SIMILARITY_LOCAL_INDEX_PATH, docs, vectors, hnsw_min_size=settings.SIMILARITY_LOCAL_HNSW_MIN_SIZE
+        )
+        pipeline_logger.info(f"Wrote {len(docs)} example prompts to {settings.SIMILARITY_LOCAL_INDEX_PATH}")
+        return True
+
+    except Exception as e:
+        pipeline_logger.error(f"Error building local index: {e}")
+        return False
+
+
 async def main():
     """
     Main function to create index and upload example prompts.
@@ -109,4 +132,14 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Build the similarity pipeline index")
+    parser.add_argument(
+        "--backend",
+        choices=["opensearch", "local"],
+        default=settings.SIMILARITY_BACKEND,
+        help="Index to build, SIMILARITY_BACKEND by default",
+    )
+    if parser.parse_args().backend == "local":
+        create_local_index()
+    else:
+        asyncio.run(main())
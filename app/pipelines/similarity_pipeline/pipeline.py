@@ -1,12 +1,10 @@
-import asyncio
-
 from app.core.enums import PipelineNames, RuleAction
 from app.models.pipeline import PipelineResult, TriggeredRuleData
 from app.modules.logger import pipeline_logger
-from app.modules.opensearch import os_client
 from app.pipelines.base import BasePipeline
 from app.pipelines.similarity_pipeline.utils import split_text_into_sentences
-from app.utils import text_embedding
+from app.pipelines.similarity_pipeline.vector_store import OpenSearchVectorStore, VectorStore, create_vector_store
+from app.utils import async_text_embeddings
 from settings import get_settings
 
 settings = get_settings()
@@ -16,31 +14,51 @@ class SimilarityPipeline(BasePipeline):
     """
     Similarity-based pipeline for detecting similar content using vector embeddings.
 
-    This pipeline uses vector embeddings and OpenSearch to find similar documents
+    This pipeline uses vector embeddings and a vector store (OpenSearch or an
+    in-process index, see SIMILARITY_BACKEND) to find similar documents
     in a knowledge base. It splits prompts into sentences, converts them to
     embeddings, and searches for similar content using cosine similarity.
     Results are deduplicated and scored based on similarity thresholds.
 
     Attributes:
         name (PipelineNames): Pipeline name (similarity)
-        enabled (bool): Whether pipeline is active (depends on OpenSearch settings)
+        enabled (bool): Whether pipeline is active (depends on the vector store)
+        _store (VectorStore): Vector store searched for similar documents
     """
 
     name = PipelineNames.similarity
+    cost_tier = 1
+    _store: VectorStore
 
     def __init__(self):
         super().__init__()
-        if not hasattr(os_client, "client") or os_client.client is None:
-            pipeline_logger.warning(f"[{self}] OpenSearch client is not initialized")
-            return
-        elif not settings.OS:
-            pipeline_logger.warning(f"[{self}] OpenSearch settings are not specified in environment variables")
-            return
-        if settings.OS and os_client.client:
+        self._store = create_vector_store()
+        if isinstance(self._store, OpenSearchVectorStore):
+            if not settings.OS:
+                pipeline_logger.warning(f"[{self}] OpenSearch settings are not specified in environment variables")
+                return
+            if not self._store.ready:
+                pipeline_logger.warning(f"[{self}] OpenSearch client is not initialized")
+                return
             self.enabled = True
             pipeline_logger.info(f"[{self}] loaded successfully. OpenSearch: {settings.OS.host}")
+        elif self._store.ready:
+            self.enabled = True
+            pipeline_logger.info(f"[{self}] loaded successfully. Local index: {settings.SIMILARITY_LOCAL_INDEX_PATH}")
         else:
-            pipeline_logger.warning(f"[{self}] failed to load OpenSearch client. OpenSearch: {settings.OS.host}")
+            pipeline_logger.warning(
+                f"[{self}] failed to load local index: {settings.SIMILARITY_LOCAL_INDEX_PATH}"
+            )
+
+    @property
+    def version(self) -> str:
+        """
+        Embeddings model, thresholds and version of the vector store content.
+        """
+        return (
+            f"{settings.EMBEDDINGS_MODEL}:{settings.SIMILARITY_NOTIFY_THRESHOLD}:{settings.SIMILARITY_BLOCK_THRESHOLD}:"
+            f"{self._store.backend.value}:{self._store.version}"
+        )
 
     def __split_prompt_into_sentences(self, prompt: str) -> list[str]:
         """
@@ -54,22 +72,34 @@ class SimilarityPipeline(BasePipeline):
         """
         return split_text_into_sentences(prompt)
 
-    async def __search_similar_documents(self, chunk: str) -> list[dict]:
+    async def __search_similar_documents(self, chunks: list[str]) -> list[dict]:
         """
         Search for similar documents using vector embeddings.
 
-        Converts text chunk to vector embedding and searches OpenSearch
-        for similar documents. Filters results by similarity threshold
-        and formats them for further processing.
+        Converts all text chunks to vector embeddings in one batched call and
+        searches the vector store for similar documents in one batch.
+        Filters results by similarity threshold and formats them for further processing.
 
         Args:
-            chunk (str): Text chunk to search for similar content
+            chunks (list[str]): Text chunks to search for similar content
 
         Returns:
             list[dict]: List of similar documents with metadata and scores
         """
-        vector = text_embedding(chunk)
-        similar_documents = await os_client.search_similar_documents(vector)
+        vectors = await async_text_embeddings(chunks)
+        results = await self._store.search_batch(vectors)
+        return [doc for similar_documents in results for doc in self.__filter_similar_documents(similar_documents)]
+
+    def __filter_similar_documents(self, similar_documents: list[dict]) -> list[dict]:
+        """
+        Filters search hits of one chunk by similarity threshold and formats them.
+
+        Args:
+            similar_documents (list[dict]): Search hits of one chunk
+
+        Returns:
+            list[dict]: Similar documents with metadata and scores
+        """
         return [
             {
                 "action": self._get_action(doc["_score"]),
@@ -112,8 +142,8 @@ class SimilarityPipeline(BasePipeline):
         """
         Analyzes prompt for similar content using vector similarity search.
 
-        Splits the prompt into sentences, processes them in batches,
-        and searches for similar documents using vector embeddings.
+        Splits the prompt into sentences, embeds them in one batch and
+        searches the vector store for similar documents.
         Returns analysis results with triggered rules for similar content.
 
         Args:
@@ -123,23 +153,46 @@ class SimilarityPipeline(BasePipeline):
         Returns:
             PipelineResult: Analysis result with triggered rules and status
         """
-        similar_documents = []
         chunks = self.__split_prompt_into_sentences(prompt)
         pipeline_logger.info(f"Analyzing for {len(chunks)} sentences")
-
-        batch_size = 5
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i : i + batch_size]
-            tasks = [self.__search_similar_documents(chunk) for chunk in batch]
-            batch_results = await asyncio.gather(*tasks)
-            for result in batch_results:
-                similar_documents.extend(result)
+        similar_documents = await self.__search_similar_documents(chunks) if chunks else []
         triggered_rules = await self.__prepare_triggered_rules(similar_documents)
         pipeline_logger.info(f"Found {len(triggered_rules)} similar documents")
         return PipelineResult(
             name=str(self), status=self._pipeline_status(triggered_rules), triggered_rules=triggered_rules
         )
 
+    async def run_batch(self, prompts: list[str], **kwargs) -> list[PipelineResult]:
+        """
+        Analyzes several prompts with one embedding pass and one vector store search.
+
+        Sentences of all prompts are embedded together and searched in one
+        batch, then the hits are assigned back to their prompts.
+
+        Args:
+            prompts (list[str]): Text prompts to analyze
+            **kwargs: Additional keyword arguments (unused)
+
+        Returns:
+            list[PipelineResult]: Analysis results in the order of prompts
+        """
+        chunks_per_prompt = [self.__split_prompt_into_sentences(prompt) for prompt in prompts]
+        chunks = [chunk for prompt_chunks in chunks_per_prompt for chunk in prompt_chunks]
+        pipeline_logger.info(f"Analyzing {len(prompts)} prompts, {len(chunks)} sentences")
+        hits = await self._store.search_batch(await async_text_embeddings(chunks)) if chunks else []
+        results, offset = [], 0
+        for prompt_chunks in chunks_per_prompt:
+            prompt_hits = hits[offset : offset + len(prompt_chunks)]
+            offset += len(prompt_chunks)
+            similar_documents = [doc for docs in prompt_hits for doc in self.__filter_similar_documents(docs)]
+            triggered_rules = await self.__prepare_triggered_rules(similar_documents)
+            results.append(
+                PipelineResult(
+                    name=str(self), status=self._pipeline_status(triggered_rules), triggered_rules=triggered_rules
+                )
+            )
+        return results
+
     @staticmethod
     def _get_action(score: float) -> RuleAction:
         """
@@ -0,0 +1,279 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+from app.core.enums import SimilarityBackend
+from app.modules.logger import pipeline_logger
+from app.modules.opensearch import AsyncOpenSearchClient, os_client
+from settings import get_settings
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+settings = get_settings()
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.json"
+HNSW_FILE = "hnsw.bin"
+SOURCE_FIELDS = ("id", "category", "details", "text")
+
+
+class VectorStore(ABC):
+    """
+    Store of known harmful prompts searched by vector similarity.
+
+    Searches return hits in the OpenSearch format (`_score` and `_source`),
+    at most one per category, so the similarity pipeline does not depend on
+    the backend.
+
+    Attributes:
+        backend (SimilarityBackend): Backend name
+    """
+
+    backend: SimilarityBackend
+
+    @property
+    @abstractmethod
+    def ready(self) -> bool:
+        """
+        Whether the store can serve searches.
+        """
+        raise NotImplementedError
+
+    @property
+    def version(self) -> str:
+        """
+        Version of the stored documents, changes when the index content changes.
+        """
+        return ""
+
+    @abstractmethod
+    async def search_batch(self, vectors: list[list[float]]) -> list[list[dict]]:
+        """
+        Searches similar documents for several vectors.
+
+        Args:
+            vectors (list[list[float]]): Normalized query vectors
+
+        Returns:
+            list[list[dict]]: Hits for each vector, in the order of vectors
+        """
+        raise NotImplementedError
+
+
+class OpenSearchVectorStore(VectorStore):
+    """
+    Vector store backed by the OpenSearch similarity index.
+    """
+
+    backend = SimilarityBackend.OPENSEARCH
+
+    def __init__(self, client: AsyncOpenSearchClient | None, chunk_size: int = 50, concurrency: int = 4) -> None:
+        """
+        Args:
+            client (AsyncOpenSearchClient | None): OpenSearch client, None if OpenSearch is not configured
+            chunk_size (int): Maximum number of queries per multi-search request
+            concurrency (int): Maximum number of concurrent multi-search requests
+        """
+        self._client = client
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    @property
+    def ready(self) -> bool:
+        return self._client is not None and self._client.client is not None
+
+    @property
+    def version(self) -> str:
+        if self._client is None:
+            return ""
+        return f"{self._client.similarity_prompt_index}:{self._client.index_version}"
+
+    async def search_batch(self, vectors: list[list[float]]) -> list[list[dict]]:
+        return await self._client.search_similar_documents_batch(
+            vectors, chunk_size=self.chunk_size, concurrency=self.concurrency
+        )
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store loaded from files built by `index_script.py --backend local`.
+
+    Vectors are a memory-mapped float32 matrix of normalized embeddings and
+    are searched with one matrix multiplication per batch. If the index
+    directory holds an HNSW graph and `hnswlib` is installed, the graph is
+    searched instead. Scores use the OpenSearch `cosinesimil` scale,
+    (1 + cosine) / 2, so similarity thresholds mean the same for both backends.
+    Searches run in a worker thread, so page faults on the memory-mapped
+    matrix and the search itself do not block the event loop.
+
+    Attributes:
+        path (Path): Index directory
+        size (int): Number of hits considered per query before category deduplication
+        min_score (float | None): Hits scoring below it are dropped
+    """
+
+    backend = SimilarityBackend.LOCAL
+
+    def __init__(self, path: str | Path, size: int = 5, min_score: float | None = None) -> None:
+        """
+        Loads the index from disk. Logs an error and stays not ready if the files are missing.
+
+        Args:
+            path (str | Path): Index directory
+            size (int): Number of hits considered per query
+            min_score (float | None): Hits scoring below it are dropped
+        """
+        self.path = Path(path)
+        self.size = size
+        self.min_score = min_score
+        self._vectors = None
+        self._documents: list[dict] = []
+        self._hnsw = None
+        self._version = ""
+        try:
+            self._load()
+        except Exception as e:
+            pipeline_logger.error(f"Failed to load local vector index from {self.path}: {e}")
+            self._vectors = None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def ready(self) -> bool:
+        return self._vectors is not None and len(self) > 0
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def _load(self) -> None:
+        self._vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        with open(self.path / DOCUMENTS_FILE, encoding="utf-8") as f:
+            self._documents = json.load(f)
+        if len(self._documents) != len(self._vectors):
+            raise ValueError(f"{len(self._vectors)} vectors do not match {len(self._documents)} documents")
+        hnsw_path = self.path / HNSW_FILE
+        files = [self.path / VECTORS_FILE, self.path / DOCUMENTS_FILE, hnsw_path]
+        self._version = ":".join(
+            f"{path.stat().st_size}-{path.stat().st_mtime_ns}" for path in files if path.exists()
+        )
+        if hnsw_path.exists():
+            if hnswlib is None:
+                pipeline_logger.warning("`hnswlib` is not installed, searching the local vector index exhaustively")
+            else:
+                self._hnsw = hnswlib.Index(space="ip", dim=self._vectors.shape[1])
+                self._hnsw.load_index(str(hnsw_path), max_elements=len(self._vectors))
+                self._hnsw.set_ef(max(64, self.size * 4))
+        pipeline_logger.info(
+            f"Loaded local vector index: {len(self)} vectors, {'hnsw' if self._hnsw else 'exhaustive'} search"
+        )
+
+    async def search_batch(self, vectors: list[list[float]]) -> list[list[dict]]:
+        if not vectors:
+            return []
+        return await asyncio.to_thread(self._search, vectors)
+
+    def _search(self, vectors: list[list[float]]) -> list[list[dict]]:
+        """
+        Searches the hits of several query vectors, blocking.
+        """
+        queries = np.asarray(vectors, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        indices, similarities = self._nearest(queries, min(self.size, len(self)))
+        scores = (1.0 + similarities) / 2.0
+        return [self._hits(row_indices, row_scores) for row_indices, row_scores in zip(indices, scores)]
+
+    def _nearest(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k most similar vectors for each query.
+
+        Args:
+            queries (np.ndarray): Normalized query matrix
+            k (int): Number of neighbours
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and cosine similarities, best first
+        """
+        if self._hnsw is not None:
+            labels, distances = self._hnsw.knn_query(queries, k=k)
+            return labels, 1.0 - distances
+        similarities = queries @ self._vectors.T
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_similarities = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_similarities, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_similarities, order, axis=1)
+
+    def _hits(self, indices: np.ndarray, scores: np.ndarray) -> list[dict]:
+        """
+        Converts neighbours into OpenSearch-style hits, keeping the best one per category.
+        """
+        hits = {}
+        for index, score in zip(indices.tolist(), scores.tolist()):
+            if self.min_score is not None and score < self.min_score:
+                break
+            source = self._documents[index]
+            if source["category"] not in hits:
+                hits[source["category"]] = {"_score": score, "_source": source}
+        return list(hits.values())
+
+
+def build_local_index(path: str | Path, documents: list[dict], vectors: list[list[float]], hnsw_min_size: int) -> None:
+    """
+    Writes a local vector index.
+
+    Args:
+        path (str | Path): Index directory, created if missing
+        documents (list[dict]): Documents with id, category, details and text
+        vectors (list[list[float]]): Embeddings of the documents
+        hnsw_min_size (int): Also build an HNSW graph when there are at least this many vectors
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    matrix = np.array(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    np.save(path / VECTORS_FILE, matrix)
+    with open(path / DOCUMENTS_FILE, "w", encoding="utf-8") as f:
+        json.dump([{key: doc.get(key, "") for key in SOURCE_FIELDS} for doc in documents], f, ensure_ascii=False)
+
+    hnsw_path = path / HNSW_FILE
+    hnsw_path.unlink(missing_ok=True)
+    if len(matrix) >= hnsw_min_size:
+        if hnswlib is None:
+            pipeline_logger.warning("`hnswlib` is not installed, the local vector index will be searched exhaustively")
+            return
+        index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        index.init_index(max_elements=len(matrix), ef_construction=200, M=16)
+        index.add_items(matrix, np.arange(len(matrix)))
+        index.save_index(str(hnsw_path))
+
+
+def create_vector_store() -> VectorStore:
+    """
+    Creates the vector store selected by SIMILARITY_BACKEND.
+
+    Returns:
+        VectorStore: Configured vector store, not necessarily ready
+    """
+    try:
+        backend = SimilarityBackend(settings.SIMILARITY_BACKEND)
+    except ValueError:
+        pipeline_logger.warning(f"Unknown SIMILARITY_BACKEND={settings.SIMILARITY_BACKEND}, using `opensearch`")
+        backend = SimilarityBackend.OPENSEARCH
+    if backend == SimilarityBackend.LOCAL:
+        return LocalVectorStore(
+            settings.SIMILARITY_LOCAL_INDEX_PATH,
+            size=AsyncOpenSearchClient.KNN_SIZE,
+            min_score=settings.SIMILARITY_NOTIFY_THRESHOLD,
+        )
+    return OpenSearchVectorStore(
+        os_client,
+        chunk_size=settings.SIMILARITY_MSEARCH_CHUNK_SIZE,
+        concurrency=settings.SIMILARITY_MSEARCH_CONCURRENCY,
+    )
@@ -1,13 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 
 from app.manager import pipeline_manager
 from app.models.pipeline import (
     FlowInfo,
     FlowsResponse,
+    MetricsResponse,
     PipelineInfo,
     TaskRequest,
     TaskResult,
 )
+from settings import get_settings
+
+settings = get_settings()
 
 pipeline_router = APIRouter(prefix="/api/v1", tags=["pipeline"])
 
@@ -15,11 +19,24 @@ pipeline_router = APIRouter(prefix="/api/v1", tags=["pipeline"])
 @pipeline_router.post("/run_pipeline")
 async def run_pipeline(request: TaskRequest) -> TaskResult:
     task_result = await pipeline_manager.run_pipeline(
-        prompt=request.prompt, pipeline_flow=request.pipeline_flow, task_id=request.task_id
+        prompt=request.prompt, pipeline_flow=request.pipeline_flow, task_id=request.task_id, timeout=request.timeout
     )
     return task_result
 
 
+@pipeline_router.post("/run_pipeline/batch")
+async def run_pipeline_batch(requests: list[TaskRequest]) -> list[TaskResult]:
+    """
+    Run pipelines for several prompts in one request.
+
+    Returns:
+        list[TaskResult]: Task results in the order of requests
+    """
+    if len(requests) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds {settings.BATCH_MAX_SIZE} prompts")
+    return await pipeline_manager.run_batch(requests)
+
+
 @pipeline_router.get("/flows")
 async def get_flows() -> FlowsResponse:
     """
@@ -35,3 +52,14 @@ async def get_flows() -> FlowsResponse:
         flows.append(FlowInfo(flow_name=flow_name, pipelines=pipeline_infos))
 
     return FlowsResponse(flows=flows)
+
+
+@pipeline_router.get("/metrics")
+async def get_metrics() -> MetricsResponse:
+    """
+    Get runtime counters of the verdict cache and the pipelines, e.g. LLM admission queue depth and rejections.
+
+    Returns:
+        MetricsResponse: Verdict cache counters and counters by pipeline name
+    """
+    return MetricsResponse(**pipeline_manager.stats())
@@ -3,10 +3,18 @@ Module for managing pipelines and their configuration.
 Moved to a separate file to avoid circular imports.
 """
 
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from app.core.dataclasses import FlowPolicy
+from app.core.enums import ExecutionMode, FailMode
+from app.modules.embeddings import EmbeddingService
 from app.modules.logger import pipeline_logger
 from settings import get_settings
 
@@ -25,6 +33,123 @@ if settings.EMBEDDINGS_MODEL:
         model = None
 
 
+class EmbeddingCache:
+    """
+    Bounded LRU cache of text embeddings keyed by model name and content hash.
+
+    Vectors are stored as compact float32 arrays. The cache is bounded both by
+    the number of entries and by the total size of stored vectors; the least
+    recently used entries are evicted first. Texts themselves are not stored.
+
+    Attributes:
+        model_name (str): Embeddings model the cached vectors belong to
+        max_entries (int): Maximum number of cached vectors, 0 disables the cache
+        max_bytes (int): Maximum total size of cached vectors in bytes
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups not found in the cache
+        evictions (int): Number of vectors evicted to stay within bounds
+    """
+
+    def __init__(self, model_name: str, max_entries: int, max_bytes: int) -> None:
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> bytes:
+        """
+        Builds the cache key of a text for the cache's model.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            bytes: Hash of model name and text
+        """
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        """
+        Returns a cached vector and marks it as recently used.
+
+        Args:
+            key (bytes): Cache key from `key`
+
+        Returns:
+            np.ndarray | None: Cached vector or None on a miss
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        """
+        Stores a vector and evicts least recently used vectors beyond the bounds.
+
+        Args:
+            key (bytes): Cache key from `key`
+            vector (np.ndarray): Vector to store
+        """
+        if self.max_entries <= 0 or vector.nbytes > self.max_bytes:
+            return
+        if vector.base is not None:
+            # A view would keep its whole base array alive beyond the counted bytes
+            vector = vector.copy()
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns cache size and hit/miss/eviction counters.
+
+        Returns:
+            dict: Cache statistics
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+embedding_cache = EmbeddingCache(
+    model_name=settings.EMBEDDINGS_MODEL or "",
+    max_entries=settings.EMBEDDINGS_CACHE_MAX_ENTRIES,
+    max_bytes=settings.EMBEDDINGS_CACHE_MAX_BYTES,
+)
+# Embeddings being computed, shared by concurrent requests with the same texts
+_embeddings_in_flight: dict[bytes, asyncio.Future] = {}
+# Tasks computing them, referenced until done since the event loop only keeps weak references
+_embedding_tasks: set[asyncio.Task] = set()
+
+embedding_service = None
+if model is not None:
+    embedding_service = EmbeddingService(
+        model,
+        max_batch_size=settings.EMBEDDINGS_MAX_BATCH_SIZE,
+        max_wait_ms=settings.EMBEDDINGS_MAX_WAIT_MS,
+    )
+
+
 def get_pipelines_from_config(configs: list[dict]) -> dict[str, list["BasePipeline"]]:
     """
     Converts pipeline configuration from names to pipeline instances.
@@ -56,6 +181,76 @@ def get_pipelines_from_config(configs: list[dict]) -> dict[str, list["BasePipeli
     return result
 
 
+def get_flow_tiers_from_config(
+    configs: list[dict], pipeline_flows: dict[str, list["BasePipeline"]]
+) -> dict[str, list[list["BasePipeline"]]]:
+    """
+    Groups the pipelines of short-circuit flows into cost tiers.
+
+    A flow is evaluated tier by tier when its configuration has
+    `"execution": "short_circuit"`. Tiers are taken from the optional
+    `"tiers"` list of pipeline names; otherwise pipelines are grouped by
+    their `cost_tier`. Flow pipelines missing from explicit tiers form a last tier.
+
+    Args:
+        configs: List of dictionaries with pipeline configuration (names as strings)
+        pipeline_flows: Pipeline instances per flow from `get_pipelines_from_config`
+
+    Returns:
+        Dictionary with tiers of pipeline instances for each short-circuit flow
+    """
+    result = {}
+    for config in configs:
+        flow_name = config.get("pipeline_flow")
+        pipelines = pipeline_flows.get(flow_name)
+        try:
+            mode = ExecutionMode(config.get("execution", ExecutionMode.ALL))
+        except ValueError:
+            pipeline_logger.warning(f"Unknown execution mode of flow {flow_name}: {config.get('execution')}")
+            continue
+        if mode != ExecutionMode.SHORT_CIRCUIT or not pipelines:
+            continue
+        by_name = {pipeline.name: pipeline for pipeline in pipelines}
+        if tier_names := config.get("tiers"):
+            tiers = [[by_name[name] for name in names if name in by_name] for names in tier_names]
+            placed = {name for names in tier_names for name in names}
+            tiers.append([pipeline for pipeline in pipelines if pipeline.name not in placed])
+        else:
+            cost_tiers = sorted({pipeline.cost_tier for pipeline in pipelines})
+            tiers = [[pipeline for pipeline in pipelines if pipeline.cost_tier == tier] for tier in cost_tiers]
+        result[flow_name] = [tier for tier in tiers if tier]
+        tiers_info = " -> ".join(", ".join(str(pipeline) for pipeline in tier) for tier in result[flow_name])
+        pipeline_logger.info(f"Flow {flow_name} runs in tiers: {tiers_info}")
+    return result
+
+
+def get_flow_policies_from_config(configs: list[dict]) -> dict[str, FlowPolicy]:
+    """
+    Reads the deadline and failure policy of each flow.
+
+    Flows take `"timeout"` (seconds) and `"fail_mode"` (`open` or `closed`)
+    from their configuration and fall back to REQUEST_TIMEOUT and
+    PIPELINE_FAIL_MODE. The `default` flow always uses the settings.
+
+    Args:
+        configs: List of dictionaries with pipeline configuration
+
+    Returns:
+        Dictionary with the policy of each flow
+    """
+    result = {}
+    for config in [{"pipeline_flow": "default"}, *configs]:
+        flow_name = config.get("pipeline_flow")
+        try:
+            fail_mode = FailMode(config.get("fail_mode", settings.PIPELINE_FAIL_MODE))
+        except ValueError:
+            pipeline_logger.warning(f"Unknown fail mode of flow {flow_name}: {config.get('fail_mode')}, using open")
+            fail_mode = FailMode.OPEN
+        if flow_name:
+            result[flow_name] = FlowPolicy(timeout=config.get("timeout", settings.REQUEST_TIMEOUT), fail_mode=fail_mode)
+    return result
+
+
 def text_embedding(prompt: str) -> list[float]:
     """
     Create vector embedding from text prompt.
@@ -69,3 +264,91 @@ def text_embedding(prompt: str) -> list[float]:
     if model is None:
         raise ValueError("Embeddings model is not loaded. Please check EMBEDDINGS_MODEL setting.")
     return model.encode(prompt, normalize_embeddings=True).tolist()
+
+
+async def async_text_embedding(prompt: str) -> list[float]:
+    """
+    Create vector embedding from text prompt without blocking the event loop.
+
+    Args:
+        prompt: Text to convert to vector
+
+    Returns:
+        List of float values representing the vector
+    """
+    return (await async_text_embeddings([prompt]))[0]
+
+
+async def async_text_embeddings(texts: list[str]) -> list[list[float]]:
+    """
+    Create vector embeddings for several texts in one batched model call.
+
+    Vectors are looked up in the embedding cache first. Texts that are
+    repeated, or already being embedded for a concurrent request, are
+    embedded only once; the remaining texts are batched by the embedding
+    service in a task of their own, so cancelling the request that started
+    it does not cancel the embeddings other requests are waiting for.
+
+    Args:
+        texts: Texts to convert to vectors
+
+    Returns:
+        List of vectors in the order of texts
+    """
+    if embedding_service is None:
+        raise ValueError("Embeddings model is not loaded. Please check EMBEDDINGS_MODEL setting.")
+
+    keys = [embedding_cache.key(text) for text in texts]
+    vectors: dict[bytes, np.ndarray] = {}
+    missing: dict[bytes, str] = {}
+    in_flight: dict[bytes, asyncio.Future] = {}
+    for key, text in zip(keys, texts):
+        if key in vectors or key in missing or key in in_flight:
+            continue
+        if (vector := embedding_cache.get(key)) is not None:
+            vectors[key] = vector
+        elif (future := _embeddings_in_flight.get(key)) is not None:
+            in_flight[key] = future
+        else:
+            missing[key] = text
+
+    if missing:
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in missing}
+        _embeddings_in_flight.update(futures)
+        in_flight.update(futures)
+        task = asyncio.create_task(_embed_missing(missing, futures))
+        _embedding_tasks.add(task)
+        task.add_done_callback(_embedding_tasks.discard)
+
+    for key, future in in_flight.items():
+        vectors[key] = await asyncio.shield(future)
+    return [vectors[key].tolist() for key in keys]
+
+
+async def _embed_missing(missing: dict[bytes, str], futures: dict[bytes, asyncio.Future]) -> None:
+    """
+    Embeds texts that no request has embedded yet and resolves the futures requests wait on.
+
+    Args:
+        missing: Texts by embedding cache key
+        futures: Futures of the same keys, registered in `_embeddings_in_flight`
+    """
+    try:
+        embedded = await embedding_service.embed_many(list(missing.values()))
+    except Exception as err:
+        for key, future in futures.items():
+            _embeddings_in_flight.pop(key, None)
+            future.set_exception(err)
+            # Mark the exception as retrieved when no request awaits it anymore
+            future.exception()
+        return
+    except asyncio.CancelledError:
+        for key, future in futures.items():
+            _embeddings_in_flight.pop(key, None)
+            future.cancel()
+        raise
+    for (key, future), vector in zip(futures.items(), embedded):
+        _embeddings_in_flight.pop(key, None)
+        embedding_cache.put(key, vector)
+        future.set_result(vector)
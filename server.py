@@ -1,12 +1,16 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.manager import pipeline_manager
+from app.modules.kafka_client import KAFKA_CLIENT
 from app.modules.logger import pipeline_logger
 from app.modules.opensearch import os_client
 from app.routers.pipeline import pipeline_router
+from app.utils import embedding_service
 from settings import get_settings
 
 settings = get_settings()
@@ -19,6 +23,11 @@ async def lifespan(app_: FastAPI):
     yield
     if settings.OS:
         await os_client.close()
+    if embedding_service:
+        await asyncio.to_thread(embedding_service.close)
+    await pipeline_manager.verdict_cache.close()
+    if settings.KAFKA:
+        await asyncio.to_thread(KAFKA_CLIENT.disconnect)
 
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan, description="API for LLM Protection", version="1.0.0")
@@ -16,6 +16,7 @@ class OpenSearchSettings(BaseModel):
     port: int
     scheme: str = "https"
     pool_size: int = 10
+    index_check_ttl: int = 300
 
 
 class KafkaSettings(BaseModel):
@@ -26,6 +27,16 @@ class KafkaSettings(BaseModel):
     sasl_username: Optional[str] = None
     sasl_password: Optional[str] = None
     save_prompt: bool = False
+    linger_ms: int = 50
+    batch_size: int = 65536
+    compression_type: str = "lz4"
+    queue_max_messages: int = 100000
+    flush_timeout: float = 10.0
+    message_timeout_ms: int = 30000
+    spool_dir: Optional[str] = None
+    spool_segment_bytes: int = 16 * 1024 * 1024
+    spool_max_bytes: int = 1024 * 1024 * 1024
+    encoding: str = "json"
 
 
 def _load_version() -> str:
@@ -68,10 +79,133 @@ class Settings(BaseSettings):
     KAFKA: Optional[KafkaSettings] = None
     PIPELINE_CONFIG: dict = Field(default_factory=dict)
 
+    REQUEST_TIMEOUT: Optional[float] = Field(
+        default=None,
+        description="Default deadline in seconds for running all pipelines of a request"
+    )
+    PIPELINE_TIMEOUT: Optional[float] = Field(
+        default=None,
+        description="Default time budget in seconds for a single pipeline run"
+    )
+    PIPELINE_TIMEOUTS: dict[str, float] = Field(
+        default_factory=dict,
+        description="Time budgets in seconds by pipeline name, overriding PIPELINE_TIMEOUT"
+    )
+    VERDICT_CACHE_MAX_ENTRIES: int = Field(
+        default=0,
+        description="Maximum number of cached task results of whole prompts, 0 disables the verdict cache"
+    )
+    VERDICT_CACHE_TTL: float = Field(
+        default=300.0,
+        description="Seconds a cached task result stays valid"
+    )
+    VERDICT_CACHE_SECRET: Optional[str] = Field(
+        default=None,
+        description="Key of the prompt hashes in the verdict cache, random per process if not set"
+    )
+    VERDICT_CACHE_BACKEND: str = Field(
+        default="memory",
+        description="Storage of the verdict cache: memory (per process) or redis (shared by replicas)"
+    )
+    VERDICT_CACHE_REDIS_URL: Optional[str] = Field(
+        default=None,
+        description="URL of the Redis-protocol server of the redis verdict cache backend"
+    )
+    VERDICT_CACHE_REDIS_PREFIX: str = Field(
+        default="bastion:verdict:",
+        description="Prefix of the keys written to the redis verdict cache backend"
+    )
+    VERDICT_CACHE_LOCK_TIMEOUT: float = Field(
+        default=30.0,
+        description="Seconds a replica waits for another replica computing the same verdict"
+    )
+    BATCH_MAX_SIZE: int = Field(
+        default=1000,
+        description="Maximum number of prompts in one batch analysis request"
+    )
+    PIPELINE_FAIL_MODE: str = Field(
+        default="open",
+        description="Default status for pipelines that fail or time out: open (ignored) or closed (block)"
+    )
+
+    REGEX_BACKEND: str = Field(
+        default="re",
+        description="Default regex backend for rules that do not select one: re, regex or re2"
+    )
+    REGEX_RULE_TIMEOUT: Optional[float] = Field(
+        default=None,
+        description="Time budget in seconds for a single regex rule"
+    )
+    REGEX_REQUEST_TIMEOUT: Optional[float] = Field(
+        default=None,
+        description="Time budget in seconds for all regex rules of a request"
+    )
+    REGEX_MAX_WORKERS: int = Field(
+        default=4,
+        description="Worker threads for budgeted regex evaluation"
+    )
+
+    SEMGREP_MAX_WORKERS: int = Field(
+        default=4,
+        description="Maximum number of concurrent Semgrep processes"
+    )
+    SEMGREP_TIMEOUT: Optional[float] = Field(
+        default=30.0,
+        description="Seconds after which a Semgrep scan is killed"
+    )
+    SEMGREP_BATCH_WINDOW_MS: float = Field(
+        default=20.0,
+        description="How long concurrent code scans are collected into one Semgrep invocation, in milliseconds"
+    )
+    SEMGREP_BATCH_MAX_SIZE: int = Field(
+        default=16,
+        description="Maximum number of code snippets per Semgrep invocation"
+    )
+    SEMGREP_TMP_DIR: Optional[str] = Field(
+        default=None,
+        description="Directory for snippet files, /dev/shm when available by default"
+    )
+    SEMGREP_CACHE_MAX_ENTRIES: int = Field(
+        default=1024,
+        description="Maximum number of cached Semgrep scan results, 0 disables the cache"
+    )
+    SEMGREP_CACHE_TTL: float = Field(
+        default=3600.0,
+        description="Seconds a cached Semgrep scan result stays valid"
+    )
+    SEMGREP_PRESCAN: bool = Field(
+        default=True,
+        description="Skip Semgrep when no rule's metadata.prescan_regex matches the code"
+    )
+    SEMGREP_RULE_PACKS_DIR: Optional[str] = Field(
+        default=None,
+        description="Directory of rule packs built by build_rule_packs.py; when set, registry configs are not used"
+    )
+
     SIMILARITY_PROMPT_INDEX: str = "similarity-prompt-index"
+    SIMILARITY_BACKEND: str = Field(
+        default="opensearch",
+        description="Vector store for the similarity pipeline: opensearch or local"
+    )
+    SIMILARITY_LOCAL_INDEX_PATH: str = Field(
+        default="data/similarity_index",
+        description="Directory of the local vector index built by index_script.py"
+    )
+    SIMILARITY_LOCAL_HNSW_MIN_SIZE: int = Field(
+        default=50000,
+        description="Build an HNSW graph for local indices with at least this many vectors (requires hnswlib)"
+    )
 
     SIMILARITY_NOTIFY_THRESHOLD: float = 0.7
     SIMILARITY_BLOCK_THRESHOLD: float = 0.87
+    SIMILARITY_MSEARCH_CHUNK_SIZE: int = Field(
+        default=50,
+        description="Maximum number of sentence queries per OpenSearch multi-search request"
+    )
+    SIMILARITY_MSEARCH_CONCURRENCY: int = Field(
+        default=4,
+        description="Maximum number of concurrent OpenSearch multi-search requests per prompt"
+    )
 
     CORS_ORIGINS: list[str] = Field(
         default=["*"],
@@ -83,6 +217,22 @@ class Settings(BaseSettings):
         default="nomic-ai/nomic-embed-text-v1.5",
         description="Model for embeddings"
     )
+    EMBEDDINGS_MAX_BATCH_SIZE: int = Field(
+        default=64,
+        description="Maximum number of texts embedded together across concurrent requests"
+    )
+    EMBEDDINGS_MAX_WAIT_MS: float = Field(
+        default=5.0,
+        description="How long to wait for more texts before embedding a batch, in milliseconds"
+    )
+    EMBEDDINGS_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        description="Maximum number of cached embeddings, 0 disables the cache"
+    )
+    EMBEDDINGS_CACHE_MAX_BYTES: int = Field(
+        default=64 * 1024 * 1024,
+        description="Maximum total size of cached embeddings in bytes"
+    )
 
     OPENAI_API_KEY: Optional[str] = Field(
         default="",
@@ -96,6 +246,46 @@ class Settings(BaseSettings):
         default="https://api.openai.com/v1",
         description="Default base URL for OpenAI ChatGPT API"
     )
+    LLM_REQUEST_TIMEOUT: Optional[float] = Field(
+        default=30.0,
+        description="Seconds an OpenAI API request may take, including the wait for admission"
+    )
+    LLM_CACHE_MAX_ENTRIES: int = Field(
+        default=1024,
+        description="Maximum number of cached LLM analysis results, 0 disables the cache"
+    )
+    LLM_CACHE_TTL: float = Field(
+        default=3600.0,
+        description="Seconds a cached LLM analysis result stays valid"
+    )
+    LLM_MAX_CONCURRENCY: int = Field(
+        default=32,
+        description="Maximum number of concurrent OpenAI API requests, 0 for no limit"
+    )
+    LLM_RATE_LIMIT: float = Field(
+        default=0.0,
+        description="Maximum OpenAI API requests per second, 0 for no limit"
+    )
+    LLM_RATE_BURST: int = Field(
+        default=32,
+        description="Number of OpenAI API requests that may start at once under LLM_RATE_LIMIT"
+    )
+    LLM_MAX_QUEUE: int = Field(
+        default=256,
+        description="Maximum number of OpenAI API requests waiting for admission, further requests are rejected"
+    )
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(
+        default=64,
+        description="Maximum number of HTTP connections to the OpenAI API"
+    )
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=32,
+        description="Maximum number of idle keep-alive HTTP connections to the OpenAI API"
+    )
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0,
+        description="Seconds an idle keep-alive HTTP connection to the OpenAI API is kept open"
+    )
 
     ML_MODEL_PATH: Optional[str] = None
 
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.dataclasses import FlowPolicy, Rule
+from app.core.enums import ActionStatus, FailMode, RegexBackend, RuleAction
+from app.manager import PipelineManager
+from app.pipelines.regex_pipeline.backends import CompiledPattern
+from app.pipelines.regex_pipeline.engine import RegexRuleEngine
+from app.pipelines.regex_pipeline.pipeline import RegexPipeline
+from settings import get_settings
+
+
+class SlowPattern(CompiledPattern):
+    """
+    Pattern that cannot be interrupted and never matches, like a backtracking `re` rule.
+    """
+
+    backend = RegexBackend.RE
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def search(self, prompt: str, timeout: float | None = None) -> bool:
+        time.sleep(self.seconds)
+        return False
+
+
+def make_rule(rule_id: str, body: str, action: RuleAction = RuleAction.NOTIFY) -> Rule:
+    return Rule(id=rule_id, name=rule_id, details=rule_id, language="any", body=body, action=action)
+
+
+def make_regex_pipeline(monkeypatch, request_timeout: float | None, rules: list[Rule] | None = None) -> RegexPipeline:
+    """
+    Creates a regex pipeline whose rule with id "slow" takes 0.2s on every prompt.
+    """
+    monkeypatch.setattr(get_settings(), "REGEX_REQUEST_TIMEOUT", request_timeout)
+    pipeline = RegexPipeline()
+    pipeline._engine = RegexRuleEngine(rules or [make_rule("slow", r"\w+"), make_rule("digits", r"\d+")])
+    for group in pipeline._engine.groups:
+        if group.id == "slow":
+            group.patterns[0] = (group.patterns[0][0], SlowPattern(0.2))
+    return pipeline
+
+
+def make_manager(pipeline: RegexPipeline, fail_mode: FailMode, timeout: float | None) -> PipelineManager:
+    manager = PipelineManager()
+    manager.pipeline_flows = {"strict": [pipeline]}
+    manager.flow_tiers = {}
+    manager.flow_policies = {"strict": FlowPolicy(timeout=timeout, fail_mode=fail_mode)}
+    manager.verdict_cache.backend = None
+    manager.kafka_client = None
+    return manager
+
+
+@pytest.mark.parametrize(
+    ("fail_mode", "expected"), [(FailMode.CLOSED, ActionStatus.BLOCK), (FailMode.OPEN, ActionStatus.ALLOW)]
+)
+def test_regex_budget_tighter_than_deadline_follows_fail_mode(monkeypatch, fail_mode, expected):
+    manager = make_manager(make_regex_pipeline(monkeypatch, request_timeout=0.05), fail_mode, timeout=5.0)
+
+    task = asyncio.run(manager.run_pipeline("prompt 123", "strict"))
+
+    assert task.status == expected
+    assert [(result.status, result.reason) for result in task.pipelines] == [
+        (ActionStatus.ERROR, "regex time budget exhausted")
+    ]
+
+
+def test_request_deadline_blocks_fail_closed_flow(monkeypatch):
+    manager = make_manager(make_regex_pipeline(monkeypatch, request_timeout=None), FailMode.CLOSED, timeout=0.1)
+
+    task = asyncio.run(manager.run_pipeline("prompt 123", "strict"))
+
+    assert task.status == ActionStatus.BLOCK
+    assert [result.status for result in task.pipelines] == [ActionStatus.ERROR]
+
+
+def test_partial_block_match_is_kept_when_budget_runs_out(monkeypatch):
+    rules = [make_rule("block", r"\d{3}", RuleAction.BLOCK), make_rule("slow", r"\w+"), make_rule("notify", r"p\w+")]
+    pipeline = make_regex_pipeline(monkeypatch, request_timeout=0.05, rules=rules)
+
+    result = asyncio.run(pipeline.run("prompt 123"))
+
+    assert result.status == ActionStatus.BLOCK
+    assert [rule.id for rule in result.triggered_rules] == ["block"]
+    assert pipeline.request_budget_exhaustions == 1
@@ -0,0 +1,69 @@
+import numpy as np
+
+from app.utils import EmbeddingCache
+
+
+def make_vector(value: float, size: int = 4) -> np.ndarray:
+    return np.full(size, value, dtype=np.float32)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EmbeddingCache("model", max_entries=2, max_bytes=1024)
+    first, second, third = (cache.key(text) for text in ("first", "second", "third"))
+    cache.put(first, make_vector(1))
+    cache.put(second, make_vector(2))
+
+    assert cache.get(first) is not None
+    cache.put(third, make_vector(3))
+
+    assert cache.get(second) is None
+    assert cache.get(first)[0] == 1
+    assert cache.get(third)[0] == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_total_size_stays_within_max_bytes():
+    vector_bytes = make_vector(0).nbytes
+    cache = EmbeddingCache("model", max_entries=100, max_bytes=3 * vector_bytes)
+    keys = [cache.key(str(index)) for index in range(5)]
+    for index, key in enumerate(keys):
+        cache.put(key, make_vector(index))
+
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] == 3 * vector_bytes
+    assert [cache.get(key) is not None for key in keys] == [False, False, True, True, True]
+
+
+def test_replacing_a_key_does_not_count_its_bytes_twice():
+    cache = EmbeddingCache("model", max_entries=10, max_bytes=1024)
+    key = cache.key("text")
+    cache.put(key, make_vector(1))
+    cache.put(key, make_vector(2))
+
+    assert cache.stats()["bytes"] == make_vector(0).nbytes
+    assert cache.get(key)[0] == 2
+
+
+def test_rows_of_a_batch_are_stored_as_copies():
+    cache = EmbeddingCache("model", max_entries=10, max_bytes=1024)
+    batch = np.ones((8, 4), dtype=np.float32)
+    key = cache.key("text")
+    cache.put(key, batch[0])
+
+    stored = cache.get(key)
+    assert stored.base is None
+    assert stored.nbytes == cache.stats()["bytes"]
+
+
+def test_keys_depend_on_the_model():
+    assert EmbeddingCache("a", 1, 1).key("text") != EmbeddingCache("b", 1, 1).key("text")
+
+
+def test_disabled_and_oversized_vectors_are_not_stored():
+    disabled = EmbeddingCache("model", max_entries=0, max_bytes=1024)
+    disabled.put(disabled.key("text"), make_vector(1))
+    small = EmbeddingCache("model", max_entries=10, max_bytes=8)
+    small.put(small.key("text"), make_vector(1))
+
+    assert disabled.stats()["entries"] == 0
+    assert small.stats()["entries"] == 0
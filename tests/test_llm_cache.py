@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.core.enums import ActionStatus
+from app.models.pipeline import PipelineResult
+from app.pipelines.llm_pipeline.cache import LLMResponseCache
+
+
+class CountingCall:
+    """
+    Upstream call that returns a fixed status after a delay and counts its invocations.
+    """
+
+    def __init__(self, status: ActionStatus = ActionStatus.ALLOW, delay: float = 0.05) -> None:
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+        self.finished = 0
+
+    async def __call__(self) -> PipelineResult:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        self.finished += 1
+        return PipelineResult(name="LLM Pipeline", status=self.status)
+
+
+def test_concurrent_misses_share_one_call():
+    cache = LLMResponseCache()
+    call = CountingCall(ActionStatus.BLOCK)
+    key = cache.key("model", "system", "prompt")
+
+    async def run() -> list[PipelineResult]:
+        return await asyncio.gather(*[cache.get_or_call(key, call) for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert [result.status for result in results] == [ActionStatus.BLOCK] * 5
+    assert call.calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_cached_result_is_returned_without_a_call():
+    cache = LLMResponseCache()
+    call = CountingCall()
+    key = cache.key("model", "system", "prompt")
+
+    async def run() -> None:
+        await cache.get_or_call(key, call)
+        await cache.get_or_call(key, call)
+
+    asyncio.run(run())
+
+    assert call.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_caller_deadline_does_not_cancel_the_shared_call():
+    cache = LLMResponseCache()
+    call = CountingCall(delay=0.1)
+    key = cache.key("model", "system", "prompt")
+
+    async def run() -> PipelineResult:
+        loop = asyncio.get_running_loop()
+        impatient = asyncio.create_task(cache.get_or_call(key, call, deadline=loop.time() + 0.01))
+        patient = asyncio.create_task(cache.get_or_call(key, call, deadline=loop.time() + 5.0))
+        with pytest.raises(TimeoutError):
+            await impatient
+        return await patient
+
+    result = asyncio.run(run())
+
+    assert result.status == ActionStatus.ALLOW
+    assert call.calls == call.finished == 1
+
+
+def test_error_results_are_not_cached():
+    cache = LLMResponseCache()
+    call = CountingCall(ActionStatus.ERROR)
+    key = cache.key("model", "system", "prompt")
+
+    async def run() -> None:
+        await cache.get_or_call(key, call)
+        await cache.get_or_call(key, call)
+
+    asyncio.run(run())
+
+    assert call.calls == 2
+    assert len(cache) == 0
+
+
+def test_keys_depend_on_model_and_system_prompt():
+    keys = {
+        LLMResponseCache.key("a", "system", "prompt"),
+        LLMResponseCache.key("b", "system", "prompt"),
+        LLMResponseCache.key("a", "other", "prompt"),
+    }
+
+    assert len(keys) == 3
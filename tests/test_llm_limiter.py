@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.pipelines.llm_pipeline.limiter import AdmissionController, AdmissionRejected
+
+
+def test_request_is_rejected_when_the_queue_is_full():
+    limiter = AdmissionController(max_concurrency=1, max_queue=0)
+
+    async def run() -> None:
+        async with limiter.admit():
+            with pytest.raises(AdmissionRejected):
+                async with limiter.admit():
+                    pass
+
+    asyncio.run(run())
+
+    assert limiter.stats()["admitted"] == 1
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_queued_request_waits_for_a_slot():
+    limiter = AdmissionController(max_concurrency=1, max_queue=1)
+    order = []
+
+    async def request(name: str) -> None:
+        async with limiter.admit():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        await asyncio.gather(request("first"), request("second"))
+
+    asyncio.run(run())
+
+    assert order == ["first", "second"]
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_queued_request_expires_at_its_deadline():
+    limiter = AdmissionController(max_concurrency=1, max_queue=1)
+
+    async def run() -> None:
+        async with limiter.admit():
+            deadline = asyncio.get_running_loop().time() + 0.01
+            with pytest.raises(AdmissionRejected):
+                async with limiter.admit(deadline=deadline):
+                    pass
+
+    asyncio.run(run())
+
+    assert limiter.stats()["expired"] == 1
+    assert limiter.stats()["active"] == 0
+
+
+def test_rate_limit_delays_requests_beyond_the_burst():
+    limiter = AdmissionController(rate=50.0, burst=1, max_queue=10)
+
+    async def request() -> None:
+        async with limiter.admit():
+            pass
+
+    async def run() -> float:
+        started_at = asyncio.get_running_loop().time()
+        await asyncio.gather(*[request() for _ in range(3)])
+        return asyncio.get_running_loop().time() - started_at
+
+    elapsed = asyncio.run(run())
+
+    assert elapsed >= 0.03
+    assert limiter.stats()["admitted"] == 3
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from app.core.dataclasses import FlowPolicy
+from app.core.enums import ActionStatus, FailMode
+from app.manager import PipelineManager
+from app.models.pipeline import PipelineResult, TaskRequest
+from app.pipelines.base import BasePipeline
+
+
+class StaticPipeline(BasePipeline):
+    """
+    Returns a fixed status after a delay, or BLOCK for prompts containing `block_word`.
+    """
+
+    enabled = True
+
+    def __init__(
+        self, name: str, status: ActionStatus = ActionStatus.ALLOW, delay: float = 0.0, block_word: str | None = None
+    ) -> None:
+        self.name = name
+        self.status = status
+        self.delay = delay
+        self.block_word = block_word
+        self.prompts: list[str] = []
+        self.cancelled = 0
+
+    def __str__(self) -> str:
+        return self.name
+
+    async def run(self, prompt: str, **kwargs) -> PipelineResult:
+        self.prompts.append(prompt)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        status = ActionStatus.BLOCK if self.block_word and self.block_word in prompt else self.status
+        return PipelineResult(name=self.name, status=status)
+
+
+def make_manager(
+    flows: dict[str, list[list[BasePipeline]]], short_circuit: bool = False, policy: FlowPolicy | None = None
+) -> PipelineManager:
+    manager = PipelineManager()
+    manager.pipeline_flows = {flow: [pipeline for tier in tiers for pipeline in tier] for flow, tiers in flows.items()}
+    manager.flow_tiers = flows if short_circuit else {}
+    manager.flow_policies = {flow: policy or FlowPolicy() for flow in flows}
+    manager.verdict_cache.backend = None
+    manager.kafka_client = None
+    return manager
+
+
+def test_block_skips_later_tiers_and_cancels_its_tier():
+    slow = StaticPipeline("slow", delay=5.0)
+    later = StaticPipeline("later")
+    manager = make_manager(
+        {"tiered": [[StaticPipeline("regex", ActionStatus.BLOCK), slow], [later]]}, short_circuit=True
+    )
+
+    task = asyncio.run(manager.run_pipeline("prompt", "tiered"))
+
+    assert task.status == ActionStatus.BLOCK
+    assert [result.name for result in task.pipelines] == ["regex"]
+    assert slow.cancelled == 1
+    assert later.prompts == []
+
+
+def test_allowed_prompt_runs_every_tier():
+    later = StaticPipeline("later", ActionStatus.NOTIFY)
+    manager = make_manager({"tiered": [[StaticPipeline("regex")], [later]]}, short_circuit=True)
+
+    task = asyncio.run(manager.run_pipeline("prompt", "tiered"))
+
+    assert task.status == ActionStatus.NOTIFY
+    assert later.prompts == ["prompt"]
+
+
+@pytest.mark.parametrize(
+    ("fail_mode", "expected"), [(FailMode.OPEN, ActionStatus.ALLOW), (FailMode.CLOSED, ActionStatus.BLOCK)]
+)
+def test_pipeline_missing_the_deadline_follows_fail_mode(fail_mode, expected):
+    manager = make_manager(
+        {"default": [[StaticPipeline("slow", delay=5.0)]]}, policy=FlowPolicy(timeout=0.05, fail_mode=fail_mode)
+    )
+
+    task = asyncio.run(manager.run_pipeline("prompt", "default"))
+
+    assert task.status == expected
+    assert [(result.name, result.status) for result in task.pipelines] == [("slow", ActionStatus.ERROR)]
+
+
+def test_request_timeout_overrides_the_flow_deadline():
+    manager = make_manager(
+        {"default": [[StaticPipeline("slow", delay=0.1)]]}, policy=FlowPolicy(timeout=0.01, fail_mode=FailMode.CLOSED)
+    )
+
+    task = asyncio.run(manager.run_pipeline("prompt", "default", timeout=5.0))
+
+    assert task.status == ActionStatus.ALLOW
+
+
+def test_run_batch_keeps_the_order_of_requests():
+    manager = make_manager(
+        {
+            "default": [[StaticPipeline("default", block_word="bad")]],
+            "strict": [[StaticPipeline("strict", ActionStatus.NOTIFY)]],
+        }
+    )
+    requests = [
+        TaskRequest(prompt="bad", pipeline_flow="default"),
+        TaskRequest(prompt="one", pipeline_flow="strict"),
+        TaskRequest(prompt="good", pipeline_flow="default"),
+        TaskRequest(prompt="two", pipeline_flow="strict", timeout=5.0),
+        TaskRequest(prompt="three", pipeline_flow="unknown"),
+    ]
+
+    tasks = asyncio.run(manager.run_batch(requests))
+
+    assert [task.status for task in tasks] == [
+        ActionStatus.BLOCK,
+        ActionStatus.NOTIFY,
+        ActionStatus.ALLOW,
+        ActionStatus.NOTIFY,
+        ActionStatus.ALLOW,
+    ]
+
+
+def test_run_batch_passes_only_unblocked_prompts_to_later_tiers():
+    later = StaticPipeline("later")
+    manager = make_manager({"tiered": [[StaticPipeline("regex", block_word="bad")], [later]]}, short_circuit=True)
+    requests = [TaskRequest(prompt=prompt, pipeline_flow="tiered") for prompt in ("good", "bad", "fine")]
+
+    tasks = asyncio.run(manager.run_batch(requests))
+
+    assert [task.status for task in tasks] == [ActionStatus.ALLOW, ActionStatus.BLOCK, ActionStatus.ALLOW]
+    assert later.prompts == ["good", "fine"]
+
+
+def test_batch_endpoint_rejects_oversized_batches(monkeypatch):
+    from fastapi import HTTPException
+
+    from app.routers import pipeline as pipeline_router
+
+    monkeypatch.setattr(pipeline_router.settings, "BATCH_MAX_SIZE", 2)
+    requests = [TaskRequest(prompt=str(index)) for index in range(3)]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pipeline_router.run_pipeline_batch(requests))
+
+    assert error.value.status_code == 413
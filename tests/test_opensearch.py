@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+from app.modules.opensearch import AsyncOpenSearchClient
+from settings import OpenSearchSettings
+
+
+def hit(category: str) -> dict:
+    return {"_source": {"category": category, "id": category, "details": "", "text": ""}}
+
+
+def response(*categories: str) -> dict:
+    return {"hits": {"hits": [hit(category) for category in categories]}}
+
+
+class StandInOpenSearch:
+    """
+    Answers `msearch` with prepared responses and single searches with one hit named after the vector.
+    """
+
+    def __init__(self, responses: list[dict] | Exception) -> None:
+        self.responses = responses
+        self.searches: list[float] = []
+
+    async def msearch(self, body: list[dict]) -> dict:
+        if isinstance(self.responses, Exception):
+            raise self.responses
+        return {"responses": self.responses}
+
+    async def search(self, index: str, body: dict) -> dict:
+        value = body["query"]["knn"]["vector"]["vector"][0]
+        self.searches.append(value)
+        return response(f"single-{value}")
+
+
+def make_client(responses: list[dict] | Exception) -> AsyncOpenSearchClient:
+    client = AsyncOpenSearchClient(OpenSearchSettings(user="u", password="p", host="localhost", port=9200), "prompts")
+    client._client = StandInOpenSearch(responses)
+    # A fresh index check, so searches do not query the index mapping
+    client._index_checked_at = time.monotonic()
+    return client
+
+
+def categories(results: list[list[dict]]) -> list[list[str]]:
+    return [[document["_source"]["category"] for document in documents] for documents in results]
+
+
+def test_results_follow_the_order_of_vectors():
+    client = make_client([response("a", "a", "b"), response("c")])
+
+    results = asyncio.run(client.search_similar_documents_batch([[1.0], [2.0]]))
+
+    assert categories(results) == [["a", "b"], ["c"]]
+    assert client._client.searches == []
+
+
+def test_failed_items_are_retried_alone():
+    failed = {"error": {"type": "search_phase_execution_exception"}, "status": 500}
+    client = make_client([failed, response("b"), {"status": 429}])
+
+    results = asyncio.run(client.search_similar_documents_batch([[1.0], [2.0], [3.0]]))
+
+    assert categories(results) == [["single-1.0"], ["b"], ["single-3.0"]]
+    assert client._client.searches == [1.0, 3.0]
+
+
+def test_missing_index_item_invalidates_the_index_check():
+    client = make_client([{"error": {"type": "index_not_found_exception"}, "status": 404}])
+
+    results = asyncio.run(client.search_similar_documents_batch([[1.0]]))
+
+    assert results == [[]]
+    assert client._index_checked_at is None
+
+
+def test_response_count_mismatch_retries_every_query():
+    client = make_client([response("a")])
+
+    results = asyncio.run(client.search_similar_documents_batch([[1.0], [2.0]]))
+
+    assert categories(results) == [["single-1.0"], ["single-2.0"]]
+
+
+def test_failed_request_falls_back_to_single_searches():
+    client = make_client(RuntimeError("connection reset"))
+
+    results = asyncio.run(client.search_similar_documents_batch([[1.0], [2.0]]))
+
+    assert categories(results) == [["single-1.0"], ["single-2.0"]]
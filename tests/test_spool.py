@@ -0,0 +1,79 @@
+from app.modules.spool import EventSpool
+
+
+def drain(spool: EventSpool) -> list[tuple[bytes, bytes | None]]:
+    events = []
+    while spool.consume(lambda value, key: events.append((value, key)) or True):
+        pass
+    return events
+
+
+def test_events_are_consumed_in_order(tmp_path):
+    spool = EventSpool(tmp_path, segment_bytes=256)
+    for index in range(20):
+        assert spool.append(f"event-{index}".encode(), key=b"key" if index % 2 else None)
+
+    events = drain(spool)
+
+    assert events == [(f"event-{index}".encode(), b"key" if index % 2 else None) for index in range(20)]
+    assert spool.empty
+    spool.close()
+
+
+def test_unread_events_are_recovered_after_reopening(tmp_path):
+    spool = EventSpool(tmp_path, segment_bytes=256)
+    for index in range(10):
+        spool.append(f"event-{index}".encode())
+    consumed = []
+    for _ in range(4):
+        spool.consume(lambda value, key: consumed.append(value) or True)
+    spool.close()
+
+    reopened = EventSpool(tmp_path, segment_bytes=256)
+
+    assert consumed == [f"event-{index}".encode() for index in range(4)]
+    assert [value for value, _ in drain(reopened)] == [f"event-{index}".encode() for index in range(4, 10)]
+    reopened.close()
+
+
+def test_drained_segments_are_deleted_on_reopening(tmp_path):
+    spool = EventSpool(tmp_path, segment_bytes=256)
+    spool.append(b"event")
+    drain(spool)
+    spool.close()
+
+    reopened = EventSpool(tmp_path, segment_bytes=256)
+
+    assert reopened.stats()["segments"] == 0
+    assert list(tmp_path.iterdir()) == []
+    reopened.close()
+
+
+def test_refused_event_stays_in_the_spool(tmp_path):
+    spool = EventSpool(tmp_path, segment_bytes=256)
+    spool.append(b"event")
+
+    assert not spool.consume(lambda value, key: False)
+    assert drain(spool) == [(b"event", None)]
+    spool.close()
+
+
+def test_oldest_events_are_dropped_beyond_max_bytes(tmp_path):
+    spool = EventSpool(tmp_path, segment_bytes=256, max_bytes=512)
+    for index in range(40):
+        spool.append(f"event-{index:02d}".encode())
+
+    events = [value for value, _ in drain(spool)]
+
+    assert spool.dropped > 0
+    assert len(events) + spool.dropped == 40
+    assert events == [f"event-{index:02d}".encode() for index in range(spool.dropped, 40)]
+    spool.close()
+
+
+def test_event_larger_than_a_segment_is_rejected(tmp_path):
+    spool = EventSpool(tmp_path, segment_bytes=64)
+
+    assert not spool.append(b"x" * 64)
+    assert spool.empty
+    spool.close()
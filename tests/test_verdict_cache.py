@@ -0,0 +1,197 @@
+import asyncio
+import time
+
+from app.core.enums import ActionStatus, RuleAction
+from app.models.pipeline import PipelineResult, TaskResult, TriggeredRuleData
+from app.modules.verdict_cache import RELEASE_LOCK_SCRIPT, RedisCacheBackend, VerdictCache
+
+
+class StandInRedis:
+    """
+    In-memory stand-in for the `redis.asyncio` commands used by RedisCacheBackend.
+
+    Several clients may share one `data` dict, like replicas sharing a server.
+    """
+
+    def __init__(self, data: dict | None = None) -> None:
+        self.data = data if data is not None else {}
+
+    def _get(self, key: str) -> bytes | None:
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value, nx: bool = False, px: int | None = None) -> bool | None:
+        if nx and self._get(key) is not None:
+            return None
+        self.data[key] = (self._encode(value), time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def exists(self, key: str) -> int:
+        return int(self._get(key) is not None)
+
+    async def delete(self, key: str) -> int:
+        return int(self.data.pop(key, None) is not None)
+
+    async def eval(self, script: str, numkeys: int, key: str, token: str) -> int:
+        assert script == RELEASE_LOCK_SCRIPT and numkeys == 1
+        if self._get(key) == self._encode(token):
+            return await self.delete(key)
+        return 0
+
+    def pipeline(self, transaction: bool = True) -> "StandInPipeline":
+        return StandInPipeline(self)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class StandInPipeline:
+    def __init__(self, client: StandInRedis) -> None:
+        self._client = client
+        self._commands = []
+
+    async def __aenter__(self) -> "StandInPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    def set(self, key: str, value, px: int | None = None) -> None:
+        self._commands.append((key, value, px))
+
+    async def execute(self) -> list:
+        return [await self._client.set(key, value, px=px) for key, value, px in self._commands]
+
+
+class FailingRedis(StandInRedis):
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        raise ConnectionError("connection refused")
+
+    async def set(self, key: str, value, nx: bool = False, px: int | None = None) -> bool | None:
+        raise ConnectionError("connection refused")
+
+
+def make_cache(client: StandInRedis, **kwargs) -> VerdictCache:
+    return VerdictCache(RedisCacheBackend("", client=client), secret="test", **kwargs)
+
+
+def make_task() -> TaskResult:
+    rule = TriggeredRuleData(
+        details="Prompt injection", action=RuleAction.BLOCK, id="r1", name="injection", body="ignore", cwe_id="cwe-77"
+    )
+    return TaskResult(
+        status=ActionStatus.BLOCK,
+        pipelines=[
+            PipelineResult(name="Regex Pipeline", status=ActionStatus.BLOCK, triggered_rules=[rule]),
+            PipelineResult(name="ML Pipeline", status=ActionStatus.NOTIFY),
+        ],
+    )
+
+
+def test_concurrent_misses_compute_once():
+    data = {}
+    replicas = [make_cache(StandInRedis(data)), make_cache(StandInRedis(data))]
+    calls = 0
+
+    async def compute() -> TaskResult:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return make_task()
+
+    async def run() -> list[TaskResult]:
+        key = replicas[0].key("prompt", "flow", lambda: "v1")
+        return await asyncio.gather(*[replicas[i % 2].get_or_compute(key, compute) for i in range(6)])
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert sum(not result.cached for result in results) == 1
+    assert all(result.model_dump(exclude={"cached"}) == make_task().model_dump(exclude={"cached"}) for result in results)
+    assert not [key for key in data if ":lock:" in key]
+
+
+def test_values_round_trip():
+    cache = make_cache(StandInRedis())
+    task = make_task()
+
+    async def run() -> list[TaskResult | None]:
+        keys = [cache.key(prompt, "flow", lambda: "v1") for prompt in ("a", "b")]
+        await cache.put_many({keys[0]: task})
+        return await cache.get_many(keys)
+
+    cached, missing = asyncio.run(run())
+    assert missing is None
+    assert cached.cached
+    assert cached.model_dump(exclude={"cached"}) == task.model_dump(exclude={"cached"})
+    assert VerdictCache._unpack(VerdictCache._pack(task)).model_dump(exclude={"cached"}) == task.model_dump(
+        exclude={"cached"}
+    )
+
+
+def test_errors_are_not_cached():
+    cache = make_cache(StandInRedis())
+    task = TaskResult(
+        status=ActionStatus.ALLOW,
+        pipelines=[PipelineResult(name="LLM Pipeline", status=ActionStatus.ERROR, reason="timed out")],
+    )
+
+    async def run() -> TaskResult | None:
+        key = cache.key("prompt", "flow", lambda: "v1")
+        await cache.put_many({key: task})
+        return (await cache.get_many([key]))[0]
+
+    assert asyncio.run(run()) is None
+
+
+def test_backend_error_is_a_miss():
+    cache = make_cache(FailingRedis())
+
+    async def compute() -> TaskResult:
+        return make_task()
+
+    result = asyncio.run(cache.get_or_compute(cache.key("prompt", "flow", lambda: "v1"), compute))
+    assert not result.cached
+    assert result.status == ActionStatus.BLOCK
+    assert cache.stats()["errors"] >= 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_lock_is_computed_and_not_released_by_old_holder():
+    data = {}
+    holder = RedisCacheBackend("", client=StandInRedis(data))
+    cache = make_cache(StandInRedis(data), lock_timeout=5)
+    calls = 0
+
+    async def compute() -> TaskResult:
+        nonlocal calls
+        calls += 1
+        return make_task()
+
+    async def run() -> tuple[TaskResult, bool]:
+        key = cache.key("prompt", "flow", lambda: "v1")
+        stale_token = await holder.acquire_lock(key, ttl=0.2)
+        started_at = time.monotonic()
+        result = await cache.get_or_compute(key, compute)
+        waited = time.monotonic() - started_at
+        assert 0.2 <= waited < 1.0
+
+        new_token = await holder.acquire_lock(key, ttl=5)
+        await holder.release_lock(key, stale_token)
+        still_locked = await holder.is_locked(key)
+        await holder.release_lock(key, new_token)
+        return result, still_locked and not await holder.is_locked(key)
+
+    result, released_by_owner_only = asyncio.run(run())
+    assert calls == 1
+    assert not result.cached
+    assert released_by_owner_only